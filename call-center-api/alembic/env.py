@@ -11,7 +11,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from database import Base
-from models import call, agent, lead, user  # Import all models
+from models import call, call_event, call_archive, agent, lead, user  # Import all models
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,39 @@
+"""add_call_events
+
+Revision ID: 9c4e1a7b2f30
+Revises: 750ba0e2824b
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e1a7b2f30'
+down_revision: Union[str, None] = '750ba0e2824b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('call_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('at_session_id', sa.String(), nullable=False),
+    sa.Column('state', sa.String(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('recorded_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('source', sa.String(), nullable=True),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_call_events_session_occurred', 'call_events', ['at_session_id', 'occurred_at', 'id'], unique=False)
+    op.create_index(op.f('ix_call_events_recorded_at'), 'call_events', ['recorded_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_call_events_recorded_at'), table_name='call_events')
+    op.drop_index('ix_call_events_session_occurred', table_name='call_events')
+    op.drop_table('call_events')
@@ -0,0 +1,49 @@
+"""calls_keyset_indexes
+
+Revision ID: b3d8f1c2a4e5
+Revises: 9c4e1a7b2f30
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d8f1c2a4e5'
+down_revision: Union[str, None] = '9c4e1a7b2f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KEYSET_INDEXES = [
+    ('ix_calls_call_start_id', ['call_start', 'id']),
+    ('ix_calls_agent_call_start_id', ['agent_id', 'call_start', 'id']),
+    ('ix_calls_caller_call_start_id', ['caller_number', 'call_start', 'id']),
+    ('ix_calls_callee_call_start_id', ['callee_number', 'call_start', 'id']),
+]
+
+# Single-column indexes that are prefixes of the composites above
+REPLACED_INDEXES = [
+    ('ix_calls_call_start', ['call_start']),
+    ('ix_calls_agent_id', ['agent_id']),
+    ('ix_calls_caller_number', ['caller_number']),
+    ('ix_calls_callee_number', ['callee_number']),
+]
+
+
+def upgrade() -> None:
+    # Built concurrently so the calls table keeps taking webhook writes
+    with op.get_context().autocommit_block():
+        for name, columns in KEYSET_INDEXES:
+            op.create_index(name, 'calls', columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        for name, _ in REPLACED_INDEXES:
+            op.drop_index(name, table_name='calls', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in REPLACED_INDEXES:
+            op.create_index(name, 'calls', columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        for name, _ in KEYSET_INDEXES:
+            op.drop_index(name, table_name='calls', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,41 @@
+"""calls_phone_search_indexes
+
+Revision ID: c5a9e2d4b7f1
+Revises: b3d8f1c2a4e5
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a9e2d4b7f1'
+down_revision: Union[str, None] = 'b3d8f1c2a4e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Built concurrently so the calls table keeps taking webhook writes
+    with op.get_context().autocommit_block():
+        for column in ('caller_number', 'callee_number'):
+            op.create_index(
+                f'ix_calls_{column}_trgm', 'calls', [column], unique=False,
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True, if_not_exists=True
+            )
+            op.create_index(
+                f'ix_calls_{column}_reverse', 'calls', [sa.text(f'reverse({column}) text_pattern_ops')], unique=False,
+                postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in ('caller_number', 'callee_number'):
+            op.drop_index(f'ix_calls_{column}_reverse', table_name='calls', postgresql_concurrently=True, if_exists=True)
+            op.drop_index(f'ix_calls_{column}_trgm', table_name='calls', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,36 @@
+"""calls_counterparty_e164
+
+Revision ID: d7b1c3e5f9a2
+Revises: c5a9e2d4b7f1
+Create Date: 2026-10-19 14:00:00.000000
+
+Existing rows are filled in by backfill_counterparty.py, in batches, after
+this migration.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b1c3e5f9a2'
+down_revision: Union[str, None] = 'c5a9e2d4b7f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable with no default, so adding it does not rewrite the table
+    op.add_column('calls', sa.Column('counterparty_e164', sa.String(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_calls_counterparty_call_start_id', 'calls', ['counterparty_e164', 'call_start', 'id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_calls_counterparty_call_start_id', table_name='calls', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('calls', 'counterparty_e164')
@@ -0,0 +1,117 @@
+"""partition_calls_by_month
+
+Revision ID: e4a6c8f0b2d4
+Revises: d7b1c3e5f9a2
+Create Date: 2026-10-19 16:00:00.000000
+
+Rebuilds calls as a table range-partitioned by call_start, one partition per
+UTC month from the oldest call through CALL_PARTITION_MONTHS_AHEAD months from
+now, plus calls_default. Rows are copied in one transaction, so writes to
+calls block until it commits: run it in a maintenance window and stop the
+webhook consumers first. services.call_partitions keeps future months created
+after this.
+
+The primary key becomes (id, call_start) and at_session_id loses its unique
+index, because unique indexes on a partitioned table must include the
+partition key. Writers now serialize per session with advisory locks
+(services.call_state.lock_sessions). The indexes on direction and at_call_id,
+which no query used, are not recreated.
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a6c8f0b2d4'
+down_revision: Union[str, None] = 'd7b1c3e5f9a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = int(os.getenv("CALL_PARTITION_MONTHS_AHEAD", 3))
+
+INDEXES = [
+    "CREATE INDEX ix_calls_at_session_id ON calls (at_session_id)",
+    "CREATE INDEX ix_calls_status ON calls (status)",
+    "CREATE INDEX ix_calls_lead_id ON calls (lead_id)",
+    "CREATE INDEX ix_calls_call_start_id ON calls (call_start, id)",
+    "CREATE INDEX ix_calls_agent_call_start_id ON calls (agent_id, call_start, id)",
+    "CREATE INDEX ix_calls_caller_call_start_id ON calls (caller_number, call_start, id)",
+    "CREATE INDEX ix_calls_callee_call_start_id ON calls (callee_number, call_start, id)",
+    "CREATE INDEX ix_calls_counterparty_call_start_id ON calls (counterparty_e164, call_start, id)",
+    "CREATE INDEX ix_calls_caller_number_trgm ON calls USING gin (caller_number gin_trgm_ops)",
+    "CREATE INDEX ix_calls_callee_number_trgm ON calls USING gin (callee_number gin_trgm_ops)",
+    "CREATE INDEX ix_calls_caller_number_reverse ON calls (reverse(caller_number) text_pattern_ops)",
+    "CREATE INDEX ix_calls_callee_number_reverse ON calls (reverse(callee_number) text_pattern_ops)",
+]
+
+# Indexes as they stood at d7b1c3e5f9a2, for downgrade
+UNPARTITIONED_INDEXES = [
+    "CREATE UNIQUE INDEX ix_calls_at_session_id ON calls (at_session_id)",
+    "CREATE INDEX ix_calls_at_call_id ON calls (at_call_id)",
+    "CREATE INDEX ix_calls_direction ON calls (direction)",
+] + INDEXES[1:]
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_constraints(table: str) -> None:
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT calls_agent_id_fkey FOREIGN KEY (agent_id) REFERENCES agents (id)")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT calls_lead_id_fkey FOREIGN KEY (lead_id) REFERENCES leads (id)")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.execute("LOCK TABLE calls IN EXCLUSIVE MODE")
+    op.execute("UPDATE calls SET call_start = coalesce(created_at, now()) WHERE call_start IS NULL")
+
+    op.execute("CREATE TABLE calls_partitioned (LIKE calls INCLUDING DEFAULTS) PARTITION BY RANGE (call_start)")
+    op.execute("ALTER TABLE calls_partitioned ALTER COLUMN call_start SET NOT NULL")
+    op.execute("ALTER TABLE calls_partitioned ADD PRIMARY KEY (id, call_start)")
+
+    now = datetime.now(tz=timezone.utc)
+    oldest = bind.execute(sa.text("SELECT min(call_start) FROM calls")).scalar() or now
+    month, last = _month_start(oldest), _add_months(_month_start(now), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE calls_y{month.year:04d}m{month.month:02d} PARTITION OF calls_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE calls_default PARTITION OF calls_partitioned DEFAULT")
+
+    op.execute("INSERT INTO calls_partitioned SELECT * FROM calls")
+    op.execute("DROP TABLE calls")
+    op.execute("ALTER TABLE calls_partitioned RENAME TO calls")
+    op.execute("ALTER TABLE calls RENAME CONSTRAINT calls_partitioned_pkey TO calls_pkey")
+    _add_constraints("calls")
+    # Built after the copy; each creates one index per partition
+    for statement in INDEXES:
+        op.execute(statement)
+    op.execute("ANALYZE calls")
+
+
+def downgrade() -> None:
+    op.execute("LOCK TABLE calls IN EXCLUSIVE MODE")
+    op.execute("CREATE TABLE calls_unpartitioned (LIKE calls INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO calls_unpartitioned SELECT * FROM calls")
+    # Detached partitions are standalone tables and are left in place
+    op.execute("DROP TABLE calls")
+    op.execute("ALTER TABLE calls_unpartitioned RENAME TO calls")
+    op.execute("ALTER TABLE calls ALTER COLUMN call_start DROP NOT NULL")
+    op.execute("ALTER TABLE calls ADD CONSTRAINT calls_pkey PRIMARY KEY (id)")
+    _add_constraints("calls")
+    for statement in UNPARTITIONED_INDEXES:
+        op.execute(statement)
+    op.execute("ANALYZE calls")
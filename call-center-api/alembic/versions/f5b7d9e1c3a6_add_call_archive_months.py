@@ -0,0 +1,34 @@
+"""add_call_archive_months
+
+Revision ID: f5b7d9e1c3a6
+Revises: e4a6c8f0b2d4
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b7d9e1c3a6'
+down_revision: Union[str, None] = 'e4a6c8f0b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('call_archive_months',
+    sa.Column('month', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('row_count', sa.BigInteger(), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('postgres_bytes', sa.BigInteger(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('month')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('call_archive_months')
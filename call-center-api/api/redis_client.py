@@ -38,12 +38,37 @@ class RedisClient:
             logger.error(f"Redis setex error for key {key}: {str(e)}")
             raise
     
+    async def set_nx(self, key: str, value: str, expire: int) -> bool:
+        """Set key only if it does not exist; True if this call created it."""
+        try:
+            return bool(await self.redis.set(key, value, ex=expire, nx=True))
+        except Exception as e:
+            logger.error(f"Redis SET NX error for key {key}: {str(e)}")
+            raise
+
+    async def exists(self, key: str) -> bool:
+        try:
+            return bool(await self.redis.exists(key))
+        except Exception as e:
+            logger.error(f"Redis EXISTS error for key {key}: {str(e)}")
+            raise
+
     async def delete(self, key: str) -> None:
         try:
             await self.redis.delete(key)
         except Exception as e:
             logger.error(f"Redis delete error for key {key}: {str(e)}")
-    
+
+    async def mget(self, keys: list) -> list:
+        """Values for keys in order, None where a key is missing or Redis fails."""
+        if not keys:
+            return []
+        try:
+            return await self.redis.mget(keys)
+        except Exception as e:
+            logger.error(f"Redis MGET error for {len(keys)} keys: {str(e)}")
+            return [None] * len(keys)
+
     async def delete_pattern(self, pattern: str) -> None:
         try:
             cursor = 0
@@ -56,12 +81,147 @@ class RedisClient:
         except Exception as e:
             logger.error(f"Redis delete_pattern error for pattern {pattern}: {str(e)}")
     
-    async def publish(self, channel: str, message: str) -> None:
+    async def publish(self, channel: str, message: str) -> bool:
+        """Publish a message; False if Redis could not be reached."""
         try:
             await self.redis.publish(channel, message)
+            return True
         except Exception as e:
             logger.error(f"Redis publish error for channel {channel}: {str(e)}")
+            return False
     
+    async def hset(self, key: str, field: str, value: str) -> None:
+        try:
+            await self.redis.hset(key, field, value)
+        except Exception as e:
+            logger.error(f"Redis HSET error for key {key}: {str(e)}")
+
+    async def hget(self, key: str, field: str) -> str | None:
+        try:
+            return await self.redis.hget(key, field)
+        except Exception as e:
+            logger.error(f"Redis HGET error for key {key}: {str(e)}")
+            return None
+
+    async def hgetall(self, key: str) -> dict:
+        try:
+            return await self.redis.hgetall(key)
+        except Exception as e:
+            logger.error(f"Redis HGETALL error for key {key}: {str(e)}")
+            return {}
+
+    async def hdel_if_equal(self, key: str, field: str, value: str) -> None:
+        """Delete a hash field only if it still holds the expected value."""
+        script = """
+        if redis.call('HGET', KEYS[1], ARGV[1]) == ARGV[2] then
+            return redis.call('HDEL', KEYS[1], ARGV[1])
+        end
+        return 0
+        """
+        try:
+            await self.redis.eval(script, 1, key, field, value)
+        except Exception as e:
+            logger.error(f"Redis conditional HDEL error for key {key}: {str(e)}")
+
+    async def xadd(self, key: str, fields: dict, maxlen: int | None = None) -> str | None:
+        """Append an entry to a stream, trimming it approximately to maxlen."""
+        try:
+            return await self.redis.xadd(key, fields, maxlen=maxlen, approximate=True)
+        except Exception as e:
+            logger.error(f"Redis XADD error for stream {key}: {str(e)}")
+            return None
+
+    async def xread(self, streams: dict, count: int | None = None, block: int | None = None):
+        try:
+            return await self.redis.xread(streams, count=count, block=block)
+        except Exception as e:
+            logger.error(f"Redis XREAD error for streams {list(streams)}: {str(e)}")
+            raise
+
+    async def xgroup_create(self, key: str, group: str, id: str = "0") -> None:
+        """Create a consumer group (and the stream) unless it already exists."""
+        try:
+            await self.redis.xgroup_create(key, group, id=id, mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                logger.error(f"Redis XGROUP CREATE error for stream {key}: {str(e)}")
+                raise
+
+    async def xreadgroup(self, group: str, consumer: str, streams: dict, count: int | None = None, block: int | None = None):
+        try:
+            return await self.redis.xreadgroup(group, consumer, streams, count=count, block=block)
+        except Exception as e:
+            logger.error(f"Redis XREADGROUP error for streams {list(streams)}: {str(e)}")
+            raise
+
+    async def xautoclaim(self, key: str, group: str, consumer: str, min_idle_time: int, count: int | None = None):
+        """Claim entries left pending by dead consumers; returns the claimed entries."""
+        try:
+            response = await self.redis.xautoclaim(key, group, consumer, min_idle_time, start_id="0-0", count=count)
+            return response[1]
+        except Exception as e:
+            logger.error(f"Redis XAUTOCLAIM error for stream {key}: {str(e)}")
+            return []
+
+    async def xack(self, key: str, group: str, *ids) -> int:
+        try:
+            return await self.redis.xack(key, group, *ids)
+        except Exception as e:
+            logger.error(f"Redis XACK error for stream {key}: {str(e)}")
+            return 0
+
+    async def xlen(self, key: str) -> int:
+        try:
+            return await self.redis.xlen(key)
+        except Exception as e:
+            logger.error(f"Redis XLEN error for stream {key}: {str(e)}")
+            return 0
+
+    async def xinfo_group(self, key: str, group: str) -> dict | None:
+        """XINFO GROUPS entry for one group (pending, lag, last-delivered-id, ...)."""
+        try:
+            for info in await self.redis.xinfo_groups(key):
+                if info.get("name") == group:
+                    return info
+        except Exception as e:
+            logger.error(f"Redis XINFO GROUPS error for stream {key}: {str(e)}")
+        return None
+
+    async def incr(self, key: str) -> int:
+        try:
+            return await self.redis.incr(key)
+        except Exception as e:
+            logger.error(f"Redis INCR error for key {key}: {str(e)}")
+            raise
+
+    async def xinfo_consumers(self, key: str, group: str) -> list:
+        """XINFO CONSUMERS entries for a group (name, pending, idle, ...)."""
+        try:
+            return await self.redis.xinfo_consumers(key, group)
+        except Exception as e:
+            logger.error(f"Redis XINFO CONSUMERS error for stream {key}: {str(e)}")
+            return []
+
+    async def xgroup_delconsumer(self, key: str, group: str, consumer: str) -> int:
+        """Remove a consumer from a group; returns the entries it still had pending."""
+        try:
+            return await self.redis.xgroup_delconsumer(key, group, consumer)
+        except Exception as e:
+            logger.error(f"Redis XGROUP DELCONSUMER error for stream {key}: {str(e)}")
+            return 0
+
+    async def eval(self, script: str, keys: list, args: list):
+        """Run a Lua script atomically."""
+        try:
+            return await self.redis.eval(script, len(keys), *keys, *args)
+        except Exception as e:
+            logger.error(f"Redis EVAL error for keys {keys}: {str(e)}")
+            raise
+
+    async def time(self) -> tuple[int, int]:
+        """Server time as (seconds, microseconds)."""
+        return await self.redis.time()
+
     async def close(self) -> None:
         try:
             await self.redis.close()
@@ -104,5 +264,19 @@ class RedisClient:
             logger.error(f"Redis LPUSH error for key {key}: {str(e)}")
             return None
 
+    async def lrange(self, key: str, start: int, end: int) -> list:
+        try:
+            return await self.redis.lrange(key, start, end)
+        except Exception as e:
+            logger.error(f"Redis LRANGE error for key {key}: {str(e)}")
+            return []
+
+    async def getdel(self, key: str) -> str | None:
+        try:
+            return await self.redis.getdel(key)
+        except Exception as e:
+            logger.error(f"Redis GETDEL error for key {key}: {str(e)}")
+            return None
+
 
 redis_client = RedisClient()
\ No newline at end of file
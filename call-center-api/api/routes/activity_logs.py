@@ -7,6 +7,8 @@ import logging
 
 from database import get_db
 from crud.activity_log import activity_log_crud
+from crud.read_models import read_models
+from api.json_bytes import JSONBytesResponse
 from schemas.activity_log import ActivityLogCreate, ActivityLogResponse, PaginatedActivityLogs
 
 router = APIRouter()
@@ -27,18 +29,10 @@ async def get_activity_logs(
 ):
     """Get paginated list of activity logs with optional filters"""
     try:
-        activities, total = await activity_log_crud.get_activity_logs_paginated(
+        page_data = await read_models.activity_logs_page(
             db, page, size, activity_type, actor_type, actor_id, target_type, target_id, severity, start_date, end_date
         )
-        total_pages = (total + size - 1) // size
-        
-        return PaginatedActivityLogs(
-            activity_logs=[ActivityLogResponse.model_validate(activity) for activity in activities],
-            total_activity_logs=total,
-            total_pages=total_pages,
-            current_page=page,
-            page_size=size
-        )
+        return JSONBytesResponse(page_data)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching activity logs: {str(e)}")
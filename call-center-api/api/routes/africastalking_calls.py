@@ -25,7 +25,7 @@ async def get_capability_token(request: CapabilityTokenRequest, current_user=Dep
         # Use username as client name if not provided
         client_name = request.client_name or current_user.username
         
-        result = africastalking_service.get_capability_token(
+        result = await africastalking_service.get_capability_token(
             client_name=client_name,
             phone_number=request.phone_number
         )
@@ -48,7 +48,7 @@ class MakeWebRTCCallRequest(BaseModel):
 async def make_call(request: MakeCallRequest, current_user=Depends(get_current_user)):
     """Make a call using Africa's Talking API"""
     try:
-        result = africastalking_service.make_call(
+        result = await africastalking_service.make_call(
             to=request.to,
             from_=request.from_,
             record=request.record,
@@ -72,7 +72,7 @@ async def make_call(request: MakeCallRequest, current_user=Depends(get_current_u
 async def make_webrtc_call(request: MakeWebRTCCallRequest, current_user=Depends(get_current_user)):
     """Make a WebRTC call using capability token"""
     try:
-        result = africastalking_service.make_webrtc_call(
+        result = await africastalking_service.make_webrtc_call(
             to=request.to,
             client_name=current_user.username,
             from_=request.from_
@@ -92,7 +92,7 @@ async def make_webrtc_call(request: MakeWebRTCCallRequest, current_user=Depends(
 async def get_call_status(request: CallStatusRequest, current_user=Depends(get_current_user)):
     """Get call status by session ID"""
     try:
-        result = africastalking_service.get_call_status(request.session_id)
+        result = await africastalking_service.get_call_status(request.session_id)
         
         if not result.get("success", True):  # Default to success=True for backward compatibility
             error_detail = result.get("error", result.get("message", "Unknown error"))
@@ -106,6 +106,14 @@ async def get_call_status(request: CallStatusRequest, current_user=Depends(get_c
         # Handle unexpected errors
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.get("/caller-ids")
+async def get_caller_id_utilization(current_user=Depends(get_current_user)):
+    """In-flight calls and calls this second per caller ID, against the pool limits"""
+    try:
+        return await africastalking_service.caller_id_pool.utilization()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
 @router.post("/webhook")
 async def handle_webhook(payload: dict):
     """Handle Africa's Talking webhooks"""
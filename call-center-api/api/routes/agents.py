@@ -12,6 +12,8 @@ from schemas.agent import AgentCreate, AgentUpdate, AgentOut, AgentStatusUpdate,
 from schemas.user import UserOut
 from api.websocket import manager
 from crud.agent import agent_crud
+from crud.read_models import read_models
+from api.json_bytes import JSONBytesResponse
 from auth import get_current_user
 from utils.activity_logging import activity_logger
 
@@ -34,8 +36,7 @@ async def get_agents(
         department=department,
         agent_type=agent_type
     )
-    agents, total = await agent_crud.get_agents_paginated(db, 1, 100, filters)
-    return agents
+    return JSONBytesResponse(await read_models.agents(db, filters, limit=100))
 
 @router.get("/{agent_id}/queue-status")
 async def get_agent_queue_status(
@@ -62,22 +63,20 @@ async def get_agent_queue_status(
 async def get_agent_calls(
     agent_id: UUID,
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: UserOut = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get calls for a specific agent."""
+    """Get calls for a specific agent, newest first."""
     # Verify agent exists
     agent = await agent_crud.get_agent(db, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    # Return mock data for now - replace with actual call data when available
-    return {
-        "calls": [],
-        "total": 0,
-        "agent_id": str(agent_id),
-        "message": "Call data integration pending"
-    }
+    try:
+        return JSONBytesResponse(await read_models.agent_calls_page(db, agent_id, size=limit, cursor=cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/by-designation", response_model=AgentsByDesignationResponse)
 async def get_agents_by_designation(
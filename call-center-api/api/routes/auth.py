@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
@@ -10,6 +10,7 @@ from crud.user import user_crud
 from schemas.user import UserOut, UserCreate
 from schemas.auth import LoginRequest, LoginResponse
 from core.config import settings
+from services.africastalking_service import africastalking_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -41,6 +42,7 @@ async def create_initial_admin(user_data: UserCreate, db: AsyncSession = Depends
 @router.post("/login", response_model=LoginResponse)
 async def login(
     data: LoginRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ) -> LoginResponse:
     """Authenticate a user and return access and refresh tokens."""
@@ -66,6 +68,10 @@ async def login(
     await user_crud.update_last_login(db, user.id)
     logger.info(f"Login successful for email: {data.email}")
     
+    # Agents place WebRTC calls as their username; fetch the token after the response is sent
+    if user.role == "agent" and user.username:
+        background_tasks.add_task(africastalking_service.prefetch_capability_token, user.username)
+    
     return LoginResponse(
         access_token=access_token,
         refresh_token=refresh_token,
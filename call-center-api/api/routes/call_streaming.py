@@ -1,25 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Depends, WebSocket
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from typing import List
-import json
+from sqlalchemy import select
+import asyncio
 import logging
 import time
+import uuid
 from datetime import datetime
 
 from database import get_db
 from models.call import Call
 from models.agent import Agent
 from services.africastalking_service import africastalking_service
+from services.call_dispatcher import call_dispatcher
+from services.live_calls import live_call_registry, seconds_since
 from auth import get_current_user
-from api.websocket import ConnectionManager
+from api import ws_codec
+from api.websocket import ConnectionManager, receive_until_closed
+from api.routes.websocket_route import get_current_user_ws
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/calls", tags=["Call Streaming"])
 logger = logging.getLogger(__name__)
 
 # WebSocket manager for call streaming
-call_manager = ConnectionManager()
+call_manager = ConnectionManager("call_stream")
 
 class CallRequest(BaseModel):
     to: str
@@ -45,7 +49,7 @@ async def initiate_call(
     """Initiate a call and return session info for streaming"""
     if request.call_type == "webrtc":
         # Use WebRTC approach for browser-based calls
-        result = africastalking_service.make_webrtc_call(
+        result = await africastalking_service.make_webrtc_call(
             to=request.to, 
             client_name=current_user.username,
             from_=request.from_
@@ -58,7 +62,6 @@ async def initiate_call(
         # The actual call will be made by the WebRTC client in the browser
         token_data = result.get("data", result)
         session_id = f"webrtc_{int(time.time())}_{current_user.id}"
-        call_type = "webrtc"
         
         # Create call record but with pending status for WebRTC
         call = Call(
@@ -70,6 +73,7 @@ async def initiate_call(
         )
         db.add(call)
         await db.commit()
+        await live_call_registry.refresh(db, [call.id])
         
         # Notify WebSocket clients
         await call_manager.broadcast({
@@ -82,95 +86,36 @@ async def initiate_call(
         }, "calls")
         
     else:  # voice_api
-        result = africastalking_service.make_call(to=request.to, from_=request.from_)
-        
-        if not result.get("success"):
-            raise HTTPException(status_code=400, detail=result.get("error"))
-        
-        data = result["data"]
-        
-        # Handle Voice API response (silica approach)
-        if "entries" in data and len(data["entries"]) > 0:
-            session_id = data["entries"][0]["sessionId"]
-            call_type = "voice_api"
-        else:
-            # Fallback
-            session_id = f"call_{int(time.time())}_{current_user.id}"
-            call_type = "voice_api"
+        # Reserve the call row and session ID now; the dispatcher places the call
+        # and moves the row to the provider's session ID
+        session_id = f"call_{uuid.uuid4().hex}"
         
         # Check if user has agent record
         agent_query = select(Agent).where(Agent.id == current_user.id)
         agent_result = await db.execute(agent_query)
         agent = agent_result.scalar_one_or_none()
         
-        # Create call record
         call = Call(
+            id=uuid.uuid4(),
             at_session_id=session_id,
-            caller_number=result["from_number"],
-            callee_number=result["to_number"],
-            status="queued",
+            caller_number=request.from_ or "",
+            callee_number=africastalking_service.format_phone_number(request.to),
+            status="dispatching",
             direction="outbound",
             agent_id=agent.id if agent else None
         )
         db.add(call)
         await db.commit()
+        await live_call_registry.refresh(db, [call.id])
         
-        # Notify WebSocket clients
-        await call_manager.broadcast({
-            "type": "call_initiated",
-            "session_id": session_id,
-            "from": result["from_number"],
-            "to": result["to_number"],
-            "status": "queued"
-        }, "calls")
+        try:
+            call_dispatcher.submit(call.id, session_id, request.to, request.from_)
+        except asyncio.QueueFull:
+            call.status = "failed"
+            await db.commit()
+            await live_call_registry.refresh(db, [call.id])
+            raise HTTPException(status_code=503, detail="Call dispatch queue is full, retry shortly")
         
-        # Enable mock progression for testing until AT dashboard is configured
-        import os
-        enable_mock = os.getenv("ENABLE_MOCK_CALLS", "false").lower() == "true"
-        if enable_mock:
-            import asyncio
-            async def mock_call_progression():
-                client_id = f"call_stream_{session_id}"
-                
-                async for db_session in get_db():
-                    try:
-                        await asyncio.sleep(2)
-                        call.status = "ringing"
-                        await db_session.commit()
-                        await call_manager.send_to_client(client_id, {
-                            "type": "call_update",
-                            "session_id": session_id,
-                            "status": "ringing"
-                        })
-                        
-                        await asyncio.sleep(3)
-                        call.status = "in-progress"
-                        call.call_answered = datetime.now()
-                        await db_session.commit()
-                        await call_manager.send_to_client(client_id, {
-                            "type": "call_update", 
-                            "session_id": session_id,
-                            "status": "in-progress"
-                        })
-                        
-                        await asyncio.sleep(15)
-                        call.status = "completed"
-                        call.call_end = datetime.now()
-                        call.total_duration = 20
-                        await db_session.commit()
-                        await call_manager.send_to_client(client_id, {
-                            "type": "call_update",
-                            "session_id": session_id, 
-                            "status": "completed"
-                        })
-                        
-                    except Exception as e:
-                        logger.error(f"Mock progression error: {e}")
-                    finally:
-                        break
-            
-            asyncio.create_task(mock_call_progression())
-
     if request.call_type == "webrtc":
         # For WebRTC calls, return token data for frontend client
         return CallResponse(
@@ -184,117 +129,33 @@ async def initiate_call(
             client_name=token_data.get("clientName")
         )
     else:
-        # For voice API calls, use the original response
+        # Progress and the provider session ID follow on the call's stream channel
         return CallResponse(
             session_id=session_id,
-            status="queued",
-            from_number=result["from_number"],
-            to_number=result["to_number"]
+            status="dispatching",
+            from_number=call.caller_number,
+            to_number=call.callee_number
         )
-    
-    # Check if user has agent record
-    agent_query = select(Agent).where(Agent.id == current_user.id)
-    agent_result = await db.execute(agent_query)
-    agent = agent_result.scalar_one_or_none()
-    
-    # Create call record
-    call = Call(
-        at_session_id=session_id,
-        caller_number=result["from_number"],
-        callee_number=result["to_number"],
-        status="queued",
-        direction="outbound",
-        agent_id=agent.id if agent else None
-    )
-    db.add(call)
-    await db.commit()
-    
-    # Notify WebSocket clients
-    await call_manager.broadcast({
-        "type": "call_initiated",
-        "session_id": session_id,
-        "from": result["from_number"],
-        "to": result["to_number"],
-        "status": "queued"
-    }, "calls")
-    
-    # Enable mock progression for testing until AT dashboard is configured
-    import os
-    enable_mock = os.getenv("ENABLE_MOCK_CALLS", "false").lower() == "true"
-    if enable_mock:
-        import asyncio
-        async def mock_call_progression():
-            client_id = f"call_stream_{session_id}"
-            
-            async for db_session in get_db():
-                try:
-                    await asyncio.sleep(2)
-                    call.status = "ringing"
-                    await db_session.commit()
-                    await call_manager.send_to_client(client_id, {
-                        "type": "call_update",
-                        "session_id": session_id,
-                        "status": "ringing"
-                    })
-                    
-                    await asyncio.sleep(3)
-                    call.status = "in-progress"
-                    call.call_answered = datetime.now()
-                    await db_session.commit()
-                    await call_manager.send_to_client(client_id, {
-                        "type": "call_update", 
-                        "session_id": session_id,
-                        "status": "in-progress"
-                    })
-                    
-                    await asyncio.sleep(15)
-                    call.status = "completed"
-                    call.call_end = datetime.now()
-                    call.total_duration = 20
-                    await db_session.commit()
-                    await call_manager.send_to_client(client_id, {
-                        "type": "call_update",
-                        "session_id": session_id, 
-                        "status": "completed"
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Mock progression error: {e}")
-                finally:
-                    break
-        
-        asyncio.create_task(mock_call_progression())
-    
-    return CallResponse(
-        session_id=session_id,
-        status="queued",
-        from_number=result["from_number"],
-        to_number=result["to_number"]
-    )
+
+@router.get("/dispatch/metrics")
+async def get_dispatch_metrics(current_user=Depends(get_current_user)):
+    """Dispatch pool counters with p50/p99 click-to-dispatch and click-to-answer latency"""
+    return await call_dispatcher.stats()
 
 @router.get("/active")
-async def get_active_calls(
-    db: AsyncSession = Depends(get_db),
-    current_user=Depends(get_current_user)
-):
-    """Get all active calls"""
-    query = select(Call).where(
-        Call.status.in_(["queued", "ringing", "in-progress"])
-    ).order_by(desc(Call.call_start))
-    
-    result = await db.execute(query)
-    calls = result.scalars().all()
-    
+async def get_active_calls(current_user=Depends(get_current_user)):
+    """Get all calls that have not ended, including those still being placed"""
     return [
         {
-            "session_id": call.at_session_id,
-            "from": call.caller_number,
-            "to": call.callee_number,
-            "status": call.status,
-            "duration": call.total_duration,
-            "started_at": call.call_start.isoformat() if call.call_start else None
+            "session_id": entry["at_session_id"],
+            "from": entry["caller_number"],
+            "to": entry["callee_number"],
+            "status": entry["status"],
+            "duration": seconds_since(entry["call_start"]),
+            "agent_name": entry["agent_name"],
+            "started_at": entry["call_start"]
         }
-        for call in calls
+        for entry in await live_call_registry.entries()
     ]
 
 @router.get("/{session_id}")
@@ -325,12 +186,18 @@ async def get_call_details(
 @router.websocket("/stream/{session_id}")
 async def stream_call(websocket: WebSocket, session_id: str):
     """WebSocket endpoint for real-time call streaming"""
+    current_user = await get_current_user_ws(websocket)
+    if not current_user:
+        # The authentication function already closed the connection
+        return
+    
     client_id = f"call_stream_{session_id}"
-    await call_manager.connect(websocket, client_id)
+    if not await call_manager.connect(websocket, client_id, f"user-{current_user.id}"):
+        return
     
     try:
         # Send connection confirmation
-        await websocket.send_json({
+        await ws_codec.send_message(websocket, {
             "type": "connection",
             "message": "Connected to Call Center API",
             "timestamp": datetime.now().isoformat(),
@@ -344,7 +211,7 @@ async def stream_call(websocket: WebSocket, session_id: str):
             call = result.scalar_one_or_none()
             
             if call:
-                await websocket.send_json({
+                await ws_codec.send_message(websocket, {
                     "type": "call_status",
                     "session_id": session_id,
                     "status": call.status,
@@ -352,19 +219,11 @@ async def stream_call(websocket: WebSocket, session_id: str):
                 })
             break
         
-        # Keep connection alive and handle messages
-        while True:
-            try:
-                data = await websocket.receive_text()
-                # Echo back for testing
-                await websocket.send_json({"type": "echo", "data": data})
-            except Exception as e:
-                logger.error(f"Error receiving WebSocket message: {e}")
-                break
-            
-    except WebSocketDisconnect:
+        # Updates are pushed by send_to_client; only liveness and pings are read here
+        await receive_until_closed(websocket)
         logger.info(f"WebSocket disconnected: {client_id}")
-        call_manager.disconnect(client_id)
+            
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
+    finally:
         call_manager.disconnect(client_id)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
@@ -7,9 +8,16 @@ from uuid import UUID
 import logging
 
 from database import get_db
-from schemas.call import CallCreate, CallUpdate, CallResponse, PaginatedCalls, CallFilters, CallStatsResponse, LiveCallResponse
+from schemas.call import (
+    CallCreate, CallUpdate, CallResponse, PaginatedCalls, CallFilters, CallStatsResponse, LiveCallResponse, CallSearchResult,
+    CallBatchRequest, CallBatchResponse, CallStatusBatchUpdate, CallStatusBatchResponse
+)
 from crud.call import CallCRUD
 from crud.dashboard import dashboard_crud
+from crud.read_models import read_models
+from api.json_bytes import JSONBytesResponse
+from services.call_export import call_exporter, EXPORT_MEDIA_TYPES
+from services.call_state import CALL_STATUS_RANK
 from models.call import Call
 from models.agent import Agent
 from auth import get_current_user
@@ -22,22 +30,19 @@ call_crud = CallCRUD()
 
 @router.get("/", response_model=PaginatedCalls)
 async def get_calls(
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     limit: int = Query(100, ge=1, le=1000),
+    count: str = Query("none", regex="^(none|exact|estimate)$", description="Whether to include a total"),
     filters: CallFilters = Depends(),
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Get paginated list of calls with optional filters"""
-    calls = await call_crud.get_calls(db, skip=skip, limit=limit, filters=filters)
-    total = await call_crud.count_calls(db, filters=filters)
-    
-    return PaginatedCalls(
-        calls=calls,
-        total=total,
-        skip=skip,
-        limit=limit
-    )
+    """Get a page of calls, newest first, with optional filters"""
+    try:
+        page = await read_models.calls_page(db, size=limit, filters=filters, cursor=cursor, count=count)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONBytesResponse(page)
 
 @router.get("/stats", response_model=CallStatsResponse)
 async def get_call_statistics(
@@ -55,6 +60,77 @@ async def get_call_statistics(
     stats = await call_crud.get_call_stats(db, start_date, end_date)
     return stats
 
+@router.get("/search", response_model=List[CallSearchResult])
+async def search_calls(
+    q: str = Query(..., description="Digits of a caller or callee number"),
+    match: str = Query("contains", regex="^(contains|suffix)$"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Search calls by phone number fragment, best match first"""
+    try:
+        results = await call_crud.search_calls_by_number(db, q, match=match, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [CallSearchResult(call=call, rank=rank) for call, rank in results]
+
+@router.get("/export")
+async def export_calls(
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    gzip: bool = Query(False, description="Compress the file with gzip"),
+    filters: CallFilters = Depends(),
+    current_user = Depends(get_current_user)
+):
+    """Stream every call matching the filters as CSV or NDJSON, newest first"""
+    filename = f"calls-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        call_exporter.export(filters, fmt=format, gzip=gzip),
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/live", response_model=List[LiveCallResponse])
+async def get_live_calls(
+    designation: Optional[str] = Query(None, description="Agent designation filter"),
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get live calls"""
+    try:
+        return JSONBytesResponse(await dashboard_crud.get_live_calls(db, current_user, designation))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting live calls: {str(e)}")
+        return JSONBytesResponse([])  # Return empty list instead of error
+
+@router.post("/batch-get", response_model=CallBatchResponse)
+async def batch_get_calls(
+    request: CallBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Get up to 500 calls by ID; IDs with no call are listed under missing"""
+    return JSONBytesResponse(await read_models.calls_by_ids(db, request.ids))
+
+@router.post("/bulk-status", response_model=CallStatusBatchResponse)
+async def bulk_update_call_status(
+    request: CallStatusBatchUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Set the same status on up to 500 calls in one transaction; calls it would move back are left unchanged"""
+    if request.status not in CALL_STATUS_RANK:
+        raise HTTPException(status_code=400, detail=f"Unknown call status: {request.status}")
+    calls = await call_crud.update_call_statuses(db, request.ids, request.status, current_user.id, current_user.username)
+    updated = {call["id"] for call in calls}
+    return JSONBytesResponse({
+        "calls": calls,
+        "missing": [call_id for call_id in request.ids if call_id not in updated],
+        "unchanged": [call["id"] for call in calls if call["status"] != request.status],
+    })
+
 @router.get("/{call_id}", response_model=CallResponse)
 async def get_call(
     call_id: UUID,
@@ -62,10 +138,10 @@ async def get_call(
     current_user = Depends(get_current_user)
 ):
     """Get a specific call by ID"""
-    call = await call_crud.get_call(db, call_id)
-    if not call:
+    call = await read_models.call_by_id(db, call_id)
+    if call is None:
         raise HTTPException(status_code=404, detail="Call not found")
-    return call
+    return JSONBytesResponse(call)
 
 @router.post("/", response_model=CallResponse)
 async def create_call(
@@ -85,7 +161,7 @@ async def make_call(
     current_user = Depends(get_current_user)
 ):
     """Make a call using Africa's Talking"""
-    result = africastalking_service.make_call(to=to, from_=from_)
+    result = await africastalking_service.make_call(to=to, from_=from_)
     
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -130,17 +206,3 @@ async def delete_call(
     if not success:
         raise HTTPException(status_code=404, detail="Call not found")
     return {"message": "Call deleted successfully"}
-
-@router.get("/live", response_model=List[LiveCallResponse])
-async def get_live_calls(
-    designation: Optional[str] = Query(None, description="Agent designation filter"),
-    current_user = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """Get live calls"""
-    try:
-        calls = await dashboard_crud.get_live_calls(db, current_user, designation)
-        return calls or []  # Return empty list if None
-    except Exception as e:
-        logger.error(f"Error getting live calls: {str(e)}")
-        return []  # Return empty list instead of error
@@ -5,6 +5,7 @@ import logging
 
 from database import get_db
 from crud.dashboard import dashboard_crud
+from api.json_bytes import JSONBytesResponse
 from schemas.call import DashboardStats, LiveCallResponse, HourlyCallStats
 from schemas.agent import AgentOut
 from auth import get_current_user
@@ -38,8 +39,7 @@ async def get_live_calls(
 ):
     """Fetch live calls based on user role and designation."""
     try:
-        calls = await dashboard_crud.get_live_calls(db, current_user, designation)
-        return calls
+        return JSONBytesResponse(await dashboard_crud.get_live_calls(db, current_user, designation))
     except HTTPException as e:
         raise e
     except Exception as e:
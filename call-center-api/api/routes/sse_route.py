@@ -0,0 +1,136 @@
+from fastapi import APIRouter, Request, HTTPException, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+from jose import jwt, JWTError
+import json
+import logging
+
+from database import AsyncSessionLocal
+from crud.dashboard import dashboard_crud
+from crud.agent import agent_crud
+from crud.user import user_crud
+from schemas.agent import AgentFilters
+from schemas.user import UserOut
+from services.event_stream import event_stream, scope_channels
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Disable proxy buffering so events are flushed through nginx as they are written
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+SSE_RETRY_MS = 3000
+
+async def get_current_user_sse(request: Request) -> UserOut:
+    """Authenticate from the Bearer header, or ?token= since EventSource cannot set headers."""
+    authorization = request.headers.get("Authorization")
+    if authorization and authorization.startswith("Bearer "):
+        token = authorization[7:]
+    else:
+        token = request.query_params.get("token")
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        email: Optional[str] = payload.get("sub")
+    except JWTError:
+        email = None
+    if email is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+
+    # Use a short-lived session; a request-scoped one would be held for the whole stream
+    async with AsyncSessionLocal() as db:
+        user = await user_crud.get_user_by_email(db, email, current_user=None)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    return UserOut.from_orm(user)
+
+def format_sse(data: str, event: str, event_id: Optional[str] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id else []
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+def resume_id(request: Request) -> Optional[str]:
+    """Browsers send Last-Event-ID on reconnect; ?last_event_id= covers manual clients"""
+    return request.headers.get("Last-Event-ID") or request.query_params.get("last_event_id")
+
+async def stream_events(
+    request: Request,
+    channels: list,
+    event: str,
+    last_event_id: Optional[str] = None,
+    initial: Optional[dict] = None
+) -> AsyncIterator[str]:
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    if initial is not None:
+        yield format_sse(json.dumps(initial, default=str), initial.get("type", event))
+
+    async for channel, event_id, payload in event_stream.listen(
+        channels,
+        last_event_id,
+        block_ms=settings.SSE_KEEPALIVE_SECONDS * 1000,
+        heartbeat=True
+    ):
+        if await request.is_disconnected():
+            break
+        if event_id is None:
+            yield ": keep-alive\n\n"
+            continue
+        yield format_sse(payload, event, event_id)
+
+@router.get("/live-calls")
+async def sse_live_calls(request: Request, designation: Optional[str] = None):
+    """Server-Sent Events feed of live call updates."""
+    current_user = await get_current_user_sse(request)
+    channels = scope_channels("live_calls", current_user, designation)
+    return StreamingResponse(
+        stream_events(request, channels, "live_call", resume_id(request)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.get("/hourly-stats")
+async def sse_hourly_stats(request: Request, designation: Optional[str] = None):
+    """Server-Sent Events feed of hourly stats updates."""
+    current_user = await get_current_user_sse(request)
+    channels = scope_channels("hourly_stats", current_user, designation)
+    last_event_id = resume_id(request)
+
+    initial = None
+    if not last_event_id:
+        async with AsyncSessionLocal() as db:
+            stats = await dashboard_crud.get_hourly_stats(db, current_user, designation)
+        initial = {"type": "hourly_stats", "data": [stat.model_dump() for stat in stats]}
+
+    return StreamingResponse(
+        stream_events(request, channels, "hourly_stats", last_event_id, initial),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.get("/agents")
+async def sse_agents(request: Request, designation: Optional[str] = None):
+    """Server-Sent Events feed of agent updates."""
+    current_user = await get_current_user_sse(request)
+    channels = scope_channels("agents", current_user, designation)
+    last_event_id = resume_id(request)
+
+    initial = None
+    if not last_event_id:
+        page, size = 1, 100
+        async with AsyncSessionLocal() as db:
+            agents, _ = await agent_crud.get_agents_by_designation(db, designation or current_user.designation or "super-admin", page, size, AgentFilters())
+            initial = {"type": "agent_update", "data": [agent_crud._serialize_agent(agent) for agent in agents]}
+
+    return StreamingResponse(
+        stream_events(request, channels, "agent_update", last_event_id, initial),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
@@ -1,23 +1,27 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
 from fastapi.responses import PlainTextResponse
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from datetime import datetime
 from typing import Dict, Any
 import logging
+import time
 
-from database import get_db
-from models.call import Call
+from auth import get_current_user
+from schemas.user import UserOut
 from api.routes.call_streaming import call_manager
-from services.africastalking_service import call_mappings
+from services.call_routing import call_routing
+from services.webhook_ingest import webhook_ingest
+from services.webhook_dedupe import webhook_dedupe
+from services.africastalking_service import africastalking_service
+from services.call_state import status_rank, webhook_state, CALL_ANSWERED_RANK, CALL_TERMINAL_RANK
+from services.call_dispatcher import call_dispatcher
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.post("/call")
 @router.get("/call")
-async def handle_call_webhook(request: Request, db: AsyncSession = Depends(get_db)):
+async def handle_call_webhook(request: Request):
     """Handle Africa's Talking call webhook - returns XML for call routing"""
+    started = time.perf_counter()
     try:
         # Get form data or query params
         if request.method == "POST":
@@ -26,9 +30,6 @@ async def handle_call_webhook(request: Request, db: AsyncSession = Depends(get_d
         else:
             data = dict(request.query_params)
         
-        logger.info(f"Call webhook received: {data}")
-        logger.info(f"FULL WEBHOOK DATA: {data}")
-        
         # Extract key parameters
         session_id = data.get('sessionId', '')
         caller_number = data.get('callerNumber', '')
@@ -52,7 +53,7 @@ async def handle_call_webhook(request: Request, db: AsyncSession = Depends(get_d
         
         # For Voice API calls - use mapping
         elif is_active == '1' and call_state in ['', 'Ringing', 'Answered']:
-            target_number = call_mappings.get(session_id)
+            target_number = await call_routing.get(session_id)
             
             if target_number:
                 xml_response = f'''<?xml version="1.0" encoding="UTF-8"?>
@@ -65,47 +66,44 @@ async def handle_call_webhook(request: Request, db: AsyncSession = Depends(get_d
             else:
                 logger.info(f"❌ NO MAPPING FOUND for session {session_id}")
         
-        # For other webhook events, process normally
-        return await handle_call_callback_data(data, db)
+        # For other webhook events, queue for the call record
+        return await handle_call_callback_data(data)
         
     except Exception as e:
         logger.error(f"Call webhook error: {str(e)}")
         return {"status": "error", "message": str(e)}
+    finally:
+        webhook_ingest.metrics.record_ack(started)
 
-async def handle_call_callback_data(data: dict, db: AsyncSession):
-    """Process call callback data"""
+async def handle_call_callback_data(data: dict):
+    """Queue call callback data; the ingest consumers apply it to calls in batches"""
     try:
         session_id = data.get("sessionId")
-        caller_number = data.get("callerNumber") 
-        destination_number = data.get("destinationNumber")
         status = data.get("status")
-        duration = data.get("durationInSeconds", "0")
         
-        logger.info(f"Processing callback: session={session_id}, status={status}")
+        if not session_id:
+            return {"status": "success"}
         
-        if session_id:
-            query = select(Call).where(Call.at_session_id == session_id)
-            result = await db.execute(query)
-            call = result.scalar_one_or_none()
-            
-            if not call:
-                call = Call(
-                    at_session_id=session_id,
-                    caller_number=caller_number,
-                    callee_number=destination_number,
-                    status=status,
-                    direction="outbound",
-                    total_duration=int(duration) if duration.isdigit() else 0
-                )
-                db.add(call)
-            else:
-                call.status = status
-                call.total_duration = int(duration) if duration.isdigit() else 0
-                
-                if status in ["completed", "failed", "busy", "no-answer"]:
-                    call.call_end = datetime.utcnow()
-            
-            await db.commit()
+        # Provider retries are acknowledged without touching the queue or the database
+        if await webhook_dedupe.is_duplicate(data):
+            logger.info(f"Duplicate callback suppressed: session={session_id}, status={status}")
+            return {"status": "success"}
+        
+        logger.info(f"Queueing callback: session={session_id}, status={status}")
+        logger.debug(f"Callback payload: {data}")
+        
+        try:
+            await webhook_ingest.enqueue(data)
+        except Exception:
+            await webhook_dedupe.forget(data)
+            raise
+        
+        # Free the caller-ID slot as soon as the provider reports the call over
+        state = webhook_state(data)
+        if status_rank(state) == CALL_TERMINAL_RANK:
+            await africastalking_service.caller_id_pool.release_session(session_id)
+        elif status_rank(state) == CALL_ANSWERED_RANK:
+            await call_dispatcher.record_answer(session_id)
         
         return {"status": "success"}
         
@@ -114,23 +112,26 @@ async def handle_call_callback_data(data: dict, db: AsyncSession):
         return {"status": "error", "message": str(e)}
 
 @router.post("/callback") 
-async def handle_callback_webhook(request: Request, db: AsyncSession = Depends(get_db)):
+async def handle_callback_webhook(request: Request):
     """Handle Africa's Talking event callbacks"""
+    started = time.perf_counter()
     try:
         logger.info("=== EVENT CALLBACK RECEIVED ===")
         form_data = await request.form()
         data = dict(form_data)
-        logger.info(f"Event data: {data}")
         
-        return await handle_call_callback_data(data, db)
+        return await handle_call_callback_data(data)
         
     except Exception as e:
         logger.error(f"Event callback error: {str(e)}")
         return {"status": "error", "message": str(e)}
+    finally:
+        webhook_ingest.metrics.record_ack(started)
 
 @router.post("/africastalking")
-async def handle_africastalking_webhook(request: Request, db: AsyncSession = Depends(get_db)):
+async def handle_africastalking_webhook(request: Request):
     """Handle general Africa's Talking webhooks"""
+    started = time.perf_counter()
     try:
         form_data = await request.form()
         data = dict(form_data)
@@ -144,8 +145,15 @@ async def handle_africastalking_webhook(request: Request, db: AsyncSession = Dep
         if recording_url:
             logger.info(f"Recording available: {recording_url}")
         
-        return await handle_call_callback_data(data, db)
+        return await handle_call_callback_data(data)
         
     except Exception as e:
         logger.error(f"AT webhook error: {str(e)}")
         return {"status": "error", "message": str(e)}
+    finally:
+        webhook_ingest.metrics.record_ack(started)
+
+@router.get("/metrics")
+async def webhook_metrics(current_user: UserOut = Depends(get_current_user)):
+    """Webhook ack latency and duplicate suppression for this worker, and the shared ingest queue depth."""
+    return {**await webhook_ingest.stats(), "dedupe": webhook_dedupe.stats()}
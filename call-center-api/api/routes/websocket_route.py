@@ -5,8 +5,6 @@ from typing import Optional
 import logging
 import json
 from datetime import datetime, timedelta, timezone
-import asyncio
-from collections import defaultdict
 from jose import jwt
 from jose.exceptions import JWTError
 
@@ -19,63 +17,15 @@ from schemas.agent import AgentFilters
 from auth import get_current_user
 from schemas.user import UserOut
 from models.user import User
-from api.websocket import manager
-from api.redis_client import redis_client
+from api import ws_codec
+from api.websocket import manager, connection_guard, serve_until_closed, NODE_ID
+from services.event_stream import event_stream, scope_channels
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Throttle mechanism to prevent excessive messages
-class MessageThrottle:
-    def __init__(self, min_interval: float = 0.1):  # 100ms minimum interval
-        self.min_interval = min_interval
-        self.last_message_time = defaultdict(float)
-        self.pending_messages = {}
-        self.locks = defaultdict(asyncio.Lock)
-
-    async def send_with_throttle(self, websocket: WebSocket, message: dict, message_key: str):
-        """Send message with throttling to prevent excessive updates."""
-        current_time = asyncio.get_event_loop().time()
-        lock = self.locks[message_key]
-        
-        async with lock:
-            last_time = self.last_message_time[message_key]
-            elapsed = current_time - last_time
-            
-            if elapsed < self.min_interval:
-                # Update pending message instead of sending immediately
-                self.pending_messages[message_key] = message
-            else:
-                # Send the message and update the timestamp
-                try:
-                    await websocket.send_json(message)
-                    self.last_message_time[message_key] = current_time
-                    
-                    # If there's a pending message, send it after the interval
-                    if message_key in self.pending_messages:
-                        # Schedule the pending message with a delay
-                        pending_message = self.pending_messages.pop(message_key)
-                        asyncio.create_task(self._send_delayed_message(
-                            websocket, pending_message, message_key, current_time
-                        ))
-                except Exception:
-                    # If sending fails, clear the pending message
-                    self.pending_messages.pop(message_key, None)
-
-    async def _send_delayed_message(self, websocket: WebSocket, message: dict, message_key: str, current_time: float):
-        """Send a delayed message after the minimum interval."""
-        await asyncio.sleep(self.min_interval)
-        try:
-            await websocket.send_json(message)
-            self.last_message_time[message_key] = asyncio.get_event_loop().time()
-        except Exception as e:
-            logger.error(f"Error sending delayed message: {e}")
-
-# Create a global throttle instance
-message_throttle = MessageThrottle()
-
 async def get_current_user_ws(websocket: WebSocket) -> UserOut:
     """Get current user from WebSocket connection using Bearer token."""
     # Extract Authorization header from WebSocket connection
@@ -116,10 +66,11 @@ async def get_current_user_ws(websocket: WebSocket) -> UserOut:
 @router.websocket("/live-calls")
 async def websocket_live_calls(
     websocket: WebSocket,
-    designation: Optional[str] = None
+    designation: Optional[str] = None,
+    last_event_id: Optional[str] = None
 ):
     """WebSocket endpoint for live call updates."""
-    await websocket.accept()
+    await ws_codec.accept(websocket)
     
     # Authenticate the user
     current_user = await get_current_user_ws(websocket)
@@ -127,156 +78,152 @@ async def websocket_live_calls(
         # The authentication function already closed the connection
         return
     
-    # Subscribe to both user-specific and general channels
-    channels = [f"live_calls:{current_user.id}:{designation or 'all'}"]
+    if not await connection_guard.admit(websocket, f"user-{current_user.id}"):
+        return
     
-    # Add general channels based on user role
-    if current_user.role == "super-admin":
-        channels.append(f"live_calls:general:super-admin")
-    elif designation:
-        channels.append(f"live_calls:general:{designation}")
+    # Read both user-specific and general streams
+    channels = scope_channels("live_calls", current_user, designation)
     
-    try:
-        pubsub = redis_client.redis.pubsub()
-        await pubsub.subscribe(*channels)  # Subscribe to multiple channels
-        await websocket.send_json({"type": "connected", "message": "WebSocket connected"})
+    async def pump():
+        try:
+            await ws_codec.send_message(websocket, {"type": "connected", "message": "WebSocket connected"})
         
-        async for message in pubsub.listen():
-            if message["type"] == "message":
+            async for channel, event_id, payload in event_stream.listen(channels, last_event_id):
                 try:
-                    data = json.loads(message["data"])
-                    # Use call ID as the key to throttle updates for the same call
-                    call_id = data.get("id", "unknown")
-                    message_key = f"call_{call_id}"
-                    await message_throttle.send_with_throttle(websocket, data, message_key)
+                    data = json.loads(payload)
+                    data["event_id"] = event_id
+                    # Every event is sent, in stream order, so a client resuming
+                    # from the last event_id it saw has missed nothing
+                    await ws_codec.send_message(websocket, data)
                 except json.JSONDecodeError:
-                    logger.error("Failed to decode Redis message")
+                    logger.error(f"Failed to decode event {event_id} from {channel}")
                 except Exception as e:
-                    logger.error(f"Error processing Redis message: {e}")
+                    logger.error(f"Error processing event {event_id} from {channel}: {e}")
                 
-    except Exception as e:
-        logger.error(f"WebSocket error: {str(e)}")
-        await websocket.close(code=1000)
-    finally:
-        await pubsub.unsubscribe(*channels)
-        await pubsub.close()
+        except Exception as e:
+            logger.error(f"WebSocket error: {str(e)}")
+            await websocket.close(code=1000)
+    
+    await serve_until_closed(websocket, pump())
 
 @router.websocket("/hourly-stats")
 async def websocket_hourly_stats(
     websocket: WebSocket,
-    designation: Optional[str] = None
+    designation: Optional[str] = None,
+    last_event_id: Optional[str] = None
 ):
     """WebSocket endpoint for hourly stats updates."""
-    await websocket.accept()
+    await ws_codec.accept(websocket)
     
     # Authenticate the user
     current_user = await get_current_user_ws(websocket)
     if not current_user:
         # The authentication function already closed the connection
         return
+    
+    if not await connection_guard.admit(websocket, f"user-{current_user.id}"):
+        return
         
     # Import here to avoid circular imports
     from database import engine
     from sqlalchemy.ext.asyncio import AsyncSession
     
-    async with AsyncSession(engine) as db:
-        # Subscribe to both user-specific and general channels
-        channels = [f"hourly_stats:{current_user.id}:{designation or 'all'}"]
+    # Read both user-specific and general streams
+    channels = scope_channels("hourly_stats", current_user, designation)
+    
+    async def pump():
+        try:
+            await ws_codec.send_message(websocket, {"type": "connected", "message": "WebSocket connected for hourly stats"})
         
-        # Add general channels based on user role
-        if current_user.role == "super-admin":
-            channels.append(f"hourly_stats:general:super-admin")
-        elif designation:
-            channels.append(f"hourly_stats:general:{designation}")
+            # Send initial hourly stats unless the client is resuming from the stream
+            if not last_event_id:
+                async with AsyncSession(engine) as db:
+                    stats = await dashboard_crud.get_hourly_stats(db, current_user, designation)
+                await ws_codec.send_message(websocket, {
+                    "type": "hourly_stats",
+                    "data": [stat.model_dump() for stat in stats]
+                })
         
-        try:
-            pubsub = redis_client.redis.pubsub()
-            await pubsub.subscribe(*channels)
-            await websocket.send_json({"type": "connected", "message": "WebSocket connected for hourly stats"})
-            
-            # Send initial hourly stats
-            stats = await dashboard_crud.get_hourly_stats(db, current_user, designation)
-            await websocket.send_json({
-                "type": "hourly_stats",
-                "data": [stat.model_dump() for stat in stats]
-            })
-            
-            async for message in pubsub.listen():
-                if message["type"] == "message":
-                    try:
-                        data = json.loads(message["data"])
-                        # Use a unique key for stats to apply throttling
-                        message_key = f"stats_{current_user.id}"
-                        await message_throttle.send_with_throttle(websocket, data, message_key)
-                    except json.JSONDecodeError:
-                        logger.error("Failed to decode Redis message")
-                    except Exception as e:
-                        logger.error(f"Error processing Redis message: {e}")
-                    
+            async for channel, event_id, payload in event_stream.listen(channels, last_event_id):
+                try:
+                    data = json.loads(payload)
+                    data["event_id"] = event_id
+                    await ws_codec.send_message(websocket, data)
+                except json.JSONDecodeError:
+                    logger.error(f"Failed to decode event {event_id} from {channel}")
+                except Exception as e:
+                    logger.error(f"Error processing event {event_id} from {channel}: {e}")
+                
         except Exception as e:
             logger.error(f"WebSocket error in hourly_stats: {str(e)}")
             await websocket.close(code=1000)
-        finally:
-            await pubsub.unsubscribe(*channels)
-            await pubsub.close()
+    
+    await serve_until_closed(websocket, pump())
 
 @router.websocket("/agents")
 async def websocket_agents(
     websocket: WebSocket,
-    designation: Optional[str] = None
+    designation: Optional[str] = None,
+    last_event_id: Optional[str] = None
 ):
     """WebSocket endpoint for agent updates."""
-    await websocket.accept()
+    await ws_codec.accept(websocket)
     
     # Authenticate the user
     current_user = await get_current_user_ws(websocket)
     if not current_user:
         # The authentication function already closed the connection
         return
+    
+    if not await connection_guard.admit(websocket, f"user-{current_user.id}"):
+        return
         
     # Import here to avoid circular imports
     from database import engine
     from sqlalchemy.ext.asyncio import AsyncSession
     
-    async with AsyncSession(engine) as db:
-        # Subscribe to both user-specific and general channels
-        channels = [f"agents:{current_user.id}:{designation or 'all'}"]
+    # Read both user-specific and general streams
+    channels = scope_channels("agents", current_user, designation)
+    
+    async def pump():
+        try:
+            await ws_codec.send_message(websocket, {"type": "connected", "message": "WebSocket connected for agent updates"})
         
-        # Add general channels based on user role
-        if current_user.role == "super-admin":
-            channels.append(f"agents:general:super-admin")
-        elif designation:
-            channels.append(f"agents:general:{designation}")
+            # Send initial agent data unless the client is resuming from the stream
+            if not last_event_id:
+                page, size = 1, 100
+                async with AsyncSession(engine) as db:
+                    agents, _ = await agent_crud.get_agents_by_designation(db, designation or current_user.designation or "super-admin", page, size, AgentFilters())
+                    agent_data = [agent_crud._serialize_agent(agent) for agent in agents]
+                await ws_codec.send_message(websocket, {
+                    "type": "agent_update",
+                    "data": agent_data
+                })
         
-        try:
-            pubsub = redis_client.redis.pubsub()
-            await pubsub.subscribe(*channels)
-            await websocket.send_json({"type": "connected", "message": "WebSocket connected for agent updates"})
-            
-            # Send initial agent data
-            page, size = 1, 100
-            agents, _ = await agent_crud.get_agents_by_designation(db, designation or current_user.designation or "super-admin", page, size, AgentFilters())
-            await websocket.send_json({
-                "type": "agent_update",
-                "data": [agent_crud._serialize_agent(agent) for agent in agents]
-            })
-            
-            async for message in pubsub.listen():
-                if message["type"] == "message":
-                    try:
-                        data = json.loads(message["data"])
-                        # Use agent ID as the key to throttle updates for the same agent
-                        agent_id = data.get("id", "unknown")
-                        message_key = f"agent_{agent_id}"
-                        await message_throttle.send_with_throttle(websocket, data, message_key)
-                    except json.JSONDecodeError:
-                        logger.error("Failed to decode Redis message")
-                    except Exception as e:
-                        logger.error(f"Error processing Redis message: {e}")
-                    
+            async for channel, event_id, payload in event_stream.listen(channels, last_event_id):
+                try:
+                    data = json.loads(payload)
+                    data["event_id"] = event_id
+                    await ws_codec.send_message(websocket, data)
+                except json.JSONDecodeError:
+                    logger.error(f"Failed to decode event {event_id} from {channel}")
+                except Exception as e:
+                    logger.error(f"Error processing event {event_id} from {channel}: {e}")
+                
         except Exception as e:
             logger.error(f"WebSocket error in agents: {str(e)}")
             await websocket.close(code=1000)
-        finally:
-            await pubsub.unsubscribe(*channels)
-            await pubsub.close()
\ No newline at end of file
+    
+    await serve_until_closed(websocket, pump())
+
+@router.get("/stats")
+async def websocket_stats(current_user: UserOut = Depends(get_current_user)):
+    """Connection metrics for this worker: active, reaped and rejected sockets."""
+    return {
+        "node_id": NODE_ID,
+        **connection_guard.stats(),
+        "managers": {
+            name: len(connection_manager.active_connections)
+            for name, connection_manager in manager.registry.items()
+        }
+    }
@@ -1,24 +1,190 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List
+from typing import Awaitable, Dict, List, Optional
+from collections import defaultdict
+import asyncio
 import json
 import logging
+import os
+import socket
+import time
+import uuid
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from crud.agent import agent_crud
 from database import get_db
+from api.redis_client import redis_client
+from api import ws_codec
+from core.config import settings
 
 logger = logging.getLogger(__name__)
 
-class ConnectionManager:
+# Identifies this worker process in the cluster-wide connection registry
+NODE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+NODE_CHANNEL_PREFIX = "ws_node"
+NODE_ALIVE_KEY = "ws_node_alive:{}"
+BROADCAST_CHANNEL = "ws_broadcast"
+
+# Whether start_relay currently holds a subscription; while it does not,
+# broadcasts are delivered to this node's sockets directly
+relay_state = {"subscribed": False}
+
+async def node_heartbeat() -> None:
+    """Mark this node alive for WS_NODE_TTL_SECONDS"""
+    try:
+        await redis_client.setex(NODE_ALIVE_KEY.format(NODE_ID), settings.WS_NODE_TTL_SECONDS, "1")
+    except Exception as e:
+        logger.error(f"WebSocket node heartbeat failed: {e}")
+
+async def node_alive(node_id: str) -> bool:
+    try:
+        return await redis_client.exists(NODE_ALIVE_KEY.format(node_id))
+    except Exception:
+        # Unknown; let the publish decide
+        return True
+
+class ConnectionGuard:
+    """Node-wide admission control, heartbeats and idle reaping for every WebSocket"""
+
     def __init__(self):
+        self.connections: Dict[WebSocket, dict] = {}
+        self.per_user: Dict[str, int] = defaultdict(int)
+        self.reaped_total = 0
+        self.rejected_total = 0
+        self.running = False
+
+    async def admit(self, websocket: WebSocket, user_key: str) -> bool:
+        """Track an accepted socket, or close it with 1013 (try again later) when over a limit"""
+        reason = None
+        if len(self.connections) >= settings.WS_MAX_CONNECTIONS_PER_NODE:
+            reason = "Server connection limit reached"
+        elif self.per_user[user_key] >= settings.WS_MAX_CONNECTIONS_PER_USER:
+            reason = "Too many connections for this user"
+
+        if reason:
+            self.rejected_total += 1
+            logger.warning(f"Rejected WebSocket for {user_key}: {reason}")
+            try:
+                await ws_codec.send_message(websocket, {"type": "error", "message": reason})
+                await websocket.close(code=1013)
+            except Exception:
+                pass
+            return False
+
+        self.connections[websocket] = {"user_key": user_key, "last_seen": time.monotonic()}
+        self.per_user[user_key] += 1
+        return True
+
+    def touch(self, websocket: WebSocket):
+        entry = self.connections.get(websocket)
+        if entry:
+            entry["last_seen"] = time.monotonic()
+
+    def release(self, websocket: WebSocket):
+        entry = self.connections.pop(websocket, None)
+        if entry:
+            self.per_user[entry["user_key"]] -= 1
+            if self.per_user[entry["user_key"]] <= 0:
+                del self.per_user[entry["user_key"]]
+
+    async def _reap(self, websocket: WebSocket, reason: str):
+        entry = self.connections.get(websocket)
+        logger.info(f"Reaping WebSocket for {entry['user_key'] if entry else 'unknown'}: {reason}")
+        self.release(websocket)
+        self.reaped_total += 1
+        try:
+            await websocket.close(code=1001)
+        except Exception:
+            pass
+
+    async def _ping(self, websocket: WebSocket):
+        # A send that stalls is the signature of a half-open TCP connection. A
+        # send that succeeds proves nothing, as it only reaches the kernel
+        # buffer: liveness comes from the client's reply (pong or any frame),
+        # which the receive loop records, and quiet sockets hit the idle timeout.
+        try:
+            await asyncio.wait_for(
+                ws_codec.send_message(websocket, {"type": "ping", "timestamp": datetime.utcnow().isoformat()}),
+                timeout=settings.WS_PING_TIMEOUT_SECONDS
+            )
+        except Exception:
+            await self._reap(websocket, "ping failed")
+
+    async def start(self):
+        """Ping every tracked socket on an interval and reap the ones that have gone quiet"""
+        self.running = True
+        logger.info("WebSocket heartbeat started")
+        await node_heartbeat()
+        while self.running:
+            await asyncio.sleep(settings.WS_PING_INTERVAL_SECONDS)
+            await node_heartbeat()
+            now = time.monotonic()
+            for websocket, entry in list(self.connections.items()):
+                if now - entry["last_seen"] > settings.WS_IDLE_TIMEOUT_SECONDS:
+                    await self._reap(websocket, "idle timeout")
+            await asyncio.gather(*(self._ping(websocket) for websocket in list(self.connections)))
+
+    async def stop(self):
+        self.running = False
+
+    def stats(self) -> dict:
+        return {
+            "active_connections": len(self.connections),
+            "active_users": len(self.per_user),
+            "reaped_total": self.reaped_total,
+            "rejected_total": self.rejected_total,
+            "limits": {
+                "per_node": settings.WS_MAX_CONNECTIONS_PER_NODE,
+                "per_user": settings.WS_MAX_CONNECTIONS_PER_USER,
+            }
+        }
+
+connection_guard = ConnectionGuard()
+
+async def receive_until_closed(websocket: WebSocket):
+    """Read client frames until disconnect, recording liveness and answering application pings"""
+    while True:
+        try:
+            message = await websocket.receive()
+        except Exception:
+            return
+        if message["type"] == "websocket.disconnect":
+            return
+        connection_guard.touch(websocket)
+        data = ws_codec.decode(message, ws_codec.subprotocol_of(websocket))
+        if isinstance(data, dict) and data.get("type") == "ping":
+            await ws_codec.send_message(websocket, {"type": "pong", "message": "pong"})
+
+async def serve_until_closed(websocket: WebSocket, pump: Awaitable):
+    """Run a server-push coroutine next to the receive loop; whichever ends first stops the other"""
+    pump_task = asyncio.ensure_future(pump)
+    receive_task = asyncio.create_task(receive_until_closed(websocket))
+    try:
+        await asyncio.wait({pump_task, receive_task}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        pump_task.cancel()
+        receive_task.cancel()
+        connection_guard.release(websocket)
+
+class ConnectionManager:
+    # Managers by name, so relayed messages reach the right instance on each node
+    registry: Dict[str, "ConnectionManager"] = {}
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self.registry_key = f"ws_registry:{name}"
         self.active_connections: Dict[str, WebSocket] = {}
         self.user_subscriptions: Dict[str, List[str]] = {}
+        ConnectionManager.registry[name] = self
         
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, client_id: str, user_key: Optional[str] = None) -> bool:
+        """Accept and register a socket; per-user limits apply to user_key, else to client_id"""
+        await ws_codec.accept(websocket)
+        if not await connection_guard.admit(websocket, user_key or client_id):
+            return False
         self.active_connections[client_id] = websocket
         self.user_subscriptions[client_id] = []
+        await redis_client.hset(self.registry_key, client_id, NODE_ID)
         logger.info(f"Client {client_id} connected. Total connections: {len(self.active_connections)}")
         await self.send_personal_message({
             "type": "connection",
@@ -26,38 +192,69 @@ class ConnectionManager:
             "timestamp": datetime.utcnow().isoformat(),
             "client_id": client_id
         }, client_id)
+        return True
         
     def disconnect(self, client_id: str):
         if client_id in self.active_connections:
-            del self.active_connections[client_id]
+            connection_guard.release(self.active_connections.pop(client_id))
+            # Only drop the registry entry if it still points at this node
+            asyncio.create_task(redis_client.hdel_if_equal(self.registry_key, client_id, NODE_ID))
         if client_id in self.user_subscriptions:
             del self.user_subscriptions[client_id]
         logger.info(f"Client {client_id} disconnected. Total connections: {len(self.active_connections)}")
         
     async def send_to_client(self, client_id: str, message: dict):
-        """Send message to a specific client"""
+        """Send message to a specific client, routing through Redis if it is held by another node"""
+        message["timestamp"] = datetime.utcnow().isoformat()
         if client_id in self.active_connections:
-            try:
-                websocket = self.active_connections[client_id]
-                message["timestamp"] = datetime.utcnow().isoformat()
-                await websocket.send_text(json.dumps(message))
-            except Exception as e:
-                logger.error(f"Error sending message to {client_id}: {e}")
-                self.disconnect(client_id)
+            await self._send_local(client_id, message)
+            return
+        
+        node_id = await redis_client.hget(self.registry_key, client_id)
+        if node_id and node_id != NODE_ID and not await node_alive(node_id):
+            # The node died without cleaning up; its sockets are gone with it
+            logger.warning(f"Client {client_id} was held by dead node {node_id}; dropping its registry entry")
+            await redis_client.hdel_if_equal(self.registry_key, client_id, node_id)
+        elif node_id and node_id != NODE_ID:
+            await redis_client.publish(f"{NODE_CHANNEL_PREFIX}:{node_id}", json.dumps({
+                "manager": self.name,
+                "client_id": client_id,
+                "message": message
+            }))
         else:
             logger.warning(f"Client {client_id} not found in active connections")
+    
+    async def _send_local(self, client_id: str, message: dict):
+        try:
+            websocket = self.active_connections[client_id]
+            await ws_codec.send_message(websocket, message)
+        except Exception as e:
+            logger.error(f"Error sending message to {client_id}: {e}")
+            self.disconnect(client_id)
                 
     async def send_personal_message(self, message: dict, client_id: str):
         if client_id in self.active_connections:
             try:
                 websocket = self.active_connections[client_id]
-                await websocket.send_text(json.dumps(message))
+                await ws_codec.send_message(websocket, message)
             except Exception as e:
                 logger.error(f"Error sending message to {client_id}: {e}")
                 self.disconnect(client_id)
                 
     async def broadcast(self, message: dict, subscription_type: str = None, agent_type: str = None):
+        """Fan a message out to matching clients on every node"""
         message["timestamp"] = datetime.utcnow().isoformat()
+        published = await redis_client.publish(BROADCAST_CHANNEL, json.dumps({
+            "manager": self.name,
+            "message": message,
+            "subscription_type": subscription_type,
+            "agent_type": agent_type
+        }))
+        # Without Redis or the relay, at least this node's clients get it
+        if not published or not relay_state["subscribed"]:
+            await self._broadcast_local(message, subscription_type, agent_type)
+    
+    async def _broadcast_local(self, message: dict, subscription_type: str = None, agent_type: str = None):
         target_clients = []
         async for db in get_db():
             for client_id, subscriptions in self.user_subscriptions.items():
@@ -72,11 +269,16 @@ class ConnectionManager:
                 if user.role == "super-admin" or (agent_type and self.get_agent_type(user.designation) == agent_type):
                     target_clients.append(client_id)
             
+        # Encode once per subprotocol rather than once per client
+        encoded = {}
         disconnected_clients = []
         for client_id in target_clients:
             try:
                 websocket = self.active_connections[client_id]
-                await websocket.send_text(json.dumps(message))
+                subprotocol = ws_codec.subprotocol_of(websocket)
+                if subprotocol not in encoded:
+                    encoded[subprotocol] = ws_codec.encode(message, subprotocol)
+                await ws_codec.send_encoded(websocket, encoded[subprotocol])
             except Exception as e:
                 logger.error(f"Error broadcasting to {client_id}: {e}")
                 disconnected_clients.append(client_id)
@@ -84,8 +286,6 @@ class ConnectionManager:
         for client_id in disconnected_clients:
             self.disconnect(client_id)
             
-
-            
     async def subscribe(self, client_id: str, subscription_type: str):
         if client_id in self.user_subscriptions:
             if subscription_type not in self.user_subscriptions[client_id]:
@@ -169,6 +369,7 @@ class ConnectionManager:
                 subscription_counts[sub_type] = subscription_counts.get(sub_type, 0) + 1
                 
         return {
+            "node_id": NODE_ID,
             "total_connections": len(self.active_connections),
             "subscription_counts": subscription_counts,
             "connected_clients": list(self.active_connections.keys())
@@ -183,11 +384,58 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+async def _relay(pubsub):
+    async for raw in pubsub.listen():
+        if raw["type"] != "message":
+            continue
+        try:
+            envelope = json.loads(raw["data"])
+            target = ConnectionManager.registry.get(envelope.get("manager"))
+            if not target:
+                continue
+            if raw["channel"] == BROADCAST_CHANNEL:
+                await target._broadcast_local(
+                    envelope["message"],
+                    envelope.get("subscription_type"),
+                    envelope.get("agent_type")
+                )
+            elif envelope.get("client_id") in target.active_connections:
+                await target._send_local(envelope["client_id"], envelope["message"])
+        except Exception as e:
+            logger.error(f"Error relaying WebSocket message: {e}")
+
+async def start_relay():
+    """Deliver messages routed to this node or broadcast to the cluster, resubscribing after Redis drops"""
+    delay = 1.0
+    while True:
+        pubsub = redis_client.redis.pubsub()
+        try:
+            await pubsub.subscribe(f"{NODE_CHANNEL_PREFIX}:{NODE_ID}", BROADCAST_CHANNEL)
+            relay_state["subscribed"] = True
+            delay = 1.0
+            logger.info(f"WebSocket relay started for node {NODE_ID}")
+            await _relay(pubsub)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"WebSocket relay lost its Redis subscription: {e}; retrying in {delay:.0f}s")
+        finally:
+            relay_state["subscribed"] = False
+            try:
+                await pubsub.unsubscribe()
+                await pubsub.close()
+            except Exception:
+                pass
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, settings.WS_RELAY_MAX_BACKOFF_SECONDS)
+
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
-    await manager.connect(websocket, client_id)
+    if not await manager.connect(websocket, client_id):
+        return
     try:
         while True:
             data = await websocket.receive_text()
+            connection_guard.touch(websocket)
             await handle_websocket_message(client_id, data)
     except WebSocketDisconnect:
         manager.disconnect(client_id)
@@ -0,0 +1,67 @@
+from fastapi import WebSocket
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+import json
+import logging
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; clients fall back to JSON text frames
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+MSGPACK_SUBPROTOCOL = "msgpack"
+JSON_SUBPROTOCOL = "json"
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def negotiate_subprotocol(websocket: WebSocket) -> Optional[str]:
+    """Pick the frame encoding from the client's Sec-WebSocket-Protocol offer"""
+    offered = websocket.scope.get("subprotocols") or []
+    if MSGPACK_SUBPROTOCOL in offered and msgpack is not None:
+        return MSGPACK_SUBPROTOCOL
+    if JSON_SUBPROTOCOL in offered:
+        return JSON_SUBPROTOCOL
+    return None
+
+async def accept(websocket: WebSocket) -> None:
+    """Accept the socket with the negotiated subprotocol and remember it for sends"""
+    subprotocol = negotiate_subprotocol(websocket)
+    await websocket.accept(subprotocol=subprotocol)
+    websocket.state.subprotocol = subprotocol
+
+def encode(message: dict, subprotocol: Optional[str]):
+    if subprotocol == MSGPACK_SUBPROTOCOL:
+        return msgpack.packb(message, default=_default, use_bin_type=True)
+    return json.dumps(message, default=_default)
+
+def decode(message: dict, subprotocol: Optional[str]):
+    """Client message from a websocket.receive event: JSON text, or msgpack binary on a msgpack socket; None if unreadable"""
+    try:
+        if message.get("text"):
+            return json.loads(message["text"])
+        if message.get("bytes") and subprotocol == MSGPACK_SUBPROTOCOL:
+            return msgpack.unpackb(message["bytes"], raw=False)
+    except ValueError:
+        pass
+    return None
+
+def subprotocol_of(websocket: WebSocket) -> Optional[str]:
+    return getattr(websocket.state, "subprotocol", None)
+
+async def send_encoded(websocket: WebSocket, payload) -> None:
+    if isinstance(payload, bytes):
+        await websocket.send_bytes(payload)
+    else:
+        await websocket.send_text(payload)
+
+async def send_message(websocket: WebSocket, message: dict) -> None:
+    """Send a message as a msgpack binary frame or a JSON text frame"""
+    await send_encoded(websocket, encode(message, subprotocol_of(websocket)))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Move calls older than CALL_ARCHIVE_AFTER_MONTHS months to Parquet files.
+
+Archives one UTC month at a time, oldest first. For each month it streams
+the rows to CALL_ARCHIVE_URI/month=YYYY-MM/calls.parquet (zstd), records the
+month in call_archive_months, then drops the month's partition. After that,
+/api/calls pages and /api/calls/export read the month from the file.
+
+    python archive_calls.py --dry-run
+    python archive_calls.py --after-months 18
+    python archive_calls.py --month 2025-01
+
+Requires pyarrow. For object storage, set CALL_ARCHIVE_URI to a URI that
+pyarrow understands, such as s3://bucket/calls, with the usual credentials
+in the environment.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, select
+
+from core.config import settings
+from database import engine
+from models.call import Call
+from services.call_archive import call_archive
+from services.call_partitions import add_months, month_start
+
+def parse_month(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m").replace(tzinfo=timezone.utc)
+
+async def months_to_archive(after_months: int):
+    cutoff = add_months(month_start(datetime.now(tz=timezone.utc)), -after_months)
+    async with engine.connect() as conn:
+        oldest = await conn.scalar(select(func.min(Call.call_start)))
+    months = []
+    month = month_start(oldest) if oldest else cutoff
+    while month < cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+def report(result: dict) -> None:
+    ratio = ""
+    if result["postgres_bytes"] and result["size_bytes"]:
+        ratio = f" ({result['size_bytes'] / result['postgres_bytes']:.1%} of {result['postgres_bytes'] / 1024 / 1024:.1f} MiB in Postgres)"
+    print(f"{result['month']:%Y-%m}: {result['rows']} calls, {result['size_bytes'] / 1024 / 1024:.1f} MiB{ratio}", flush=True)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--after-months", type=int, default=settings.CALL_ARCHIVE_AFTER_MONTHS)
+    parser.add_argument("--month", type=parse_month, default=None, help="archive only this month, YYYY-MM")
+    parser.add_argument("--dry-run", action="store_true", help="list the months that would be archived")
+    args = parser.parse_args()
+
+    if not call_archive.enabled:
+        sys.exit("pyarrow is not installed; pip install pyarrow to archive calls")
+
+    months = [args.month] if args.month else await months_to_archive(args.after_months)
+    if args.dry_run:
+        print("\n".join(f"{month:%Y-%m}" for month in months) or "Nothing to archive")
+    else:
+        for month in months:
+            report(await call_archive.archive_month(month))
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
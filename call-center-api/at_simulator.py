@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Africa's Talking Voice and WebRTC APIs.
+
+Serves the endpoints the API calls (POST /call, POST /queueStatus and
+POST /capability-token/request) and, for every call it accepts, plays a
+webhook sequence back at the API the way the provider does:
+
+  POST /api/webhooks/call      isActive=1, callSessionState=Ringing
+  POST /api/webhooks/callback  status=ringing, then answered
+  POST /api/webhooks/callback  isActive=0 with the outcome
+                               (completed, busy, no-answer or failed)
+
+Outcomes are drawn from --outcomes, and ring, answer and talk times are
+drawn around their means with --jitter. With --cps, the simulator also
+starts calls on its own so the webhook -> DB -> WebSocket path can be
+loaded without anyone clicking. It prints webhook ack latency and
+failures every few seconds.
+
+Point the API at it with dummy credentials:
+
+    AT_USERNAME=sim AT_API_KEY=sim \\
+    AT_VOICE_URL=http://127.0.0.1:8090 AT_WEBRTC_URL=http://127.0.0.1:8090 \\
+    uvicorn main:app
+
+    python at_simulator.py --api-url http://127.0.0.1:8000 --cps 20 --duration 60
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def parse_outcomes(value: str) -> dict:
+    outcomes = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        outcomes[name.strip()] = float(weight)
+    return outcomes
+
+class Simulator:
+    def __init__(self, args):
+        self.args = args
+        self.outcomes = parse_outcomes(args.outcomes)
+        self.client = httpx.AsyncClient(base_url=args.api_url, timeout=10)
+        self.active = Counter()
+        self.ack_ms = []
+        self.counters = Counter()
+        self.tasks = set()
+
+    def spread(self, mean: float) -> float:
+        return max(0.0, random.gauss(mean, mean * self.args.jitter))
+
+    async def post(self, path: str, data: dict) -> None:
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(path, data=data)
+            if response.status_code >= 400:
+                self.counters["webhook_errors"] += 1
+            else:
+                self.counters["webhooks"] += 1
+        except httpx.HTTPError:
+            self.counters["webhook_errors"] += 1
+        self.ack_ms.append((time.perf_counter() - started) * 1000)
+
+    async def send_callback(self, data: dict) -> None:
+        await self.post("/api/webhooks/callback", data)
+        if random.random() < self.args.duplicate_rate:
+            # Providers redeliver; the API should suppress these
+            self.counters["duplicates_sent"] += 1
+            await self.post("/api/webhooks/callback", data)
+
+    async def play(self, session_id: str, caller: str, callee: str) -> None:
+        """Send one call's webhook sequence"""
+        base = {"sessionId": session_id, "callerNumber": caller, "destinationNumber": callee, "direction": "Outbound"}
+        outcome = random.choices(list(self.outcomes), weights=list(self.outcomes.values()))[0]
+        self.active[caller] += 1
+        try:
+            await asyncio.sleep(self.spread(self.args.ring_delay))
+            await self.post("/api/webhooks/call", {**base, "isActive": "1", "callSessionState": "Ringing"})
+            await self.send_callback({**base, "isActive": "1", "callSessionState": "Ringing", "status": "ringing"})
+
+            duration = 0
+            if outcome == "completed":
+                await asyncio.sleep(self.spread(self.args.answer_delay))
+                await self.send_callback({**base, "isActive": "1", "callSessionState": "Answered", "status": "answered"})
+                talk = self.spread(self.args.talk_time)
+                await asyncio.sleep(talk)
+                duration = int(talk)
+            else:
+                await asyncio.sleep(self.spread(self.args.answer_delay))
+
+            await self.send_callback({
+                **base,
+                "isActive": "0",
+                "callSessionState": "Completed",
+                "status": outcome,
+                "durationInSeconds": str(duration),
+                "amount": f"{duration * 0.02:.2f}",
+                "currencyCode": "KES",
+            })
+            self.counters[outcome] += 1
+        finally:
+            self.active[caller] -= 1
+
+    def start_call(self, caller: str, callee: str) -> str:
+        session_id = f"ATVId_sim_{uuid.uuid4().hex[:16]}"
+        task = asyncio.create_task(self.play(session_id, caller, callee))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return session_id
+
+    async def rejected(self):
+        await asyncio.sleep(self.spread(self.args.accept_latency))
+        if random.random() < self.args.error_rate:
+            self.counters["api_errors"] += 1
+            return JSONResponse({"errorMessage": "Service Unavailable"}, status_code=503)
+        return None
+
+    async def voice_call(self, request):
+        error = await self.rejected()
+        if error:
+            return error
+        form = await request.form()
+        caller, callee = form.get("from", ""), form.get("to", "")
+        self.counters["calls_accepted"] += 1
+        return JSONResponse({
+            "entries": [{"phoneNumber": callee, "status": "Queued", "sessionId": self.start_call(caller, callee)}],
+            "errorMessage": "None",
+        })
+
+    async def queue_status(self, request):
+        error = await self.rejected()
+        if error:
+            return error
+        form = await request.form()
+        numbers = [number.strip() for number in form.get("phoneNumbers", "").split(",") if number.strip()]
+        return JSONResponse({
+            "entries": [{"phoneNumber": number, "queueName": "", "numCalls": self.active[number]} for number in numbers],
+            "errorMessage": "None",
+        })
+
+    async def capability_token(self, request):
+        error = await self.rejected()
+        if error:
+            return error
+        body = await request.json()
+        return JSONResponse({
+            "clientName": body.get("clientName"),
+            "incoming": True,
+            "outgoing": True,
+            "lifeTimeSec": "86400",
+            "token": f"sim-{uuid.uuid4().hex}",
+        })
+
+    async def generate(self):
+        """Start --cps calls per second from --caller-ids for --duration seconds"""
+        caller_ids = [number.strip() for number in self.args.caller_ids.split(",")]
+        interval = 1 / self.args.cps
+        deadline = time.monotonic() + self.args.duration
+        while time.monotonic() < deadline:
+            callee = f"+2547{random.randint(10000000, 99999999)}"
+            self.start_call(random.choice(caller_ids), callee)
+            self.counters["calls_generated"] += 1
+            await asyncio.sleep(interval)
+
+    async def report(self):
+        while True:
+            await asyncio.sleep(self.args.report_every)
+            samples, self.ack_ms = self.ack_ms, []
+            latency = " ".join(
+                f"ack_{name}={value:.1f}ms" if value is not None else f"ack_{name}=-"
+                for name, value in (("p50", percentile(samples, 0.5)), ("p99", percentile(samples, 0.99)))
+            )
+            print(
+                f"in_flight={len(self.tasks)} {latency} "
+                + " ".join(f"{name}={count}" for name, count in sorted(self.counters.items())),
+                flush=True
+            )
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/call", self.voice_call, methods=["POST"]),
+            Route("/queueStatus", self.queue_status, methods=["POST"]),
+            Route("/capability-token/request", self.capability_token, methods=["POST"]),
+        ])
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000", help="API that receives the webhooks")
+    parser.add_argument("--accept-latency", type=float, default=0.15, help="mean seconds before the Voice API responds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of API requests answered with 503")
+    parser.add_argument("--ring-delay", type=float, default=1.0, help="mean seconds from accept to Ringing")
+    parser.add_argument("--answer-delay", type=float, default=4.0, help="mean seconds of ringing before the outcome")
+    parser.add_argument("--talk-time", type=float, default=30.0, help="mean seconds of an answered call")
+    parser.add_argument("--jitter", type=float, default=0.3, help="standard deviation as a fraction of each mean")
+    parser.add_argument("--outcomes", default="completed=0.7,busy=0.1,no-answer=0.15,failed=0.05")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="fraction of callbacks delivered twice")
+    parser.add_argument("--cps", type=float, default=0.0, help="calls per second to start without an API request")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to generate calls for with --cps")
+    parser.add_argument("--caller-ids", default="+254700000000", help="comma-separated caller IDs for generated calls")
+    parser.add_argument("--report-every", type=float, default=5.0)
+    args = parser.parse_args()
+
+    simulator = Simulator(args)
+    server = uvicorn.Server(uvicorn.Config(simulator.app(), host=args.host, port=args.port, log_level="warning"))
+    reporter = asyncio.create_task(simulator.report())
+    generator = asyncio.create_task(simulator.generate()) if args.cps > 0 else None
+    print(f"Africa's Talking simulator on http://{args.host}:{args.port}, webhooks to {args.api_url}", flush=True)
+    try:
+        await server.serve()
+    finally:
+        if generator:
+            generator.cancel()
+        reporter.cancel()
+        for task in list(simulator.tasks):
+            task.cancel()
+        await simulator.client.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Fill calls.counterparty_e164 for rows written before the column existed.
+
+Walks calls in id order in short transactions, normalizing the customer's
+number with utils.phone.counterparty_e164. It is safe to stop and rerun:
+only rows still missing the column are touched. New rows are populated on
+write.
+
+    python backfill_counterparty.py --batch-size 5000 --pause 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import bindparam, select, update
+
+from database import AsyncSessionLocal
+from models.call import Call
+from utils.phone import counterparty_e164
+
+calls = Call.__table__
+
+async def backfill(batch_size: int, pause: float) -> int:
+    updated = 0
+    last_id = None
+    async with AsyncSessionLocal() as db:
+        while True:
+            query = (
+                select(Call.id, Call.caller_number, Call.callee_number, Call.direction)
+                .where(Call.counterparty_e164.is_(None))
+                .order_by(Call.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(Call.id > last_id)
+            rows = (await db.execute(query)).all()
+            if not rows:
+                break
+
+            params = [
+                {"call_id": row.id, "value": counterparty_e164(row.caller_number, row.callee_number, row.direction)}
+                for row in rows
+            ]
+            await db.execute(
+                update(calls).where(calls.c.id == bindparam("call_id")).values(counterparty_e164=bindparam("value")),
+                params
+            )
+            await db.commit()
+
+            updated += len(rows)
+            last_id = rows[-1].id
+            print(f"Backfilled {updated} calls", flush=True)
+            if pause:
+                await asyncio.sleep(pause)
+    return updated
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    args = parser.parse_args()
+
+    updated = await backfill(args.batch_size, args.pause)
+    print(f"Done: {updated} calls backfilled")
+
+if __name__ == "__main__":
+    asyncio.run(main())
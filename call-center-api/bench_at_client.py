@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Benchmark the async Africa's Talking client against a local stand-in server.
+
+Starts a stand-in Voice API on localhost (in its own process) that answers POST /call after a fixed
+latency (and fails a fraction of requests with 503), then places the same
+number of calls two ways from one event loop:
+
+  blocking  - requests.post, as the service did before, called from a coroutine
+  async     - services.at_client with pooled keep-alive connections
+
+and reports throughput, latency percentiles and the worst event-loop stall,
+which is what every other request on the worker experiences.
+
+    python bench_at_client.py --requests 200 --latency 0.15 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import multiprocessing
+import random
+import socket
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from services.at_client import AfricasTalkingClient
+
+def stand_in_app(latency: float, error_rate: float) -> Starlette:
+    async def call(request):
+        await asyncio.sleep(latency)
+        if random.random() < error_rate:
+            return JSONResponse({"errorMessage": "Service Unavailable"}, status_code=503)
+        form = await request.form()
+        return JSONResponse({
+            "entries": [{"phoneNumber": form.get("to"), "status": "Queued", "sessionId": f"ATVId_{random.getrandbits(48):x}"}],
+            "errorMessage": "None",
+        })
+
+    return Starlette(routes=[Route("/call", call, methods=["POST"])])
+
+def serve_stand_in(port: int, latency: float, error_rate: float) -> None:
+    uvicorn.run(stand_in_app(latency, error_rate), host="127.0.0.1", port=port, log_level="warning")
+
+def wait_for_port(port: int, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"stand-in server did not start on port {port}")
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+async def run_blocking(url: str, count: int):
+    latencies = []
+
+    async def place():
+        started = time.perf_counter()
+        requests.post(f"{url}/call", data={"username": "bench", "from": "+254700000000", "to": "+254700000000"}, headers={"apiKey": "bench"})
+        latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(place() for _ in range(count)))
+    return latencies
+
+async def run_async(url: str, count: int, concurrency: int):
+    client = AfricasTalkingClient(voice_url=url, webrtc_url=url, max_concurrency=concurrency)
+    latencies = []
+
+    async def place():
+        started = time.perf_counter()
+        try:
+            await client.voice_call("bench", "bench", "+254700000000", "+254700000000")
+        except Exception:
+            pass
+        latencies.append(time.perf_counter() - started)
+
+    try:
+        await asyncio.gather(*(place() for _ in range(count)))
+    finally:
+        await client.close()
+    return latencies
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.15, help="stand-in server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="fraction of 503 responses")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # The stand-in runs in its own process so the blocking mode cannot stall it
+    server = multiprocessing.Process(target=serve_stand_in, args=(args.port, args.latency, args.error_rate), daemon=True)
+    server.start()
+    wait_for_port(args.port)
+    url = f"http://127.0.0.1:{args.port}"
+
+    print(f"{'mode':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max loop stall ms':>20}")
+    try:
+        for name, run in [
+            ("blocking", lambda: run_blocking(url, args.requests)),
+            ("async", lambda: run_async(url, args.requests, args.concurrency)),
+        ]:
+            stop = asyncio.Event()
+            lag_task = asyncio.create_task(measure_loop_lag(stop))
+            started = time.perf_counter()
+            latencies = await run()
+            elapsed = time.perf_counter() - started
+            stop.set()
+            worst_stall = await lag_task
+            print(
+                f"{name:<10}{len(latencies) / elapsed:>10.1f}{percentile(latencies, 0.5) * 1000:>10.1f}"
+                f"{percentile(latencies, 0.99) * 1000:>10.1f}{worst_stall * 1000:>20.1f}"
+            )
+    finally:
+        server.terminate()
+        server.join()
+
+if __name__ == "__main__":
+    asyncio.run(main())
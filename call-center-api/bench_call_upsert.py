@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Compare callback write throughput: per-row select/insert/commit vs bulk upsert.
+
+Generates callback sequences (queued -> ringing -> in-progress -> completed) for
+synthetic sessions, applies them with the old one-session-per-callback path and
+with CallCRUD.apply_webhook_events in batches, and reports events per second.
+Benchmark rows use a "bench_" session prefix and are deleted afterwards.
+
+    python bench_call_upsert.py --calls 2000 --batch 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, delete
+
+from database import AsyncSessionLocal
+from models.call import Call
+from crud.call import call_crud
+
+STATES = ["queued", "ringing", "in-progress", "completed"]
+
+def generate_events(calls: int):
+    events = []
+    for _ in range(calls):
+        session_id = f"bench_{uuid.uuid4().hex[:16]}"
+        caller = f"+2547{random.randint(10000000, 99999999)}"
+        callee = f"+2541{random.randint(10000000, 99999999)}"
+        for index, status in enumerate(STATES):
+            events.append({
+                "sessionId": session_id,
+                "callerNumber": caller,
+                "destinationNumber": callee,
+                "status": status,
+                "durationInSeconds": str(index * 15),
+            })
+    # Interleave sessions the way concurrent calls arrive, keeping per-session order
+    random.shuffle(events)
+    events.sort(key=lambda event: STATES.index(event["status"]))
+    return events
+
+async def apply_per_row(events):
+    """The previous webhook path: one select, insert or update, and commit per callback"""
+    async with AsyncSessionLocal() as db:
+        for event in events:
+            result = await db.execute(select(Call).where(Call.at_session_id == event["sessionId"]))
+            call = result.scalar_one_or_none()
+            duration = event.get("durationInSeconds", "0")
+            if not call:
+                db.add(Call(
+                    at_session_id=event["sessionId"],
+                    caller_number=event.get("callerNumber"),
+                    callee_number=event.get("destinationNumber"),
+                    status=event.get("status"),
+                    direction="outbound",
+                    total_duration=int(duration) if duration.isdigit() else 0
+                ))
+            else:
+                call.status = event.get("status")
+                call.total_duration = int(duration) if duration.isdigit() else 0
+                if call.status in ["completed", "failed", "busy", "no-answer"]:
+                    call.call_end = datetime.utcnow()
+            await db.commit()
+
+async def apply_bulk(events, batch: int):
+    for start in range(0, len(events), batch):
+        async with AsyncSessionLocal() as db:
+            await call_crud.apply_webhook_events(db, events[start:start + batch])
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Call).where(Call.at_session_id.like("bench\\_%")))
+        await db.commit()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1000, help="synthetic calls (4 callbacks each)")
+    parser.add_argument("--batch", type=int, default=200, help="events per upsert batch")
+    args = parser.parse_args()
+
+    random.seed(42)
+    try:
+        for name, run in [
+            ("per-row", lambda events: apply_per_row(events)),
+            (f"bulk upsert (batch={args.batch})", lambda events: apply_bulk(events, args.batch)),
+        ]:
+            events = generate_events(args.calls)
+            started = time.perf_counter()
+            await run(events)
+            elapsed = time.perf_counter() - started
+            print(f"{name:<28}{len(events):>8} events {elapsed:>8.2f}s {len(events) / elapsed:>10.0f} events/s")
+    finally:
+        await cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main())
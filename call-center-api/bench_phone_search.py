@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Compare phone number search: ILIKE '%...%' on B-tree indexes vs pg_trgm and reversed-number indexes.
+
+Seeds an UNLOGGED scratch table shaped like calls (5M rows by default) with
+random Kenyan numbers and the single-column B-tree indexes calls used to
+have. It then times the old ILIKE filter on random fragments of stored numbers.
+Next it builds the trigram GIN and reversed text_pattern_ops indexes from
+migration c5a9e2d4b7f1 and times the ranked "contains" and "suffix" queries
+that CallCRUD.search_calls_by_number runs. The table is dropped at the end
+unless --keep is given.
+
+    python bench_phone_search.py --rows 5000000 --queries 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+
+from database import engine
+
+TABLE = "bench_phone_calls"
+
+ILIKE_QUERY = f"""
+SELECT id FROM {TABLE}
+WHERE caller_number ILIKE :pattern OR callee_number ILIKE :pattern
+ORDER BY call_start DESC LIMIT 20
+"""
+
+CONTAINS_QUERY = f"""
+SELECT id,
+       CASE WHEN caller_number LIKE :ends OR callee_number LIKE :ends THEN 1.0 ELSE 0.0 END
+       + greatest(similarity(caller_number, :digits), similarity(callee_number, :digits)) AS rank
+FROM {TABLE}
+WHERE caller_number LIKE :pattern OR callee_number LIKE :pattern
+ORDER BY rank DESC, call_start DESC LIMIT 20
+"""
+
+SUFFIX_QUERY = f"""
+SELECT id,
+       1.0 + greatest(similarity(caller_number, :digits), similarity(callee_number, :digits)) AS rank
+FROM {TABLE}
+WHERE (reverse(caller_number) ~>=~ :low AND reverse(caller_number) ~<~ :high)
+   OR (reverse(callee_number) ~>=~ :low AND reverse(callee_number) ~<~ :high)
+ORDER BY rank DESC, call_start DESC LIMIT 20
+"""
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def seed(conn, rows: int):
+    await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    await conn.execute(text(f"""
+        CREATE UNLOGGED TABLE {TABLE} (
+            id bigserial PRIMARY KEY,
+            caller_number text NOT NULL,
+            callee_number text NOT NULL,
+            call_start timestamptz NOT NULL
+        )
+    """))
+    await conn.execute(text(f"""
+        INSERT INTO {TABLE} (caller_number, callee_number, call_start)
+        SELECT '+2547' || lpad((random() * 99999999)::int::text, 8, '0'),
+               '+2541' || lpad((random() * 99999999)::int::text, 8, '0'),
+               now() - random() * interval '365 days'
+        FROM generate_series(1, :rows)
+    """), {"rows": rows})
+    await conn.execute(text(f"CREATE INDEX ON {TABLE} (caller_number)"))
+    await conn.execute(text(f"CREATE INDEX ON {TABLE} (callee_number)"))
+    await conn.execute(text(f"CREATE INDEX ON {TABLE} (call_start)"))
+    await conn.execute(text(f"ANALYZE {TABLE}"))
+
+async def build_search_indexes(conn) -> float:
+    started = time.perf_counter()
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for column in ("caller_number", "callee_number"):
+        await conn.execute(text(f"CREATE INDEX ON {TABLE} USING gin ({column} gin_trgm_ops)"))
+        await conn.execute(text(f"CREATE INDEX ON {TABLE} (reverse({column}) text_pattern_ops)"))
+    await conn.execute(text(f"ANALYZE {TABLE}"))
+    return time.perf_counter() - started
+
+async def fragments(conn, count: int):
+    """Random 4-7 digit pieces of stored numbers, and their endings"""
+    result = await conn.execute(text(f"SELECT caller_number FROM {TABLE} TABLESAMPLE SYSTEM (1) LIMIT :count"), {"count": count})
+    numbers = [row[0] for row in result]
+    contains, suffixes = [], []
+    for number in numbers:
+        digits = number.lstrip("+")
+        length = random.randint(4, 7)
+        start = random.randint(0, len(digits) - length)
+        contains.append(digits[start:start + length])
+        suffixes.append(digits[-length:])
+    return contains, suffixes
+
+async def time_queries(conn, sql: str, params_list):
+    latencies = []
+    for params in params_list:
+        started = time.perf_counter()
+        await conn.execute(text(sql), params)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+def report(name: str, latencies):
+    print(f"{name:<28}{percentile(latencies, 0.5):>10.1f}{percentile(latencies, 0.99):>10.1f}{max(latencies):>10.1f}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded table")
+    args = parser.parse_args()
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        started = time.perf_counter()
+        await seed(conn, args.rows)
+        print(f"Seeded {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+        contains, suffixes = await fragments(conn, args.queries)
+        try:
+            print(f"{'query':<28}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+            report("ILIKE (B-tree only)", await time_queries(conn, ILIKE_QUERY, [{"pattern": f"%{d}%"} for d in contains]))
+
+            build_seconds = await build_search_indexes(conn)
+
+            report("trigram contains", await time_queries(conn, CONTAINS_QUERY, [
+                {"pattern": f"%{d}%", "ends": f"%{d}", "digits": d} for d in contains
+            ]))
+            report("ILIKE (with trigram)", await time_queries(conn, ILIKE_QUERY, [{"pattern": f"%{d}%"} for d in contains]))
+            report("reversed suffix", await time_queries(conn, SUFFIX_QUERY, [
+                {"low": d[::-1], "high": d[::-1][:-1] + chr(ord(d[0]) + 1), "digits": d} for d in suffixes
+            ]))
+
+            size = (await conn.execute(text(f"SELECT pg_size_pretty(pg_indexes_size('{TABLE}'))"))).scalar()
+            print(f"Search indexes built in {build_seconds:.1f}s; all indexes on {TABLE}: {size}")
+        finally:
+            if not args.keep:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
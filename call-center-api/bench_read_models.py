@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Compare rows/sec of the ORM listing path against the column read models.
+
+Walks up to --pages keyset pages of calls (newest first) both ways and
+times each full request body:
+
+  orm         CallCRUD.get_calls_paginated, PaginatedCalls validation and
+              FastAPI's JSONResponse rendering (what GET /api/calls did)
+  read model  ReadModelCRUD.calls_page and api.json_bytes.dumps
+
+It also times the activity log page through both paths. Only reads are made,
+against whatever database DATABASE_URL points at. Run it against a copy with
+a realistic number of rows, not production.
+
+    python bench_read_models.py --page-size 500 --pages 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.json_bytes import dumps
+from crud.activity_log import activity_log_crud
+from crud.call import call_crud
+from crud.read_models import read_models
+from database import AsyncSessionLocal, engine
+from schemas.activity_log import ActivityLogResponse, PaginatedActivityLogs
+from schemas.call import PaginatedCalls
+
+async def orm_calls(db, size, cursor):
+    calls, next_cursor, total, is_estimate = await call_crud.get_calls_paginated(db, size=size, filters=None, cursor=cursor)
+    page = PaginatedCalls(calls=calls, next_cursor=next_cursor, total=total, total_is_estimate=is_estimate, limit=size)
+    body = JSONResponse(jsonable_encoder(page)).body
+    return len(calls), next_cursor, len(body)
+
+async def read_model_calls(db, size, cursor):
+    page = await read_models.calls_page(db, size=size, cursor=cursor)
+    body = dumps(page)
+    return len(page["calls"]), page["next_cursor"], len(body)
+
+async def orm_activity_logs(db, page, size):
+    activities, total = await activity_log_crud.get_activity_logs_paginated(db, page, size)
+    result = PaginatedActivityLogs(
+        activity_logs=[ActivityLogResponse.model_validate(activity) for activity in activities],
+        total_activity_logs=total,
+        total_pages=(total + size - 1) // size,
+        current_page=page,
+        page_size=size
+    )
+    return len(activities), len(JSONResponse(jsonable_encoder(result)).body)
+
+async def read_model_activity_logs(db, page, size):
+    result = await read_models.activity_logs_page(db, page, size)
+    return len(result["activity_logs"]), len(dumps(result))
+
+async def walk_calls(fetch, size, pages):
+    rows = body_bytes = 0
+    cursor = None
+    started = time.perf_counter()
+    for _ in range(pages):
+        # A fresh session per page, as each request gets one
+        async with AsyncSessionLocal() as db:
+            count, cursor, length = await fetch(db, size, cursor)
+        rows += count
+        body_bytes += length
+        if not cursor:
+            break
+    return rows, body_bytes, time.perf_counter() - started
+
+async def walk_activity_logs(fetch, size, pages):
+    rows = body_bytes = 0
+    started = time.perf_counter()
+    for page in range(1, pages + 1):
+        async with AsyncSessionLocal() as db:
+            count, length = await fetch(db, page, size)
+        rows += count
+        body_bytes += length
+        if count < size:
+            break
+    return rows, body_bytes, time.perf_counter() - started
+
+def report(name, rows, body_bytes, seconds):
+    rate = rows / seconds if seconds else 0
+    print(f"{name:<24}{rows:>10}{body_bytes / 1024:>12.0f}{seconds:>10.2f}{rate:>12.0f}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3, help="alternate the paths this many times and keep the best")
+    args = parser.parse_args()
+
+    paths = [
+        ("calls orm", walk_calls, orm_calls),
+        ("calls read model", walk_calls, read_model_calls),
+        ("activity logs orm", walk_activity_logs, orm_activity_logs),
+        ("activity logs read model", walk_activity_logs, read_model_activity_logs),
+    ]
+    best = {}
+    for _ in range(args.rounds):
+        for name, walk, fetch in paths:
+            result = await walk(fetch, args.page_size, args.pages)
+            if name not in best or result[2] < best[name][2]:
+                best[name] = result
+
+    print(f"{'path':<24}{'rows':>10}{'body KiB':>12}{'seconds':>10}{'rows/sec':>12}")
+    for name, _, _ in paths:
+        report(name, *best[name])
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
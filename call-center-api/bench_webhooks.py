@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Load the Africa's Talking webhook endpoints and report ack latency and queue drain.
+
+Fires callback webhooks at a running API with a fixed concurrency, reports the
+client-side ack latency percentiles, then polls /api/webhooks/metrics until the
+ingest queue is drained and prints the queue depth over time.
+
+    python bench_webhooks.py --url http://localhost:8000 --calls 2000 --concurrency 100 --token <jwt>
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+import httpx
+
+STATES = ["queued", "ringing", "in-progress", "completed"]
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def callbacks_for_call():
+    session_id = f"bench_{uuid.uuid4().hex[:12]}"
+    caller = f"+2547{random.randint(10000000, 99999999)}"
+    callee = f"+2541{random.randint(10000000, 99999999)}"
+    for index, status in enumerate(STATES):
+        yield {
+            "sessionId": session_id,
+            "callerNumber": caller,
+            "destinationNumber": callee,
+            "status": status,
+            "durationInSeconds": str(index * 15),
+        }
+
+async def fire(client, url, payloads, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def post(payload):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(f"{url}/api/webhooks/callback", data=payload)
+            latencies.append((time.perf_counter() - started) * 1000)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(post(payload) for payload in payloads))
+    return latencies, time.perf_counter() - started
+
+async def watch_queue(client, url, token, timeout):
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = (await client.get(f"{url}/api/webhooks/metrics", headers=headers)).json()
+        depth = (stats.get("pending") or 0) + (stats.get("undelivered") or 0)
+        print(f"  queue depth={depth:<6} pending={stats.get('pending')} undelivered={stats.get('undelivered')} "
+              f"lag p99={stats['processing_lag_ms']['p99']}")
+        if depth == 0:
+            return
+        await asyncio.sleep(0.5)
+    print("  queue not drained before timeout")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--calls", type=int, default=1000, help="simulated calls (4 callbacks each)")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--token", help="JWT for /api/webhooks/metrics; queue depth is skipped without it")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    payloads = [payload for _ in range(args.calls) for payload in callbacks_for_call()]
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        latencies, elapsed = await fire(client, args.url, payloads, args.concurrency)
+        print(f"{len(payloads)} webhooks in {elapsed:.2f}s ({len(payloads) / elapsed:.0f}/s)")
+        print(f"ack ms p50={percentile(latencies, 0.5):.1f} p99={percentile(latencies, 0.99):.1f} max={max(latencies):.1f}")
+        if args.token:
+            await watch_queue(client, args.url, args.token, args.timeout)
+
+if __name__ == "__main__":
+    asyncio.run(main())
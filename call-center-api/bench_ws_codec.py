@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Compare WebSocket payload size and encoding CPU for each framing mode.
+
+Simulates a wallboard feed of live call and agent updates and reports bytes per
+minute and CPU per message for JSON and msgpack frames, with and without
+permessage-deflate (a shared zlib context with SYNC_FLUSH, as negotiated by
+the websockets server with context takeover).
+
+    python bench_ws_codec.py --messages 5000 --rate 600
+"""
+
+import argparse
+import random
+import sys
+import os
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api.ws_codec import encode, msgpack, MSGPACK_SUBPROTOCOL
+
+STATUSES = ["ringing", "answered", "talking", "on_hold"]
+
+def live_call_event() -> dict:
+    start = datetime.now(tz=timezone.utc) - timedelta(seconds=random.randint(0, 600))
+    return {
+        "id": str(uuid.uuid4()),
+        "caller_number": f"+2547{random.randint(10000000, 99999999)}",
+        "caller_display_name": None,
+        "callee_number": f"+2541{random.randint(10000000, 99999999)}",
+        "callee_display_name": None,
+        "status": random.choice(STATUSES),
+        "direction": random.choice(["inbound", "outbound"]),
+        "talk_time": str(timedelta(seconds=random.randint(0, 600))),
+        "hold_time": "0:00:00",
+        "agent_name": random.choice(["Jane Wanjiku", "Brian Otieno", "Mary Akinyi"]),
+        "agent_extension": str(random.randint(1000, 1100)),
+        "queue_name": random.choice(["CC1", "CC2", "Recovery"]),
+        "call_start": start.isoformat(),
+        "event_id": f"{int(time.time() * 1000)}-{random.randint(0, 9)}",
+    }
+
+def agent_event() -> dict:
+    now = datetime.now(tz=timezone.utc).isoformat()
+    event = {
+        "id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "first_name": "Jane",
+        "last_name": "Wanjiku",
+        "email": "jane.wanjiku@example.com",
+        "agent_type": "recovery-agent",
+        "group": "A",
+        "region": "Nairobi",
+        "status": random.choice(["available", "busy", "offline"]),
+        "last_status_change": now,
+        "is_logged_in": True,
+        "login_time": now,
+        "last_activity": now,
+        "current_call_id": None,
+        "assigned_queues": ["CC1", "CC2"],
+        "skills": ["collections"],
+        "languages": ["en", "sw"],
+        "max_concurrent_calls": 1,
+        "auto_answer": False,
+        "call_recording_enabled": True,
+        "department": "Recovery",
+        "supervisor_id": str(uuid.uuid4()),
+        "notes": None,
+        "created_at": now,
+        "updated_at": now,
+        "last_login": now,
+        "event_id": f"{int(time.time() * 1000)}-0",
+    }
+    for field in [
+        "total_calls_today", "answered_calls_today", "missed_calls_today", "total_talk_time_today",
+        "total_hold_time_today", "total_calls", "answered_calls", "missed_calls", "total_talk_time",
+    ]:
+        event[field] = random.randint(0, 500)
+    event["average_call_duration"] = round(random.uniform(30, 300), 2)
+    return event
+
+def run_mode(messages, subprotocol, deflate: bool):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS) if deflate else None
+    total_bytes = 0
+    started = time.process_time()
+    for message in messages:
+        payload = encode(message, subprotocol)
+        if isinstance(payload, str):
+            payload = payload.encode()
+        if compressor:
+            # Per RFC 7692 the trailing 0x00 0x00 0xff 0xff is stripped from each message
+            payload = compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            payload = payload[:-4]
+        total_bytes += len(payload)
+    cpu = time.process_time() - started
+    return total_bytes, cpu
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000, help="messages to encode per mode")
+    parser.add_argument("--rate", type=int, default=600, help="messages per minute on one wallboard")
+    args = parser.parse_args()
+
+    random.seed(42)
+    messages = [live_call_event() if i % 3 else agent_event() for i in range(args.messages)]
+
+    modes = [("json", None, False), ("json+deflate", None, True)]
+    if msgpack is not None:
+        modes += [("msgpack", MSGPACK_SUBPROTOCOL, False), ("msgpack+deflate", MSGPACK_SUBPROTOCOL, True)]
+    else:
+        print("msgpack not installed; skipping binary modes")
+
+    print(f"{'mode':<18}{'bytes/msg':>12}{'KB/min':>12}{'cpu us/msg':>14}{'cpu ms/min':>14}")
+    for name, subprotocol, deflate in modes:
+        total_bytes, cpu = run_mode(messages, subprotocol, deflate)
+        per_message = total_bytes / len(messages)
+        cpu_per_message = cpu / len(messages)
+        print(
+            f"{name:<18}{per_message:>12.1f}{per_message * args.rate / 1024:>12.1f}"
+            f"{cpu_per_message * 1e6:>14.1f}{cpu_per_message * args.rate * 1e3:>14.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
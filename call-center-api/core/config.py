@@ -9,4 +9,84 @@ class Settings:
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60 * 24))
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
 
-settings = Settings()
\ No newline at end of file
+    # Live feed event streams
+    EVENT_STREAM_MAXLEN: int = int(os.getenv("EVENT_STREAM_MAXLEN", 1000))
+    EVENT_STREAM_BLOCK_MS: int = int(os.getenv("EVENT_STREAM_BLOCK_MS", 5000))
+    SSE_KEEPALIVE_SECONDS: int = int(os.getenv("SSE_KEEPALIVE_SECONDS", 15))
+
+    # WebSocket admission control and liveness
+    WS_MAX_CONNECTIONS_PER_NODE: int = int(os.getenv("WS_MAX_CONNECTIONS_PER_NODE", 2000))
+    WS_MAX_CONNECTIONS_PER_USER: int = int(os.getenv("WS_MAX_CONNECTIONS_PER_USER", 10))
+    WS_PING_INTERVAL_SECONDS: float = float(os.getenv("WS_PING_INTERVAL_SECONDS", 20))
+    WS_PING_TIMEOUT_SECONDS: float = float(os.getenv("WS_PING_TIMEOUT_SECONDS", 10))
+    WS_IDLE_TIMEOUT_SECONDS: float = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", 90))
+    # A node whose heartbeat key has expired is treated as gone
+    WS_NODE_TTL_SECONDS: int = int(os.getenv("WS_NODE_TTL_SECONDS", 60))
+    WS_RELAY_MAX_BACKOFF_SECONDS: float = float(os.getenv("WS_RELAY_MAX_BACKOFF_SECONDS", 30))
+
+    # Africa's Talking webhook routing
+    CALL_ROUTE_TTL_SECONDS: int = int(os.getenv("CALL_ROUTE_TTL_SECONDS", 3600))
+    CALL_ROUTE_CACHE_SIZE: int = int(os.getenv("CALL_ROUTE_CACHE_SIZE", 10000))
+    CALL_ROUTE_NEGATIVE_TTL_SECONDS: float = float(os.getenv("CALL_ROUTE_NEGATIVE_TTL_SECONDS", 2))
+
+    # Webhook ingestion queue
+    WEBHOOK_STREAM_MAXLEN: int = int(os.getenv("WEBHOOK_STREAM_MAXLEN", 100000))
+    WEBHOOK_CONSUMERS: int = int(os.getenv("WEBHOOK_CONSUMERS", 2))
+    WEBHOOK_BATCH_SIZE: int = int(os.getenv("WEBHOOK_BATCH_SIZE", 200))
+    WEBHOOK_BATCH_BLOCK_MS: int = int(os.getenv("WEBHOOK_BATCH_BLOCK_MS", 200))
+    WEBHOOK_CLAIM_IDLE_MS: int = int(os.getenv("WEBHOOK_CLAIM_IDLE_MS", 60000))
+    WEBHOOK_DEDUPE_TTL_SECONDS: int = int(os.getenv("WEBHOOK_DEDUPE_TTL_SECONDS", 3600))
+
+    # Africa's Talking HTTP client
+    AT_VOICE_URL: str = os.getenv(
+        "AT_VOICE_URL",
+        "https://voice.sandbox.africastalking.com" if os.getenv("AT_SANDBOX", "False").lower() == "true" else "https://voice.africastalking.com"
+    )
+    AT_WEBRTC_URL: str = os.getenv("AT_WEBRTC_URL", "https://webrtc.africastalking.com")
+    AT_HTTP_TIMEOUT_SECONDS: float = float(os.getenv("AT_HTTP_TIMEOUT_SECONDS", 10))
+    AT_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("AT_CONNECT_TIMEOUT_SECONDS", 3))
+    AT_MAX_CONCURRENCY: int = int(os.getenv("AT_MAX_CONCURRENCY", 50))
+    AT_MAX_RETRIES: int = int(os.getenv("AT_MAX_RETRIES", 3))
+    AT_RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("AT_RETRY_BASE_DELAY_SECONDS", 0.2))
+    AT_TOKEN_REFRESH_MARGIN_SECONDS: int = int(os.getenv("AT_TOKEN_REFRESH_MARGIN_SECONDS", 600))
+
+    # Caller IDs for outbound calls; also tells customer numbers apart from ours
+    AT_PHONE_NUMBERS: list = [num.strip() for num in os.getenv("AT_PHONE_NUMBERS", "").split(",") if num.strip()]
+
+    # Caller-ID pool limits, per number across all workers
+    CALLER_ID_MAX_CONCURRENT: int = int(os.getenv("CALLER_ID_MAX_CONCURRENT", 5))
+    CALLER_ID_MAX_CPS: int = int(os.getenv("CALLER_ID_MAX_CPS", 1))
+    CALLER_ID_STALE_SECONDS: int = int(os.getenv("CALLER_ID_STALE_SECONDS", 7200))
+
+    # Outbound call dispatch pool
+    CALL_DISPATCH_WORKERS: int = int(os.getenv("CALL_DISPATCH_WORKERS", 8))
+    CALL_DISPATCH_QUEUE_SIZE: int = int(os.getenv("CALL_DISPATCH_QUEUE_SIZE", 1000))
+    CALL_DISPATCH_MAX_ATTEMPTS: int = int(os.getenv("CALL_DISPATCH_MAX_ATTEMPTS", 5))
+    CALL_DISPATCH_RETRY_DELAY_SECONDS: float = float(os.getenv("CALL_DISPATCH_RETRY_DELAY_SECONDS", 1))
+    # Rows still dispatching after this long lost their job to a restart
+    CALL_DISPATCH_STALE_SECONDS: int = int(os.getenv("CALL_DISPATCH_STALE_SECONDS", 300))
+    CALL_LATENCY_SAMPLES: int = int(os.getenv("CALL_LATENCY_SAMPLES", 2048))
+
+    # Call history export; rows fetched per server-side cursor round trip
+    CALL_EXPORT_BATCH_SIZE: int = int(os.getenv("CALL_EXPORT_BATCH_SIZE", 5000))
+
+    # After a call is written, store the fresh call under call:{id} instead of
+    # deleting the key
+    CALL_CACHE_WRITE_THROUGH: bool = os.getenv("CALL_CACHE_WRITE_THROUGH", "True").lower() == "true"
+
+    # Live call registry: entries unchanged this long are swept as calls whose
+    # end was lost; the registry is rebuilt from Postgres this often
+    LIVE_CALL_STALE_SECONDS: int = int(os.getenv("LIVE_CALL_STALE_SECONDS", 7200))
+    LIVE_CALL_SWEEP_SECONDS: int = int(os.getenv("LIVE_CALL_SWEEP_SECONDS", 60))
+    LIVE_CALL_RECONCILE_SECONDS: int = int(os.getenv("LIVE_CALL_RECONCILE_SECONDS", 300))
+
+    # Monthly calls partitions kept created ahead of the current month
+    CALL_PARTITION_MONTHS_AHEAD: int = int(os.getenv("CALL_PARTITION_MONTHS_AHEAD", 3))
+
+    # Cold storage for old calls: Parquet files under a local path or a URI
+    # pyarrow understands (s3://bucket/prefix, gs://...)
+    CALL_ARCHIVE_URI: str = os.getenv("CALL_ARCHIVE_URI", "archive/calls")
+    CALL_ARCHIVE_AFTER_MONTHS: int = int(os.getenv("CALL_ARCHIVE_AFTER_MONTHS", 12))
+    CALL_ARCHIVE_BATCH_SIZE: int = int(os.getenv("CALL_ARCHIVE_BATCH_SIZE", 50000))
+
+settings = Settings()
@@ -9,6 +9,35 @@ from models.activity_log import ActivityLog
 
 logger = logging.getLogger(__name__)
 
+def activity_filter_conditions(
+    activity_type: Optional[str] = None,
+    actor_type: Optional[str] = None,
+    actor_id: Optional[UUID] = None,
+    target_type: Optional[str] = None,
+    target_id: Optional[UUID] = None,
+    severity: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> list:
+    conditions = []
+    if activity_type:
+        conditions.append(ActivityLog.activity_type == activity_type)
+    if actor_type:
+        conditions.append(ActivityLog.actor_type == actor_type)
+    if actor_id:
+        conditions.append(ActivityLog.actor_id == actor_id)
+    if target_type:
+        conditions.append(ActivityLog.target_type == target_type)
+    if target_id:
+        conditions.append(ActivityLog.target_id == target_id)
+    if severity:
+        conditions.append(ActivityLog.severity == severity)
+    if start_date:
+        conditions.append(ActivityLog.timestamp >= start_date)
+    if end_date:
+        conditions.append(ActivityLog.timestamp <= end_date)
+    return conditions
+
 class ActivityLogCRUD:
     """CRUD operations for ActivityLog model"""
     
@@ -76,25 +105,9 @@ class ActivityLogCRUD:
         query = select(ActivityLog)
         count_query = select(func.count(ActivityLog.id))
         
-        conditions = []
-        
-        if activity_type:
-            conditions.append(ActivityLog.activity_type == activity_type)
-        if actor_type:
-            conditions.append(ActivityLog.actor_type == actor_type)
-        if actor_id:
-            conditions.append(ActivityLog.actor_id == actor_id)
-        if target_type:
-            conditions.append(ActivityLog.target_type == target_type)
-        if target_id:
-            conditions.append(ActivityLog.target_id == target_id)
-        if severity:
-            conditions.append(ActivityLog.severity == severity)
-        if start_date:
-            conditions.append(ActivityLog.timestamp >= start_date)
-        if end_date:
-            conditions.append(ActivityLog.timestamp <= end_date)
-            
+        conditions = activity_filter_conditions(
+            activity_type, actor_type, actor_id, target_type, target_id, severity, start_date, end_date
+        )
         if conditions:
             query = query.where(and_(*conditions))
             count_query = count_query.where(and_(*conditions))
@@ -14,6 +14,24 @@ from utils.activity_logging import activity_logger
 
 logger = logging.getLogger(__name__)
 
+def agent_filter_conditions(filters: Optional[AgentFilters]) -> list:
+    conditions = []
+    if filters and filters.status:
+        conditions.append(Agent.status == filters.status.lower().replace("_", "-"))
+    if filters and filters.department:
+        conditions.append(Agent.department == filters.department)
+    if filters and filters.is_logged_in is not None:
+        conditions.append(Agent.is_logged_in == filters.is_logged_in)
+    if filters and filters.supervisor_id:
+        conditions.append(Agent.supervisor_id == filters.supervisor_id)
+    if filters and filters.queue_name:
+        conditions.append(Agent.assigned_queues.contains([filters.queue_name]))
+    if filters and filters.skill:
+        conditions.append(Agent.skills.contains([filters.skill]))
+    if filters and filters.agent_type:
+        conditions.append(Agent.agent_type == filters.agent_type.lower().replace("_", "-"))
+    return conditions
+
 class AgentCRUD:
     """CRUD operations for Agent model with Redis caching."""
     
@@ -145,22 +163,7 @@ class AgentCRUD:
         query = select(Agent).options(selectinload(Agent.user))
         count_query = select(func.count(Agent.id))
         
-        conditions = []
-        if filters and filters.status:
-            conditions.append(Agent.status == filters.status.lower().replace("_", "-"))
-        if filters and filters.department:
-            conditions.append(Agent.department == filters.department)
-        if filters and filters.is_logged_in is not None:
-            conditions.append(Agent.is_logged_in == filters.is_logged_in)
-        if filters and filters.supervisor_id:
-            conditions.append(Agent.supervisor_id == filters.supervisor_id)
-        if filters and filters.queue_name:
-            conditions.append(Agent.assigned_queues.contains([filters.queue_name]))
-        if filters and filters.skill:
-            conditions.append(Agent.skills.contains([filters.skill]))
-        if filters and filters.agent_type:
-            conditions.append(Agent.agent_type == filters.agent_type.lower().replace("_", "-"))
-            
+        conditions = agent_filter_conditions(filters)
         if conditions:
             query = query.where(and_(*conditions))
             count_query = count_query.where(and_(*conditions))
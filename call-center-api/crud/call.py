@@ -1,74 +1,188 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc
+from sqlalchemy import select, update, func, and_, or_, desc, case, cast, literal, Integer, text, tuple_
 from sqlalchemy.orm import selectinload
 from typing import List, Tuple, Optional
 from uuid import UUID
+import base64
 import logging
 import json
-from datetime import datetime, timedelta
+import re
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
+from core.config import settings
 from models.call import Call
+from models.activity_log import ActivityLog
 from models.agent import Agent
 from models.user import User
 from schemas.call import CallCreate, CallUpdate, CallFilters, LiveCallResponse
 from api.redis_client import redis_client
+from api.json_bytes import dumps
+from services.event_stream import event_stream
+from services.live_calls import live_call_registry
+from services.call_state import CALL_STATUS_RANK, append_events, event_from_webhook, reduce_call_events, upsert_calls
 from utils.activity_logging import activity_logger
+from utils.phone import to_e164
 
 logger = logging.getLogger(__name__)
 
+# Estimated totals for filtered listings stop counting here
+CALL_COUNT_CAP = 10000
+
+# Trigrams need three characters; shorter fragments cannot use the index
+PHONE_SEARCH_MIN_DIGITS = 3
+
+# Columns behind CallResponse
+CALL_COLUMNS = (
+    Call.id, Call.at_session_id, Call.at_call_id, Call.caller_number, Call.callee_number,
+    Call.direction, Call.description, Call.status, Call.call_start, Call.call_answered,
+    Call.call_end, Call.total_duration, Call.agent_id, Call.lead_id, Call.created_at, Call.updated_at,
+)
+CALL_COLUMN_NAMES = [column.key for column in CALL_COLUMNS]
+
+# One CallResponse as JSON per call, written through by every write to the call
+CALL_CACHE_KEY = "call:{}"
+CALL_CACHE_SECONDS = 300
+
+# Counter stamped on cache writes. Writers take a stamp after committing and
+# then read the row, so a higher stamp always holds newer or equal state;
+# readers filling a miss use the counter's value from before their query.
+CALL_CACHE_STAMP_KEY = "call_cache_stamp"
+
+# KEYS: call:{id} per call. ARGV: stamp, TTL, then per key the CallResponse
+# JSON, or '' to delete. A key is only written at a stamp at or above the one
+# kept beside it in call:{id}:stamp, so a payload read before a later write
+# cannot overwrite it.
+CALL_CACHE_SCRIPT = """
+local stamp = tonumber(ARGV[1])
+local written = 0
+for i, key in ipairs(KEYS) do
+    local current = redis.call('GET', key .. ':stamp')
+    if not current or tonumber(current) <= stamp then
+        if ARGV[i + 2] == '' then
+            redis.call('DEL', key)
+        else
+            redis.call('SET', key, ARGV[i + 2], 'EX', ARGV[2])
+            written = written + 1
+        end
+        redis.call('SET', key .. ':stamp', stamp, 'EX', ARGV[2])
+    end
+end
+return written
+"""
+
+async def write_call_cache(values: dict, stamp: int) -> None:
+    """Write {call ID: CallResponse JSON or None to delete} at stamp, skipping keys written at a later one"""
+    if not values:
+        return
+    try:
+        await redis_client.eval(
+            CALL_CACHE_SCRIPT,
+            [CALL_CACHE_KEY.format(call_id) for call_id in values],
+            [stamp, CALL_CACHE_SECONDS, *(value or "" for value in values.values())]
+        )
+    except Exception as e:
+        logger.error(f"Call cache write failed for {len(values)} calls: {e}")
+
+def _status_rank(column):
+    return case(CALL_STATUS_RANK, value=column, else_=0)
+
+def merge_projection(incoming) -> dict:
+    """SET clause merging a reduce_call_events projection (column name to SQL expression) into a calls row.
+
+    Status only moves forward by rank, the earliest start wins, answer and end
+    times are kept from the first event reporting them, and total_duration
+    falls back to end minus answer time when the provider sends none.
+    """
+    call_answered = func.coalesce(Call.call_answered, incoming["call_answered"])
+    call_end = func.coalesce(Call.call_end, incoming["call_end"])
+    return {
+        "status": case(
+            (_status_rank(incoming["status"]) >= _status_rank(Call.status), incoming["status"]),
+            else_=Call.status
+        ),
+        "call_start": func.least(Call.call_start, incoming["call_start"]),
+        "caller_number": func.coalesce(func.nullif(Call.caller_number, ""), incoming["caller_number"]),
+        "callee_number": func.coalesce(func.nullif(Call.callee_number, ""), incoming["callee_number"]),
+        "counterparty_e164": func.coalesce(Call.counterparty_e164, incoming["counterparty_e164"]),
+        "call_answered": call_answered,
+        "call_end": call_end,
+        "total_duration": case(
+            (incoming["total_duration"] > 0, func.greatest(func.coalesce(Call.total_duration, 0), incoming["total_duration"])),
+            (and_(call_end.isnot(None), call_answered.isnot(None)),
+             cast(func.extract("epoch", call_end - call_answered), Integer)),
+            else_=Call.total_duration
+        ),
+        "updated_at": func.now(),
+    }
+
+def encode_position(call_start: datetime, call_id) -> str:
+    raw = f"{call_start.isoformat()}|{call_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def encode_cursor(call) -> str:
+    """Opaque cursor for the position just after call (a Call or a row with call_start and id) in (call_start, id) DESC order"""
+    return encode_position(call.call_start, call.id)
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        call_start, call_id = raw.split("|")
+        return datetime.fromisoformat(call_start), UUID(call_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _before_cursor(cursor: str):
+    return tuple_(Call.call_start, Call.id) < tuple_(*decode_cursor(cursor))
+
+def call_filter_conditions(filters: Optional[CallFilters]) -> list:
+    conditions = []
+    if filters:
+        if filters.status:
+            conditions.append(Call.status == filters.status)
+        if filters.direction:
+            conditions.append(Call.direction == filters.direction)
+        if filters.agent_id:
+            conditions.append(Call.agent_id == filters.agent_id)
+        if filters.start_date:
+            conditions.append(Call.call_start >= filters.start_date)
+        if filters.end_date:
+            conditions.append(Call.call_start <= filters.end_date)
+    return conditions
+
 class CallCRUD:
     """CRUD operations for Call model"""
     
-    def _serialize_call(self, call: Call) -> dict:
-        """Convert Call model to dictionary for caching"""
-        if not call:
-            return None
-            
-        call_start = call.call_start.isoformat() if call.call_start else None
-        call_answered = call.call_answered.isoformat() if call.call_answered else None
-        call_end = call.call_end.isoformat() if call.call_end else None
-        created_at = call.created_at.isoformat() if call.created_at else None
-        updated_at = call.updated_at.isoformat() if call.updated_at else None
-        
-        return {
-            "id": str(call.id),
-            "call_id_3cx": call.call_id_3cx,
-            "session_id": call.session_id,
-            "caller_number": call.caller_number,
-            "caller_display_name": call.caller_display_name,
-            "callee_number": call.callee_number,
-            "callee_display_name": call.callee_display_name,
-            "status": call.status,
-            "direction": call.direction,
-            "call_start": call_start,
-            "call_answered": call_answered,
-            "call_end": call_end,
-            "ringing_duration": call.ringing_duration,
-            "talk_duration": call.talk_duration,
-            "hold_duration": call.hold_duration,
-            "total_duration": call.total_duration,
-            "agent_id": str(call.agent_id) if call.agent_id else None,
-            "agent_extension": call.agent_extension,
-            "queue_name": call.queue_name,
-            "has_recording": call.has_recording,
-            "recording_url": call.recording_url,
-            "is_transferred": call.is_transferred,
-            "transfer_target": call.transfer_target,
-            "description": call.description,
-            "tags": call.tags,
-            "custom_fields": call.custom_fields,
-            "lead_id": str(call.lead_id) if call.lead_id else None,
-            "created_at": created_at,
-            "updated_at": updated_at
-        }
-    
-    def _deserialize_call(self, data: dict) -> dict:
-        """Convert cached dictionary back to format suitable for response"""
-        if not data:
-            return None
-        return data
-    
+    async def _cache_calls(self, db: AsyncSession, call_ids: List[UUID]) -> None:
+        """After a commit, write calls through to call:{id} and refresh their live call entries.
+
+        The rows are read back after taking a stamp, so of two writers racing
+        on a call the one with the higher stamp read the later commit. With
+        CALL_CACHE_WRITE_THROUGH off, the keys are deleted at the stamp instead.
+        """
+        if not call_ids:
+            return
+        try:
+            stamp = await redis_client.incr(CALL_CACHE_STAMP_KEY)
+        except Exception:
+            # Logged by the client; the cache write would fail the same way
+            stamp = None
+        if stamp is not None:
+            values = dict.fromkeys(call_ids)
+            if settings.CALL_CACHE_WRITE_THROUGH:
+                rows = (await db.execute(select(*CALL_COLUMNS).where(Call.id.in_(list(call_ids))))).all()
+                values.update({row.id: dumps(row._asdict()).decode() for row in rows})
+            await write_call_cache(values, stamp)
+        await live_call_registry.refresh(db, call_ids)
+
+    async def _uncache_call(self, call_id: UUID) -> None:
+        try:
+            await write_call_cache({call_id: None}, await redis_client.incr(CALL_CACHE_STAMP_KEY))
+        except Exception:
+            # Logged by the client
+            pass
+        await live_call_registry.remove([call_id])
+
     async def get_call_by_3cx_id(self, db: AsyncSession, call_id_3cx: str) -> Optional[Call]:
         """Get call by 3CX call ID"""
         try:
@@ -118,27 +232,16 @@ class CallCRUD:
             await db.rollback()
             logger.error(f"Error creating call from webhook: {str(e)}")
             raise
-        """Get call by ID with Redis caching"""
-        cache_key = f"call:{call_id}"
-        cached_call = await redis_client.get(cache_key)
-        if cached_call:
-            logger.info(f"Cache hit for call {call_id}")
-            return self._deserialize_call(json.loads(cached_call))
-            
-        logger.info(f"Cache miss for call {call_id}, fetching from database")
+
+    async def get_call(self, db: AsyncSession, call_id: UUID) -> Optional[Call]:
+        """Get call by ID for updates; reads go through read_models.calls_by_ids"""
         query = (
             select(Call)
             .options(selectinload(Call.agent), selectinload(Call.lead))
             .where(Call.id == call_id)
         )
         result = await db.execute(query)
-        call = result.scalar_one_or_none()
-        
-        if call:
-            serialized_call = self._serialize_call(call)
-            await redis_client.setex(cache_key, 300, json.dumps(serialized_call))
-            
-        return call
+        return result.scalar_one_or_none()
     
     async def get_call_by_3cx_id(self, db: AsyncSession, call_id_3cx: str) -> Optional[Call]:
         """Get call by 3CX call ID"""
@@ -150,106 +253,82 @@ class CallCRUD:
         result = await db.execute(query)
         return result.scalar_one_or_none()
     
+    async def _keyset_page(
+        self,
+        db: AsyncSession,
+        query,
+        size: int,
+        cursor: Optional[str]
+    ) -> Tuple[List[Call], Optional[str]]:
+        """One page of query newest first on (call_start, id), plus the cursor for the next page"""
+        query = query.where(Call.call_start.isnot(None))
+        if cursor:
+            query = query.where(_before_cursor(cursor))
+        query = query.order_by(Call.call_start.desc(), Call.id.desc()).limit(size + 1)
+        result = await db.execute(query)
+        calls = result.scalars().all()
+        if len(calls) > size:
+            return calls[:size], encode_cursor(calls[size - 1])
+        return calls, None
+    
+    async def _count_calls(self, db: AsyncSession, conditions: list, mode: str) -> Tuple[Optional[int], bool]:
+        """Total for a listing as (total, is_estimate); mode is none, exact or estimate"""
+        if mode == "exact":
+            count_query = select(func.count(Call.id))
+            if conditions:
+                count_query = count_query.where(and_(*conditions))
+            return (await db.execute(count_query)).scalar(), False
+        if mode == "estimate":
+            if not conditions:
+                result = await db.execute(text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'calls'::regclass"))
+                return max(result.scalar() or 0, 0), True
+            # Stop counting at the cap; beyond it the UI only needs "more than"
+            capped = select(Call.id).where(and_(*conditions)).limit(CALL_COUNT_CAP).subquery()
+            total = (await db.execute(select(func.count()).select_from(capped))).scalar()
+            return total, total >= CALL_COUNT_CAP
+        return None, False
+    
     async def get_calls_paginated(
         self, 
         db: AsyncSession, 
-        page: int, 
         size: int, 
-        filters: CallFilters
-    ) -> Tuple[List[Call], int]:
-        """Get paginated calls with filters and Redis caching"""
-        filters_dict = filters.model_dump(exclude_unset=True) if filters else {}
-        cache_key = f"calls:{page}:{size}:{hash(str(filters_dict))}"
-        
-        cached_result = await redis_client.get(cache_key)
-        if cached_result:
-            logger.info(f"Cache hit for calls page {page}")
-            cached_data = json.loads(cached_result)
-            return [self._deserialize_call(call) for call in cached_data[0]], cached_data[1]
-            
-        logger.info(f"Cache miss for calls page {page}, fetching from database")
-        
+        filters: CallFilters,
+        cursor: Optional[str] = None,
+        count: str = "none"
+    ) -> Tuple[List[Call], Optional[str], Optional[int], bool]:
+        """Get a page of calls with filters, newest first.
+
+        Returns (calls, next_cursor, total, total_is_estimate); pass next_cursor
+        back to get the following page. Raises ValueError for a bad cursor.
+        """
         query = select(Call).options(selectinload(Call.agent), selectinload(Call.lead))
-        count_query = select(func.count(Call.id))
         
-        conditions = []
-        if filters.status:
-            conditions.append(Call.status == filters.status)
-        if filters.direction:
-            conditions.append(Call.direction == filters.direction)
-        if filters.agent_id:
-            conditions.append(Call.agent_id == filters.agent_id)
-        if filters.queue_name:
-            conditions.append(Call.queue_name == filters.queue_name)
-        if filters.start_date:
-            conditions.append(Call.call_start >= filters.start_date)
-        if filters.end_date:
-            conditions.append(Call.call_start <= filters.end_date)
-        if filters.caller_number:
-            conditions.append(Call.caller_number.ilike(f"%{filters.caller_number}%"))
-        if filters.callee_number:
-            conditions.append(Call.callee_number.ilike(f"%{filters.callee_number}%"))
-        if filters.has_recording is not None:
-            conditions.append(Call.has_recording == filters.has_recording)
-            
+        conditions = call_filter_conditions(filters)
         if conditions:
             query = query.where(and_(*conditions))
-            count_query = count_query.where(and_(*conditions))
-        
-        count_result = await db.execute(count_query)
-        total = count_result.scalar()
-        
-        query = query.order_by(desc(Call.call_start)).offset((page - 1) * size).limit(size)
-        result = await db.execute(query)
-        calls = result.scalars().all()
         
-        if calls:
-            serialized_calls = [self._serialize_call(call) for call in calls]
-            cache_result = (serialized_calls, total)
-            await redis_client.setex(cache_key, 120, json.dumps(cache_result))
-            
-        return calls, total
+        calls, next_cursor = await self._keyset_page(db, query, size, cursor)
+        total, is_estimate = await self._count_calls(db, conditions, count)
+        return calls, next_cursor, total, is_estimate
     
-    async def get_active_calls(self, db: AsyncSession) -> List[Call]:
-        """Get all currently active calls with Redis caching"""
-        cache_key = "active_calls"
-        cached_calls = await redis_client.get(cache_key)
-        if cached_calls:
-            logger.info("Cache hit for active calls")
-            return [self._deserialize_call(call) for call in json.loads(cached_calls)]
-            
-        logger.info("Cache miss for active calls, fetching from database")
-        query = (
-            select(Call)
-            .options(selectinload(Call.agent))
-            .where(Call.status.in_(["ringing", "answered", "on_hold", "talking"]))
-            .order_by(Call.call_start.desc())
-        )
-        result = await db.execute(query)
-        calls = result.scalars().all()
-        
-        if calls:
-            serialized_calls = [self._serialize_call(call) for call in calls]
-            await redis_client.setex(cache_key, 30, json.dumps(serialized_calls))
-            
-        return calls
+    async def get_active_calls(self, db: AsyncSession) -> List[dict]:
+        """Ringing and connected calls from the live call registry, newest first"""
+        return await live_call_registry.live_calls()
     
     async def get_agent_calls(
         self, 
         db: AsyncSession, 
         agent_id: UUID, 
-        limit: int = 50
-    ) -> List[Call]:
-        """Get recent calls for specific agent"""
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Call], Optional[str]]:
+        """Get an agent's calls newest first, with the cursor for the next page"""
         query = (
             select(Call)
             .options(selectinload(Call.lead))
             .where(Call.agent_id == agent_id)
-            .order_by(desc(Call.call_start))
-            .limit(limit)
         )
-        result = await db.execute(query)
-        return result.scalars().all()
+        return await self._keyset_page(db, query, limit, cursor)
     
     async def create_call(self, db: AsyncSession, call_data: CallCreate, actor_id: UUID, actor_name: str) -> Call:
         """Create new call and invalidate relevant caches"""
@@ -292,9 +371,7 @@ class CallCRUD:
             description=f"Created new call from {call.caller_number} to {call.callee_number}"
         )
         
-        cache_key = f"call:{call.id}"
-        await redis_client.delete(cache_key)
-        await redis_client.delete("active_calls")
+        await self._cache_calls(db, [call.id])
         await redis_client.delete_pattern(f"calls_by_number:{call.caller_number}:*")
         await redis_client.delete_pattern(f"calls_by_number:{call.callee_number}:*")
         await redis_client.delete_pattern("calls:*")
@@ -323,7 +400,7 @@ class CallCRUD:
                     call_start=call.call_start
                 )
                 channel = f"live_calls:{actor_id}:{designation or 'all'}"
-                await redis_client.publish(channel, json.dumps(live_call.model_dump()))
+                await event_stream.publish(channel, json.dumps(live_call.model_dump()))
         
         return call
     
@@ -335,7 +412,7 @@ class CallCRUD:
         actor_id: UUID,
         actor_name: str
     ) -> Optional[Call]:
-        """Update existing call and invalidate cache"""
+        """Update existing call and write it through the cache"""
         call = await self.get_call(db, call_id)
         if not call:
             return None
@@ -370,10 +447,7 @@ class CallCRUD:
             changes=changes if changes else None
         )
         
-        cache_key = f"call:{call_id}"
-        await redis_client.delete(cache_key)
-        if 'status' in update_data:
-            await redis_client.delete("active_calls")
+        await self._cache_calls(db, [call.id])
         if 'caller_number' in update_data or 'callee_number' in update_data:
             await redis_client.delete_pattern(f"calls_by_number:{original_caller_number}:*")
             await redis_client.delete_pattern(f"calls_by_number:{original_callee_number}:*")
@@ -405,7 +479,7 @@ class CallCRUD:
                     call_start=call.call_start
                 )
                 channel = f"live_calls:{actor_id}:{designation or 'all'}"
-                await redis_client.publish(channel, json.dumps(live_call.model_dump()))
+                await event_stream.publish(channel, json.dumps(live_call.model_dump()))
         
         return call
     
@@ -432,9 +506,7 @@ class CallCRUD:
             description=f"Deleted call {call_description}"
         )
         
-        cache_key = f"call:{call_id}"
-        await redis_client.delete(cache_key)
-        await redis_client.delete("active_calls")
+        await self._uncache_call(call_id)
         await redis_client.delete_pattern(f"calls_by_number:{caller_number}:*")
         await redis_client.delete_pattern(f"calls_by_number:{callee_number}:*")
         await redis_client.delete_pattern("calls:*")
@@ -447,10 +519,45 @@ class CallCRUD:
             designations.append(agent_data.User.designation)
         for designation in designations:
             channel = f"live_calls:{actor_id}:{designation or 'all'}"
-            await redis_client.publish(channel, json.dumps({"id": str(call_id), "deleted": True}))
+            await event_stream.publish(channel, json.dumps({"id": str(call_id), "deleted": True}))
         
         return True
     
+    async def _set_status(self, db: AsyncSession, previous: dict, status: str, actor_id: UUID) -> List[dict]:
+        """Record a status change on calls as API events and project it onto their rows; returns the rows as CallResponse dicts.
+
+        previous maps call IDs to their current status. The event's projection
+        is merged like a webhook's, so status only moves forward by rank and
+        answer and end times are kept from the first event reporting them. The
+        caller commits.
+        """
+        now = datetime.now(tz=timezone.utc)
+        projection = reduce_call_events([{"at_session_id": None, "state": status, "occurred_at": now, "payload": {}}])
+        table = Call.__table__
+        incoming = {
+            column: literal(value, type_=table.c[column].type)
+            for column, value in projection.items() if column != "at_session_id"
+        }
+        result = await db.execute(
+            update(Call)
+            .where(Call.id.in_(list(previous)))
+            .values(merge_projection(incoming))
+            .returning(*CALL_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        calls = [row._asdict() for row in result.all()]
+        await append_events(db, [
+            {
+                "at_session_id": call["at_session_id"],
+                "state": status,
+                "occurred_at": now,
+                "source": "api",
+                "payload": {"actor_id": str(actor_id), "previous_status": previous[call["id"]]},
+            }
+            for call in calls if call["at_session_id"]
+        ])
+        return calls
+
     async def update_call_status(
         self, 
         db: AsyncSession, 
@@ -459,26 +566,13 @@ class CallCRUD:
         actor_id: UUID,
         actor_name: str
     ) -> Optional[Call]:
-        """Update call status and log activity"""
+        """Update call status through a call event and log activity"""
         call = await self.get_call(db, call_id)
         if not call:
             return None
         
         original_status = call.status
-        call.status = status
-        
-        now = datetime.now(tz=ZoneInfo("Africa/Nairobi"))
-        if status == "answered" and not call.call_answered:
-            call.call_answered = now
-            if call.call_start:
-                call.ringing_duration = int((now - call.call_start).total_seconds())
-        elif status == "ended" and not call.call_end:
-            call.call_end = now
-            if call.call_start:
-                call.total_duration = int((now - call.call_start).total_seconds())
-            if call.call_answered:
-                call.talk_duration = int((now - call.call_answered).total_seconds())
-        
+        await self._set_status(db, {call.id: original_status}, status, actor_id)
         await db.commit()
         await db.refresh(call)
         
@@ -489,12 +583,10 @@ class CallCRUD:
             actor_name=actor_name,
             call_id=call_id,
             call_name=f"Call from {call.caller_number} to {call.callee_number}",
-            description=f"Changed call status from {original_status} to {status}"
+            description=f"Changed call status from {original_status} to {call.status}"
         )
         
-        cache_key = f"call:{call_id}"
-        await redis_client.delete(cache_key)
-        await redis_client.delete("active_calls")
+        await self._cache_calls(db, [call.id])
         await redis_client.delete_pattern("calls:*")
         
         # Publish WebSocket update
@@ -504,61 +596,185 @@ class CallCRUD:
             designations = [None]
             if agent_data and agent_data.User.designation:
                 designations.append(agent_data.User.designation)
+            live_call = LiveCallResponse(
+                id=call.id,
+                caller_number=call.caller_number,
+                callee_number=call.callee_number,
+                status=call.status,
+                duration=int((datetime.now(tz=timezone.utc) - call.call_start).total_seconds()),
+                agent_id=call.agent_id
+            )
             for designation in designations:
-                live_call = LiveCallResponse(
-                    id=call.id,
-                    caller_number=call.caller_number,
-                    caller_display_name=call.caller_display_name,
-                    callee_number=call.callee_number,
-                    callee_display_name=call.callee_display_name,
-                    status=call.status,
-                    direction=call.direction,
-                    talk_time=str(timedelta(seconds=int(call.talk_duration or 0))),
-                    hold_time=str(timedelta(seconds=int(call.hold_duration or 0))),
-                    agent_name=f"{agent_data.User.first_name} {agent_data.User.last_name}" if agent_data else None,
-                    agent_extension=call.agent_extension,
-                    queue_name=call.queue_name,
-                    call_start=call.call_start
-                )
                 channel = f"live_calls:{actor_id}:{designation or 'all'}"
-                await redis_client.publish(channel, json.dumps(live_call.model_dump()))
-        
+                await event_stream.publish(channel, live_call.model_dump_json())
+
         return call
-    
+
+    async def update_call_statuses(
+        self,
+        db: AsyncSession,
+        call_ids: List[UUID],
+        status: str,
+        actor_id: UUID,
+        actor_name: str
+    ) -> List[dict]:
+        """Set one status on many calls; returns the updated calls as CallResponse dicts.
+
+        The rows are locked, the change is projected onto them with one UPDATE
+        and recorded as events (see _set_status), activity logs are written in
+        the same transaction, and the whole batch is committed once. The calls
+        are written through the cache and the registry in one refresh each, and
+        one calls_status_changed event per channel carries the updated calls.
+        Calls the status would move back keep their own (the projection merges
+        by rank); they are returned as they are but not logged or published.
+        """
+        previous = dict((await db.execute(
+            select(Call.id, Call.status).where(Call.id.in_(call_ids)).order_by(Call.id).with_for_update()
+        )).all())
+        if not previous:
+            return []
+
+        calls = await self._set_status(db, previous, status, actor_id)
+        # Calls the status would have moved back keep theirs
+        changed = [call for call in calls if call["status"] != previous[call["id"]]]
+        db.add_all([
+            ActivityLog(
+                activity_type="call_status_changed",
+                description=f"Changed call status from {previous[call['id']]} to {call['status']}",
+                actor_type="user",
+                actor_id=actor_id,
+                actor_name=actor_name,
+                target_type="call",
+                target_id=call["id"],
+                target_name=f"Call from {call['caller_number']} to {call['callee_number']}",
+                context_data={"batch_size": len(calls)},
+            )
+            for call in changed
+        ])
+        await db.commit()
+
+        await self._cache_calls(db, [call["id"] for call in calls])
+
+        # Like the per-call path: every call on the actor's all channel, and
+        # each agent designation's calls on that designation's channel
+        if not changed:
+            return calls
+        agent_ids = {call["agent_id"] for call in changed if call["agent_id"]}
+        designations = dict((await db.execute(
+            select(Agent.id, User.designation).join(User, Agent.user_id == User.id).where(Agent.id.in_(agent_ids))
+        )).all()) if agent_ids else {}
+        by_channel = {"all": changed}
+        for call in changed:
+            designation = designations.get(call["agent_id"])
+            if designation:
+                by_channel.setdefault(designation, []).append(call)
+        for designation, channel_calls in by_channel.items():
+            await event_stream.publish(
+                f"live_calls:{actor_id}:{designation}",
+                dumps({"type": "calls_status_changed", "status": status, "calls": channel_calls}).decode()
+            )
+        return calls
+
     async def get_calls_by_number(
         self, 
         db: AsyncSession, 
         phone_number: str, 
-        limit: int = 10
-    ) -> List[Call]:
-        """Get recent calls for a phone number with Redis caching"""
-        cache_key = f"calls_by_number:{phone_number}:{limit}"
-        cached_calls = await redis_client.get(cache_key)
-        if cached_calls:
-            logger.info(f"Cache hit for calls by number {phone_number}")
-            return [self._deserialize_call(call) for call in json.loads(cached_calls)]
-            
-        logger.info(f"Cache miss for calls by number {phone_number}, fetching from database")
+        limit: int = 10,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Call], Optional[str]]:
+        """Get a customer's calls newest first, with the cursor for the next page.
+
+        Matches on counterparty_e164, so 07.., 254.. and +254.. forms of the
+        number find the same calls with one (counterparty_e164, call_start, id)
+        index range scan. Anything that is not a phone number matches nothing.
+        """
+        counterparty = to_e164(phone_number)
+        if not counterparty:
+            return [], None
         query = (
             select(Call)
             .options(selectinload(Call.agent))
-            .where(
-                or_(
-                    Call.caller_number == phone_number,
-                    Call.callee_number == phone_number
-                )
-            )
-            .order_by(desc(Call.call_start))
+            .where(Call.counterparty_e164 == counterparty)
+        )
+        return await self._keyset_page(db, query, limit, cursor)
+
+    async def search_calls_by_number(
+        self,
+        db: AsyncSession,
+        number: str,
+        match: str = "contains",
+        limit: int = 20
+    ) -> List[Tuple[Call, float]]:
+        """Calls whose caller or callee number contains (or, with match="suffix", ends with) the digits, best first.
+
+        "contains" uses the trigram GIN indexes; "suffix" is a range scan on the
+        reversed-number indexes, written as a range so it stays indexable under
+        prepared statements. Ranking puts numbers ending in the digits first,
+        then trigram similarity, then the newest call. Raises ValueError when
+        fewer than PHONE_SEARCH_MIN_DIGITS digits are given.
+        """
+        digits = re.sub(r"\D", "", number or "")
+        if len(digits) < PHONE_SEARCH_MIN_DIGITS:
+            raise ValueError(f"Enter at least {PHONE_SEARCH_MIN_DIGITS} digits to search")
+        
+        if match == "suffix":
+            low = digits[::-1]
+            high = low[:-1] + chr(ord(low[-1]) + 1)
+            conditions = [
+                and_(func.reverse(column).op("~>=~")(low), func.reverse(column).op("~<~")(high))
+                for column in (Call.caller_number, Call.callee_number)
+            ]
+        else:
+            conditions = [Call.caller_number.like(f"%{digits}%"), Call.callee_number.like(f"%{digits}%")]
+        
+        ends_with = or_(Call.caller_number.like(f"%{digits}"), Call.callee_number.like(f"%{digits}"))
+        rank = (
+            case((ends_with, 1.0), else_=0.0)
+            + func.greatest(func.similarity(Call.caller_number, digits), func.similarity(Call.callee_number, digits))
+        ).label("rank")
+        
+        query = (
+            select(Call, rank)
+            .options(selectinload(Call.agent))
+            .where(or_(*conditions))
+            .order_by(rank.desc(), Call.call_start.desc())
             .limit(limit)
         )
         result = await db.execute(query)
-        calls = result.scalars().all()
-        
-        if calls:
-            serialized_calls = [self._serialize_call(call) for call in calls]
-            await redis_client.setex(cache_key, 120, json.dumps(serialized_calls))
-            
-        return calls
+        return [(call, float(score)) for call, score in result.all()]
+
+    async def apply_webhook_events(self, db: AsyncSession, events: List[dict]) -> int:
+        """Append a batch of Africa's Talking callbacks to call_events and upsert calls.
+
+        The events are inserted into the call_events log, reduced per session
+        with reduce_call_events, and the projections merged into calls with
+        upsert_calls (per-session advisory locks, then one INSERT for new
+        sessions and one batched UPDATE for the rest, merged with
+        merge_projection) in the same transaction. Returns the number of events
+        applied.
+        """
+        call_events = []
+        for event in events:
+            if not event.get("sessionId"):
+                continue
+            received_at = event.get("_received_at")
+            occurred_at = datetime.fromtimestamp(received_at / 1000, tz=timezone.utc) if received_at else datetime.now(tz=timezone.utc)
+            call_events.append(event_from_webhook(event, occurred_at))
+        if not call_events:
+            return 0
+
+        by_session = {}
+        for call_event in call_events:
+            by_session.setdefault(call_event["at_session_id"], []).append(call_event)
+        rows = {session_id: reduce_call_events(session_events) for session_id, session_events in by_session.items()}
+
+        await append_events(db, call_events)
+
+        # Sessions are locked in sorted order so concurrent consumers cannot deadlock
+        call_ids = await upsert_calls(db, [row for _, row in sorted(rows.items())], merge_projection)
+        await db.commit()
+        await self._cache_calls(db, call_ids)
+        return len(call_events)
 
     async def get_call_stats(self, db: AsyncSession, start_date: str = None, end_date: str = None):
         """Get call statistics for the given date range."""
@@ -13,8 +13,10 @@ from models.agent import Agent
 from models.user import User
 from crud.user import UserOut
 from api.redis_client import redis_client
-from schemas.call import DashboardStats, LiveCallResponse, HourlyCallStats
+from schemas.call import DashboardStats, HourlyCallStats
 from schemas.agent import AgentOut
+from api.json_bytes import dumps
+from services.live_calls import live_call_registry
 
 logger = logging.getLogger(__name__)
 
@@ -146,16 +148,8 @@ class DashboardCRUD:
         await redis_client.set(cache_key, json.dumps(dashboard_stats.model_dump()), 30)
         return dashboard_stats
     
-    async def get_live_calls(self, db: AsyncSession, user: 'UserOut', designation: Optional[str] = None) -> List['LiveCallResponse']:
-        """Get live calls with role-based filtering."""
-        cache_key = f"live_calls:{user.id}:{designation or 'all'}"
-        cached_calls = await redis_client.get(cache_key)
-        if cached_calls:
-            logger.info(f"Cache hit for live calls: {cache_key}")
-            return [LiveCallResponse.model_validate_json(call) for call in json.loads(cached_calls)]
-
-        logger.info(f"Cache miss for live calls: {cache_key}, fetching from database")
-
+    async def get_live_calls(self, db: AsyncSession, user: 'UserOut', designation: Optional[str] = None) -> bytes:
+        """Get live calls with role-based filtering, as JSON bytes, from the live call registry"""
         agent_type = None
         if user.role in ["admin", "viewer"]:
             if user.designation == "call-center-admin":
@@ -166,79 +160,10 @@ class DashboardCRUD:
                 agent_type = "compliance-agent"
             elif user.designation is None and user.role != "super-admin":
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin designation")
+        if user.role != "super-admin":
+            designation = None
 
-        if user.role == "viewer":
-            mock_calls = [
-                LiveCallResponse(
-                    id=UUID(int=1),
-                    caller_number="+254712345678",
-                    caller_display_name="Jane Smith",
-                    callee_number="+254723456789",
-                    callee_display_name="John Doe",
-                    status="talking",
-                    direction="inbound",
-                    talk_time="00:02:15",
-                    hold_time="00:00:30",
-                    agent_name="John Doe",
-                    agent_extension="1001",
-                    queue_name="CC1",
-                    call_start=datetime.now(tz=timezone(timedelta(hours=3)))
-                ),
-                LiveCallResponse(
-                    id=UUID(int=2),
-                    caller_number="+254723456789",
-                    caller_display_name="Bob Johnson",
-                    callee_number="+254712345678",
-                    callee_display_name="Alice Brown",
-                    status="ringing",
-                    direction="outbound",
-                    talk_time="00:00:00",
-                    hold_time="00:00:00",
-                    agent_name="Alice Brown",
-                    agent_extension="1002",
-                    queue_name="CC2",
-                    call_start=datetime.now(tz=timezone(timedelta(hours=3)))
-                )
-            ]
-            await redis_client.set(cache_key, json.dumps([call.model_dump_json() for call in mock_calls]), 30)
-            return mock_calls
-
-        query = select(Call, Agent, User).join(
-            Agent, Call.agent_id == Agent.id, isouter=True
-        ).join(
-            User, Agent.user_id == User.id, isouter=True
-        ).filter(
-            Call.status.in_(["ringing", "answered", "talking", "on_hold"])
-        )
-
-        if agent_type:
-            query = query.filter(Agent.agent_type == agent_type)
-        if designation and user.role == "super-admin":
-            query = query.filter(User.designation == designation)
-
-        result = await db.execute(query)
-        calls = result.all()
-
-        live_calls = [
-            LiveCallResponse(
-                id=call[0].id,
-                caller_number=call[0].caller_number,
-                caller_display_name=call[0].caller_display_name,
-                callee_number=call[0].callee_number,
-                callee_display_name=call[0].callee_display_name,
-                status=call[0].status,
-                direction=call[0].direction,
-                talk_time=str(timedelta(seconds=int(call[0].total_duration or 0))),
-                hold_time="00:00:00",  # AT doesn't provide hold time
-                agent_name=f"{call[2].first_name} {call[2].last_name}" if call[2] else None,
-                agent_extension=call[0].agent_extension,
-                queue_name=call[0].queue_name,
-                call_start=call[0].call_start
-            ) for call in calls
-        ]
-
-        await redis_client.set(cache_key, json.dumps([call.model_dump_json() for call in live_calls]), 30)
-        return live_calls
+        return dumps(await live_call_registry.live_calls(agent_type, designation))
     
     async def get_hourly_stats(self, db: AsyncSession, user: 'UserOut', designation: Optional[str] = None) -> List['HourlyCallStats']:
         """Get hourly call statistics with role-based filtering."""
@@ -0,0 +1,197 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, desc
+from typing import List, Optional
+from uuid import UUID
+from datetime import datetime
+import logging
+
+from models.call import Call
+from models.agent import Agent
+from models.user import User
+from models.activity_log import ActivityLog, SECURITY_ACTIVITY_TYPES, SYSTEM_ACTIVITY_TYPES
+from schemas.call import CallFilters
+from schemas.agent import AgentFilters
+from crud.call import (
+    CALL_CACHE_KEY, CALL_CACHE_STAMP_KEY, CALL_COLUMNS, CALL_COLUMN_NAMES,
+    call_crud, write_call_cache, call_filter_conditions, encode_cursor, encode_position, _before_cursor
+)
+from crud.agent import agent_filter_conditions
+from crud.activity_log import activity_filter_conditions
+from core.utils import to_eat_timezone
+from api.redis_client import redis_client
+from api.json_bytes import dumps
+from services.call_archive import call_archive
+
+logger = logging.getLogger(__name__)
+
+# Columns behind AgentOut that exist on agents and users
+AGENT_COLUMNS = (
+    Agent.id, Agent.user_id, User.first_name, User.last_name, User.email,
+    Agent.agent_type, Agent.group, Agent.region, Agent.status, Agent.last_status_change,
+    Agent.is_logged_in, Agent.login_time, Agent.last_activity,
+    Agent.total_calls_today, Agent.answered_calls_today, Agent.missed_calls_today, Agent.total_talk_time_today,
+    Agent.total_calls, Agent.answered_calls, Agent.missed_calls, Agent.total_talk_time, Agent.average_call_duration,
+    Agent.assigned_queues, Agent.skills, Agent.languages, Agent.max_concurrent_calls, Agent.auto_answer,
+    Agent.call_recording_enabled, Agent.department, Agent.supervisor_id, Agent.notes,
+    Agent.created_at, Agent.updated_at, Agent.last_login,
+)
+
+ACTIVITY_LOG_COLUMNS = (
+    ActivityLog.id, ActivityLog.activity_type, ActivityLog.description,
+    ActivityLog.actor_type, ActivityLog.actor_id, ActivityLog.actor_name,
+    ActivityLog.target_type, ActivityLog.target_id, ActivityLog.target_name,
+    ActivityLog.severity, ActivityLog.changes, ActivityLog.context_data,
+    ActivityLog.ip_address, ActivityLog.user_agent, ActivityLog.timestamp,
+    ActivityLog.activity_type.in_(SECURITY_ACTIVITY_TYPES).label("is_security_related"),
+    ActivityLog.activity_type.in_(SYSTEM_ACTIVITY_TYPES).label("is_system_event"),
+)
+
+class ReadModelCRUD:
+    """Read-only listings built from plain column selects.
+
+    Each query names the columns its response needs and returns rows as
+    dicts, ready for api.json_bytes.dumps. Nothing is loaded into the ORM
+    identity map, no relationships are eager-loaded and no pydantic model is
+    built per row, which is most of the cost of the ORM listings at page
+    sizes in the hundreds. The payloads have the same fields as the
+    corresponding response models.
+    """
+
+    async def _call_page(self, db: AsyncSession, query, size: int, cursor: Optional[str]):
+        query = query.where(Call.call_start.isnot(None))
+        if cursor:
+            query = query.where(_before_cursor(cursor))
+        query = query.order_by(Call.call_start.desc(), Call.id.desc()).limit(size + 1)
+        rows = (await db.execute(query)).all()
+        next_cursor = encode_cursor(rows[size - 1]) if len(rows) > size else None
+        return [row._asdict() for row in rows[:size]], next_cursor
+
+    async def _with_archive(self, db: AsyncSession, calls: List[dict], next_cursor: Optional[str], size: int, filters, cursor):
+        """Fill a short last page from archived months, which are all older than Postgres rows"""
+        if next_cursor is not None:
+            return calls, next_cursor
+        after = encode_position(calls[-1]["call_start"], calls[-1]["id"]) if calls else cursor
+        remaining = size - len(calls)
+        archived = await call_archive.read_calls(db, CALL_COLUMN_NAMES, filters, after, remaining + 1)
+        if len(archived) > remaining:
+            calls = calls + archived[:remaining]
+            return calls, encode_position(calls[-1]["call_start"], calls[-1]["id"])
+        return calls + archived, None
+
+    async def calls_page(
+        self,
+        db: AsyncSession,
+        size: int,
+        filters: Optional[CallFilters] = None,
+        cursor: Optional[str] = None,
+        count: str = "none"
+    ) -> dict:
+        """PaginatedCalls payload; raises ValueError for a bad cursor"""
+        conditions = call_filter_conditions(filters)
+        query = select(*CALL_COLUMNS)
+        if conditions:
+            query = query.where(and_(*conditions))
+        calls, next_cursor = await self._call_page(db, query, size, cursor)
+        calls, next_cursor = await self._with_archive(db, calls, next_cursor, size, filters, cursor)
+        # Archived months are not counted
+        total, is_estimate = await call_crud._count_calls(db, conditions, count)
+        return {
+            "calls": calls,
+            "next_cursor": next_cursor,
+            "total": total,
+            "total_is_estimate": is_estimate,
+            "limit": size,
+        }
+
+    async def _cached_calls(self, db: AsyncSession, call_ids: List[UUID]) -> dict:
+        """CallResponse JSON per ID, None for IDs not in Postgres.
+
+        Hits come from one MGET of the call cache keys, which also reads the
+        cache stamp; misses are loaded with one IN query and cached at that
+        stamp, so a write committed after the query is not overwritten.
+        """
+        stamp, *values = await redis_client.mget(
+            [CALL_CACHE_STAMP_KEY] + [CALL_CACHE_KEY.format(call_id) for call_id in call_ids]
+        )
+        found = dict(zip(call_ids, values))
+        misses = [call_id for call_id, value in found.items() if value is None]
+        if misses:
+            rows = (await db.execute(select(*CALL_COLUMNS).where(Call.id.in_(misses)))).all()
+            loaded = {row.id: dumps(row._asdict()).decode() for row in rows}
+            await write_call_cache(loaded, int(stamp or 0))
+            found.update(loaded)
+        return found
+
+    async def call_by_id(self, db: AsyncSession, call_id: UUID) -> Optional[bytes]:
+        """CallResponse payload for one call, or None"""
+        call = (await self._cached_calls(db, [call_id]))[call_id]
+        return call.encode() if call is not None else None
+
+    async def calls_by_ids(self, db: AsyncSession, call_ids: List[UUID]) -> bytes:
+        """CallBatchResponse payload: calls in request order, then IDs with no row.
+
+        Cached entries are spliced into the response as stored, without being
+        parsed. Archived calls are reported as missing.
+        """
+        call_ids = list(dict.fromkeys(call_ids))
+        found = await self._cached_calls(db, call_ids)
+        calls = ",".join(found[call_id] for call_id in call_ids if found[call_id] is not None)
+        missing = [call_id for call_id in call_ids if found[call_id] is None]
+        return b'{"calls":[' + calls.encode() + b'],"missing":' + dumps(missing) + b"}"
+
+    async def agent_calls_page(self, db: AsyncSession, agent_id: UUID, size: int, cursor: Optional[str] = None) -> dict:
+        query = select(*CALL_COLUMNS).where(Call.agent_id == agent_id)
+        calls, next_cursor = await self._call_page(db, query, size, cursor)
+        calls, next_cursor = await self._with_archive(db, calls, next_cursor, size, CallFilters(agent_id=agent_id), cursor)
+        return {"calls": calls, "next_cursor": next_cursor, "agent_id": str(agent_id)}
+
+    async def agents(self, db: AsyncSession, filters: Optional[AgentFilters] = None, limit: int = 100) -> List[dict]:
+        query = select(*AGENT_COLUMNS).outerjoin(User, Agent.user_id == User.id)
+        conditions = agent_filter_conditions(filters)
+        if conditions:
+            query = query.where(and_(*conditions))
+        query = query.order_by(Agent.created_at.desc()).limit(limit)
+        return [row._asdict() for row in (await db.execute(query)).all()]
+
+    async def activity_logs_page(
+        self,
+        db: AsyncSession,
+        page: int,
+        size: int,
+        activity_type: Optional[str] = None,
+        actor_type: Optional[str] = None,
+        actor_id: Optional[UUID] = None,
+        target_type: Optional[str] = None,
+        target_id: Optional[UUID] = None,
+        severity: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> dict:
+        """PaginatedActivityLogs payload, timestamps in EAT like ActivityLogResponse"""
+        conditions = activity_filter_conditions(
+            activity_type, actor_type, actor_id, target_type, target_id, severity, start_date, end_date
+        )
+        query = select(*ACTIVITY_LOG_COLUMNS)
+        count_query = select(func.count(ActivityLog.id))
+        if conditions:
+            query = query.where(and_(*conditions))
+            count_query = count_query.where(and_(*conditions))
+
+        total = (await db.execute(count_query)).scalar()
+        query = query.order_by(desc(ActivityLog.timestamp)).offset((page - 1) * size).limit(size)
+
+        activity_logs = []
+        for row in (await db.execute(query)).all():
+            activity = row._asdict()
+            activity["timestamp"] = to_eat_timezone(activity["timestamp"])
+            activity_logs.append(activity)
+        return {
+            "activity_logs": activity_logs,
+            "total_activity_logs": total,
+            "total_pages": (total + size - 1) // size,
+            "current_page": page,
+            "page_size": size,
+        }
+
+# Global instance
+read_models = ReadModelCRUD()
@@ -1,6 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, text
 import os
 from typing import AsyncGenerator
 
@@ -31,8 +31,13 @@ async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
         # Import all models to ensure they're registered
-        from models import call, agent, lead, user, report, activity_log
+        from models import call, call_event, call_archive, agent, lead, user, report, activity_log
+        # Phone search indexes use trigram operator classes
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
+        # calls is partitioned by month; rows need a partition to land in
+        from services.call_partitions import ensure_call_partitions
+        await ensure_call_partitions(conn)
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency to get database session"""
@@ -22,13 +22,18 @@ import json
 # Load environment variables
 load_dotenv()
 
-from api.routes import calls, agents, leads, dashboard, auth, reporting, users, activity_logs, websocket_route, africastalking_calls, webhooks, call_streaming
+from api.routes import calls, agents, leads, dashboard, auth, reporting, users, activity_logs, websocket_route, sse_route, africastalking_calls, webhooks, call_streaming
 from database import init_db
-from api.websocket import ConnectionManager
+from api.websocket import start_relay, connection_guard
 from api.redis_client import redis_client
+from services.event_stream import event_stream
 from services.activity_worker import start_worker, stop_worker
+from services.webhook_ingest import webhook_ingest
+from services.at_client import at_client
+from services.call_dispatcher import call_dispatcher
 from middleware.activity_context import ActivityContextMiddleware
 from tasks.cleanup_tasks import cleanup_tasks
+from core.config import settings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,9 +41,6 @@ logger = logging.getLogger(__name__)
 
 async_session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
-# WebSocket connection manager
-manager = ConnectionManager()
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
@@ -53,8 +55,55 @@ async def lifespan(app: FastAPI):
     worker_task = asyncio.create_task(start_worker())
     logger.info("Activity log worker started")
     
+    # Start cross-worker WebSocket relay and heartbeat
+    relay_task = asyncio.create_task(start_relay())
+    heartbeat_task = asyncio.create_task(connection_guard.start())
+    
+    # Start webhook ingest consumers
+    ingest_task = asyncio.create_task(webhook_ingest.start())
+    
+    # Start outbound call dispatch workers
+    call_dispatcher.start()
+    
+    # Start the hourly stats and cleanup schedulers
+    app.state.db = async_session
+    setup_hourly_stats_scheduler(app)
+    app.state.cleanup_scheduler = setup_cleanup_scheduler()
+    logger.info("Schedulers started")
+    
     yield
     
+    app.state.scheduler.shutdown(wait=False)
+    app.state.cleanup_scheduler.shutdown(wait=False)
+    logger.info("Schedulers stopped")
+    
+    await call_dispatcher.stop()
+    
+    await webhook_ingest.stop()
+    ingest_task.cancel()
+    try:
+        await ingest_task
+    except asyncio.CancelledError:
+        pass
+    
+    await connection_guard.stop()
+    heartbeat_task.cancel()
+    try:
+        await heartbeat_task
+    except asyncio.CancelledError:
+        pass
+    logger.info("WebSocket heartbeat stopped")
+    
+    relay_task.cancel()
+    try:
+        await relay_task
+    except asyncio.CancelledError:
+        pass
+    logger.info("WebSocket relay stopped")
+    
+    await at_client.close()
+    logger.info("Africa's Talking client closed")
+    
     # Shutdown
     await stop_worker()
     worker_task.cancel()
@@ -66,6 +115,7 @@ async def lifespan(app: FastAPI):
     
     await redis_client.disconnect()
     logger.info("Redis connection closed")
+    await engine.dispose()
     logger.info("Shutting down Call Center API...")
 
 app = FastAPI(
@@ -97,6 +147,7 @@ app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"]
 app.include_router(activity_logs.router, prefix="/api/activity-logs", tags=["ActivityLogs"])
 app.include_router(reporting.router, prefix="/api/reporting", tags=["Reporting"])
 app.include_router(websocket_route.router, prefix="/api/ws", tags=["WebSockets"])
+app.include_router(sse_route.router, prefix="/api/sse", tags=["Server-Sent Events"])
 app.include_router(africastalking_calls.router, prefix="/api", tags=["Africa's Talking"])
 app.include_router(call_streaming.router, prefix="/api", tags=["Call Streaming"])
 app.include_router(webhooks.router, prefix="/api/webhooks", tags=["Webhooks"])
@@ -136,13 +187,13 @@ def setup_hourly_stats_scheduler(app: FastAPI):
                                 "data": [stat.model_dump() for stat in stats]
                             }
                             channel = f"hourly_stats:{user.id}:{designation or 'all'}"
-                            await redis_client.publish(channel, json.dumps(message))
+                            await event_stream.publish(channel, json.dumps(message))
                             logger.info(f"Published hourly stats to {channel}")
             except Exception as e:
                 logger.error(f"Error publishing hourly stats: {str(e)}")
 
     scheduler.add_job(
-        lambda: asyncio.create_task(publish_hourly_stats()),
+        publish_hourly_stats,
         "interval",
         hours=1,
         next_run_time=datetime.now(tz=scheduler.timezone) + timedelta(minutes=1),
@@ -156,15 +207,46 @@ def setup_cleanup_scheduler():
     
     # Daily cleanup at 2 AM
     scheduler.add_job(
-        lambda: asyncio.create_task(cleanup_tasks.cleanup_old_activity_logs()),
+        cleanup_tasks.cleanup_old_activity_logs,
         "cron",
         hour=2,
         minute=0
     )
     
+    # Check that next months' calls partitions exist, at startup and daily at 1 AM
+    scheduler.add_job(
+        cleanup_tasks.ensure_call_partitions,
+        "cron",
+        hour=1,
+        minute=0,
+        next_run_time=datetime.now(tz=scheduler.timezone)
+    )
+    
+    # Calls left dispatching by a restart, checked at startup and every minute
+    scheduler.add_job(
+        cleanup_tasks.sweep_stale_dispatches,
+        "interval",
+        seconds=60,
+        next_run_time=datetime.now(tz=scheduler.timezone)
+    )
+    
+    # Live call registry: sweep stale entries and reconcile with Postgres,
+    # starting with a reconcile so a flushed Redis is refilled at startup
+    scheduler.add_job(
+        cleanup_tasks.sweep_live_calls,
+        "interval",
+        seconds=settings.LIVE_CALL_SWEEP_SECONDS
+    )
+    scheduler.add_job(
+        cleanup_tasks.reconcile_live_calls,
+        "interval",
+        seconds=settings.LIVE_CALL_RECONCILE_SECONDS,
+        next_run_time=datetime.now(tz=scheduler.timezone)
+    )
+    
     # Weekly database optimization on Sunday at 3 AM
     scheduler.add_job(
-        lambda: asyncio.create_task(cleanup_tasks.optimize_database()),
+        cleanup_tasks.optimize_database,
         "cron",
         day_of_week=6,  # Sunday
         hour=3,
@@ -174,24 +256,15 @@ def setup_cleanup_scheduler():
     scheduler.start()
     return scheduler
 
-@app.on_event("startup")
-async def startup_event():
-    app.state.db = async_session
-    setup_hourly_stats_scheduler(app)
-    app.state.cleanup_scheduler = setup_cleanup_scheduler()
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    await engine.dispose()
-    app.state.scheduler.shutdown(wait=False)
-    if hasattr(app.state, 'cleanup_scheduler'):
-        app.state.cleanup_scheduler.shutdown(wait=False)
-
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        ws="websockets",
+        ws_per_message_deflate=True,
+        ws_ping_interval=20.0,
+        ws_ping_timeout=20.0
     )
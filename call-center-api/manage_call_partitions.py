@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""List, create and detach the monthly partitions of calls.
+
+    python manage_call_partitions.py list
+    python manage_call_partitions.py ensure --months-ahead 6
+    python manage_call_partitions.py detach 2025-01
+
+A detached month stays in the database as a standalone table
+(calls_y2025m01). It no longer appears in calls queries and can be archived
+or dropped on its own. Use list to check that calls_default is empty. A row
+there means some call_start fell outside every month partition, and that
+month must be created before new rows arrive for it.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import engine
+from services.call_partitions import detach_call_partition, ensure_call_partitions, list_call_partitions
+
+def parse_month(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m").replace(tzinfo=timezone.utc)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show partitions with estimated rows and size")
+    ensure = commands.add_parser("ensure", help="create missing month partitions")
+    ensure.add_argument("--months-ahead", type=int, default=None)
+    ensure.add_argument("--since", type=parse_month, default=None, help="first month to create, YYYY-MM")
+    detach = commands.add_parser("detach", help="detach one month from calls")
+    detach.add_argument("month", type=parse_month, help="YYYY-MM")
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        if args.command == "list":
+            for partition in await list_call_partitions(conn):
+                print(
+                    f"{partition['name']:<20}{partition['estimated_rows']:>12} rows"
+                    f"{partition['total_bytes'] / 1024 / 1024:>10.1f} MiB  {partition['bounds']}"
+                )
+        elif args.command == "ensure":
+            kwargs = {"since": args.since}
+            if args.months_ahead is not None:
+                kwargs["months_ahead"] = args.months_ahead
+            created = await ensure_call_partitions(conn, **kwargs)
+            print(f"Created: {', '.join(created)}" if created else "All partitions exist")
+        else:
+            print(f"Detached {await detach_call_partition(conn, args.month)}")
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,6 +4,19 @@ from sqlalchemy.sql import func
 import uuid
 from database import Base
 
+SECURITY_ACTIVITY_TYPES = [
+    "security_login_attempt",
+    "security_login_failure",
+    "security_password_change"
+]
+
+SYSTEM_ACTIVITY_TYPES = [
+    "system_startup",
+    "system_shutdown",
+    "system_error",
+    "system_warning"
+]
+
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
 
@@ -43,18 +56,9 @@ class ActivityLog(Base):
     @property
     def is_security_related(self) -> bool:
         """Check if this activity is security-related"""
-        return self.activity_type in [
-            "security_login_attempt",
-            "security_login_failure",
-            "security_password_change"
-        ]
+        return self.activity_type in SECURITY_ACTIVITY_TYPES
     
     @property
     def is_system_event(self) -> bool:
         """Check if this activity is a system event"""
-        return self.activity_type in [
-            "system_startup",
-            "system_shutdown",
-            "system_error",
-            "system_warning"
-        ]
\ No newline at end of file
+        return self.activity_type in SYSTEM_ACTIVITY_TYPES
\ No newline at end of file
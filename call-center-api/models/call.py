@@ -1,31 +1,39 @@
-from sqlalchemy import Column, String, DateTime, Integer, Boolean, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Integer, Boolean, Text, ForeignKey, Index, text, event
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 from database import Base
+from utils.phone import counterparty_e164
 
 class Call(Base):
     __tablename__ = "calls"
 
+    # The primary key includes call_start because calls is partitioned by it
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
     # Africa's Talking Call Information
-    at_session_id = Column(String, unique=True, index=True)  # AT session ID
-    at_call_id = Column(String, index=True)  # AT call ID
+    # Not unique at the database level: a unique index on a partitioned table
+    # must include call_start. Writers serialize per session with
+    # services.call_state.lock_sessions instead.
+    at_session_id = Column(String, index=True)  # AT session ID
+    at_call_id = Column(String)  # AT call ID
     
     # Call Details
-    caller_number = Column(String, nullable=False, index=True)
-    callee_number = Column(String, nullable=False, index=True)
+    caller_number = Column(String, nullable=False)
+    callee_number = Column(String, nullable=False)
+    
+    # Customer's number in E.164, whichever side of the call it is on
+    counterparty_e164 = Column(String)
     
     # Status
     status = Column(String, default="queued", index=True)
     
     # Direction
-    direction = Column(String, default="outbound", index=True)
+    direction = Column(String, default="outbound")
     
     # Timing
-    call_start = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    call_start = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
     call_answered = Column(DateTime(timezone=True))
     call_end = Column(DateTime(timezone=True))
     
@@ -33,7 +41,7 @@ class Call(Base):
     total_duration = Column(Integer, default=0)
     
     # Agent Information
-    agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id"), index=True)
+    agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id"))
     
     # Additional Data
     description = Column(Text)
@@ -49,6 +57,24 @@ class Call(Base):
     agent = relationship("Agent", back_populates="calls", foreign_keys=[agent_id])
     lead = relationship("Lead", back_populates="calls", foreign_keys=[lead_id])
     
+    # Keyset pagination walks (call_start, id) newest first, optionally within
+    # one agent or number; these also serve plain lookups on the leading column.
+    # Monthly partitions on call_start are created by services.call_partitions,
+    # and every index here is built per partition.
+    __table_args__ = (
+        Index("ix_calls_call_start_id", "call_start", "id"),
+        Index("ix_calls_agent_call_start_id", "agent_id", "call_start", "id"),
+        Index("ix_calls_caller_call_start_id", "caller_number", "call_start", "id"),
+        Index("ix_calls_callee_call_start_id", "callee_number", "call_start", "id"),
+        Index("ix_calls_counterparty_call_start_id", "counterparty_e164", "call_start", "id"),
+        # Phone search: trigram GIN for "contains", reversed text for "ends with"
+        Index("ix_calls_caller_number_trgm", "caller_number", postgresql_using="gin", postgresql_ops={"caller_number": "gin_trgm_ops"}),
+        Index("ix_calls_callee_number_trgm", "callee_number", postgresql_using="gin", postgresql_ops={"callee_number": "gin_trgm_ops"}),
+        Index("ix_calls_caller_number_reverse", text("reverse(caller_number) text_pattern_ops")),
+        Index("ix_calls_callee_number_reverse", text("reverse(callee_number) text_pattern_ops")),
+        {"postgresql_partition_by": "RANGE (call_start)"},
+    )
+    
     def __repr__(self):
         return f"<Call(id={self.id}, caller={self.caller_number}, status={self.status})>"
     
@@ -65,3 +91,9 @@ class Call(Base):
         minutes = self.total_duration // 60
         seconds = self.total_duration % 60
         return f"{minutes:02d}:{seconds:02d}"
+
+@event.listens_for(Call, "before_insert")
+@event.listens_for(Call, "before_update")
+def _set_counterparty(mapper, connection, target):
+    """Keep counterparty_e164 in step with ORM writes; bulk upserts set it themselves"""
+    target.counterparty_e164 = counterparty_e164(target.caller_number, target.callee_number, target.direction)
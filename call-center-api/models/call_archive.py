@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime, BigInteger
+from sqlalchemy.sql import func
+from database import Base
+
+class CallArchiveMonth(Base):
+    """One month of calls moved out of Postgres into a Parquet file"""
+    __tablename__ = "call_archive_months"
+
+    # First instant of the UTC month
+    month = Column(DateTime(timezone=True), primary_key=True)
+    
+    # Where the file lives, relative to CALL_ARCHIVE_URI
+    path = Column(String, nullable=False)
+    
+    # Contents
+    row_count = Column(BigInteger, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    postgres_bytes = Column(BigInteger)
+    
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<CallArchiveMonth(month={self.month:%Y-%m}, rows={self.row_count})>"
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, DateTime, BigInteger, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from database import Base
+
+class CallEvent(Base):
+    """Append-only log of call state changes; calls rows are a projection of it"""
+    __tablename__ = "call_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    
+    # Call Information
+    at_session_id = Column(String, nullable=False)
+    state = Column(String, nullable=False)
+    
+    # Timing
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    
+    # Origin and raw payload
+    source = Column(String, default="webhook")
+    payload = Column(JSONB)
+    
+    __table_args__ = (
+        Index("ix_call_events_session_occurred", "at_session_id", "occurred_at", "id"),
+    )
+    
+    def __repr__(self):
+        return f"<CallEvent(session={self.at_session_id}, state={self.state}, at={self.occurred_at})>"
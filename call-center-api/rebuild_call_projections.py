@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Rebuild calls rows from the call_events log.
+
+Replays every event (or only the given sessions) through the call state
+reducer and writes status, timings and duration onto the matching calls
+rows, keeping the row's values where the events have none and the earlier
+start time. Use after fixing a reducer bug or to backfill rows lost from calls.
+
+    python rebuild_call_projections.py
+    python rebuild_call_projections.py --session ATVId_123 --session ATVId_456
+"""
+
+import argparse
+import asyncio
+
+from services.call_state import rebuild_projections
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--session", action="append", dest="sessions", help="only rebuild this at_session_id (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    rebuilt = await rebuild_projections(args.sessions, batch_size=args.batch_size)
+    print(f"Rebuilt {rebuilt} call projections")
+
+if __name__ == "__main__":
+    asyncio.run(main())
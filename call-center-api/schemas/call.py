@@ -42,10 +42,30 @@ class CallResponse(CallBase):
 
 class PaginatedCalls(BaseModel):
     calls: List[CallResponse]
-    total: int
-    skip: int
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_estimate: bool = False
     limit: int
 
+class CallBatchRequest(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, max_length=500)
+
+class CallBatchResponse(BaseModel):
+    calls: List[CallResponse]
+    missing: List[UUID]
+
+class CallStatusBatchUpdate(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, max_length=500)
+    status: str
+
+class CallStatusBatchResponse(CallBatchResponse):
+    # Calls left as they were because the status would have moved them back
+    unchanged: List[UUID]
+
+class CallSearchResult(BaseModel):
+    call: CallResponse
+    rank: float
+
 class CallFilters(BaseModel):
     status: Optional[str] = None
     direction: Optional[str] = None
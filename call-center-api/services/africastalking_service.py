@@ -1,21 +1,25 @@
+import logging
 import os
 import random
 import time
-import requests
-import africastalking
 from typing import Dict, Any, List
 
-# Global call mapping storage
-call_mappings = {}
+from services.at_client import at_client, ProviderError
+from services.call_routing import call_routing
+from services.caller_id_pool import CallerIdPool
+from services.capability_token_cache import capability_token_cache
+from core.config import settings
+from utils.phone import to_e164
+
+logger = logging.getLogger(__name__)
 
 class AfricasTalkingService:
     def __init__(self):
         username = os.getenv("AT_USERNAME")
         api_key = os.getenv("AT_API_KEY")
         
-        # Parse phone numbers from environment first
-        phone_numbers_str = os.getenv("AT_PHONE_NUMBERS", "")
-        self.phone_numbers = [num.strip() for num in phone_numbers_str.split(",") if num.strip()]
+        # Phone numbers from environment first
+        self.phone_numbers = list(settings.AT_PHONE_NUMBERS)
         
         if not self.phone_numbers:
             # Fallback to a default number if none configured
@@ -23,10 +27,13 @@ class AfricasTalkingService:
             
         print(f"DEBUG: Initialized with phone numbers: {self.phone_numbers}")
         
+        # Outbound calls take their caller ID from the shared load-aware pool
+        self.caller_id_pool = CallerIdPool(self.phone_numbers)
+        
         # Handle case where credentials are not set
         if not username or not api_key:
             print("WARNING: Africa's Talking credentials not configured. Running in mock mode.")
-            self.voice = None
+            self.enabled = False
             self.is_sandbox = True
             self.username = None
             self.api_key = None
@@ -36,17 +43,10 @@ class AfricasTalkingService:
         # Some production keys may start with 'atsk_' but are still production keys
         self.is_sandbox = os.getenv("AT_SANDBOX", "False").lower() == "true"
         
-        try:
-            africastalking.initialize(username, api_key)
-            self.voice = africastalking.Voice
-            self.username = username
-            self.api_key = api_key
-        except Exception as e:
-            print(f"ERROR: Failed to initialize Africa's Talking: {str(e)}")
-            print("WARNING: Running in mock mode due to credential error.")
-            self.voice = None
-            self.username = None
-            self.api_key = None
+        # Requests go through the shared async client in services.at_client
+        self.enabled = True
+        self.username = username
+        self.api_key = api_key
     
     def get_available_number(self) -> str:
         """Get an available phone number using round-robin selection"""
@@ -56,36 +56,37 @@ class AfricasTalkingService:
         # Simple random selection - you could implement more sophisticated logic
         return random.choice(self.phone_numbers)
     
-    def get_capability_token(self, client_name: str, phone_number: str = None) -> Dict[str, Any]:
-        """Get WebRTC capability token for making calls"""
+    async def get_capability_token(self, client_name: str, phone_number: str = None) -> Dict[str, Any]:
+        """Get WebRTC capability token for making calls, reusing a cached one while it is valid"""
+        if not self.username or not self.api_key:
+            return {
+                "success": False,
+                "error": "Africa's Talking credentials not configured",
+                "message": "Missing username or API key"
+            }
+        
+        return await capability_token_cache.get(
+            client_name,
+            phone_number,
+            lambda: self._request_capability_token(client_name, phone_number)
+        )
+    
+    async def prefetch_capability_token(self, client_name: str) -> None:
+        """Warm the token cache so the agent's first click-to-call does not wait on the token service"""
+        result = await self.get_capability_token(client_name)
+        if not result.get("success"):
+            logger.warning(f"Capability token prefetch failed for {client_name}: {result.get('error')}")
+    
+    async def _request_capability_token(self, client_name: str, phone_number: str = None) -> Dict[str, Any]:
+        """Request a new WebRTC capability token from Africa's Talking"""
         try:
-            if not self.username or not self.api_key:
-                return {
-                    "success": False,
-                    "error": "Africa's Talking credentials not configured",
-                    "message": "Missing username or API key"
-                }
-            
             # Use provided number or auto-select one
             if not phone_number:
                 phone_number = self.get_available_number()
             
-            url = "https://webrtc.africastalking.com/capability-token/request"
-            
-            headers = {
-                'Content-Type': 'application/json',
-                'apiKey': self.api_key,
-            }
-            
-            data = {
-                'username': self.username,
-                'clientName': client_name,
-                'phoneNumber': phone_number,
-            }
-            
             print(f"DEBUG: Requesting capability token for {client_name} with number {phone_number}")
             
-            response = requests.post(url, json=data, headers=headers)
+            response = await at_client.capability_token(self.username, self.api_key, client_name, phone_number)
             
             if response.status_code in [200, 201]:  # Accept both 200 and 201 as success
                 response_data = response.json()
@@ -122,11 +123,11 @@ class AfricasTalkingService:
                 "message": f"Failed to get capability token: {str(e)}"
             }
     
-    def make_webrtc_call(self, to: str, client_name: str, from_: str = None) -> Dict[str, Any]:
+    async def make_webrtc_call(self, to: str, client_name: str, from_: str = None) -> Dict[str, Any]:
         """Make a WebRTC call using capability token approach - NO Voice API calls"""
         try:
             # Get capability token first
-            token_result = self.get_capability_token(client_name, from_)
+            token_result = await self.get_capability_token(client_name, from_)
             
             if not token_result.get("success"):
                 return token_result
@@ -168,38 +169,16 @@ class AfricasTalkingService:
         return random.choice(self.phone_numbers)
     
     def format_phone_number(self, phone: str) -> str:
-        """Format phone number to international format for AT"""
-        if not phone:
-            return phone
-            
-        # Remove spaces and special characters
-        phone = phone.replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
-        
-        # Convert Kenyan local format to international
-        if phone.startswith("07") or phone.startswith("01"):
-            phone = "+254" + phone[1:]  # 0712345678 -> +254712345678
-        elif phone.startswith("7") and len(phone) == 9:
-            phone = "+254" + phone      # 712345678 -> +254712345678
-        elif phone.startswith("1") and len(phone) == 9:
-            phone = "+254" + phone      # 112345678 -> +254112345678
-        elif phone.startswith("254") and not phone.startswith("+"):
-            phone = "+" + phone         # 254712345678 -> +254712345678
-        elif phone.startswith("+254"):
-            pass                        # Already correct format
-        else:
-            # If none of the above, assume it needs +254 prefix
-            if len(phone) >= 9:
-                phone = "+254" + phone.lstrip("0")
-            
-        return phone
-
-    def make_call(self, to: str, from_: str = None, record: bool = True, callback_url: str = None, client_name: str = "default_client") -> Dict[str, Any]:
+        """Format phone number to international format for AT; client names are passed through"""
+        return to_e164(phone) or phone
+    
+    async def make_call(self, to: str, from_: str = None, record: bool = True, callback_url: str = None, client_name: str = "default_client") -> Dict[str, Any]:
         """Make a voice call - using silica's direct approach"""
         try:
             print(f"DEBUG: Making direct Voice API call to {to}")
             
             # Use direct Voice API like silica does
-            return self._make_direct_call(to, from_, record, callback_url)
+            return await self._make_direct_call(to, from_, record, callback_url)
             
         except Exception as e:
             print(f"DEBUG: Call error: {str(e)}")
@@ -209,7 +188,7 @@ class AfricasTalkingService:
                 "message": f"Failed to initiate call: {str(e)}"
             }
     
-    def _make_direct_call(self, to: str, from_: str = None, record: bool = True, callback_url: str = None) -> Dict[str, Any]:
+    async def _make_direct_call(self, to: str, from_: str = None, record: bool = True, callback_url: str = None) -> Dict[str, Any]:
         """Webhook-based Voice API call - make call to trigger webhook that routes to target (like Laravel project)"""
         try:
             print(f"DEBUG: Making webhook-based call to trigger routing")
@@ -218,12 +197,40 @@ class AfricasTalkingService:
             target_number = self.format_phone_number(to)
             print(f"DEBUG: Target number: {target_number}")
             
-            # Use AT phone number as caller
-            caller_number = self.format_phone_number(from_) if from_ else self.get_available_number()
+            # Use AT phone number as caller, reserving a slot on the least-loaded one
+            slot = None
+            if from_:
+                caller_number = self.format_phone_number(from_)
+            else:
+                try:
+                    slot = await self.caller_id_pool.acquire()
+                except Exception as e:
+                    # Without Redis the pool cannot count load; place the call untracked
+                    logger.warning(f"Caller ID pool unavailable, picking at random: {str(e)}")
+                    slot = (self.get_available_number(), None)
+                if not slot:
+                    return {
+                        "success": False,
+                        "error": "All caller IDs are at capacity",
+                        "retryable": True,
+                        "message": "No caller ID is under its concurrency and calls-per-second limits, retry shortly"
+                    }
+                caller_number = slot[0]
+                if not slot[1]:
+                    slot = None
             print(f"DEBUG: Caller number: {caller_number}")
-            
-            if not self.voice:
-                return {
+        except Exception as e:
+            logger.error(f"Webhook call error: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "message": f"Failed to make webhook call: {str(e)}"
+            }
+        
+        placed = False
+        try:
+            if not self.enabled:
+                result = {
                     "success": True, 
                     "data": {
                         "entries": [{"sessionId": f"mock_{int(time.time())}", "status": "Queued"}]
@@ -231,43 +238,73 @@ class AfricasTalkingService:
                     "from_number": caller_number,
                     "to_number": target_number
                 }
+                placed = True
+                await self._bind_caller_id(result, slot)
+                await call_routing.record(result)
+                return result
             
             # Make call TO the AT number itself, which will trigger webhook to route to target
             # This creates a callback that gets handled by our webhook to route to the actual target
-            response = self.voice.call(
-                callFrom=caller_number,
-                callTo=[caller_number]  # Call the same number to trigger webhook routing
-            )
-            
-            # Store mapping with session ID for webhook routing
-            if response.get('entries') and len(response['entries']) > 0:
-                session_id = response['entries'][0].get('sessionId')
-                if session_id:
-                    call_mappings[session_id] = target_number
-                    print(f"DEBUG: Stored mapping {session_id} -> {target_number}")
-            
-            print(f"DEBUG: AT API Webhook Call Response: {response}")
+            async with call_routing.dispatching():
+                response = await at_client.voice_call(
+                    self.username,
+                    self.api_key,
+                    from_=caller_number,
+                    to=caller_number  # Call the same number to trigger webhook routing
+                )
+                
+                print(f"DEBUG: AT API Webhook Call Response: {response}")
+                
+                result = {
+                    "success": True, 
+                    "data": response,
+                    "from_number": caller_number,
+                    "to_number": target_number
+                }
+                placed = True
+                await self._bind_caller_id(result, slot)
+                # Store the route before returning so the first webhook can always find it
+                await call_routing.record(result)
+            return result
             
+        except ProviderError as e:
+            logger.error(f"Webhook call provider error: {str(e)} {e.body}")
             return {
-                "success": True, 
-                "data": response,
-                "from_number": caller_number,
-                "to_number": target_number
+                "success": False,
+                "error": str(e),
+                "message": e.body or f"Failed to make webhook call: {str(e)}"
             }
-            
         except Exception as e:
-            print(f"DEBUG: Webhook call error: {str(e)}")
+            logger.error(f"Webhook call error: {str(e)}")
             return {
                 "success": False,
                 "error": str(e),
                 "message": f"Failed to make webhook call: {str(e)}"
             }
+        finally:
+            if slot and not placed:
+                await self.caller_id_pool.release_reservation(*slot)
+    
+    async def _bind_caller_id(self, result: Dict[str, Any], slot) -> None:
+        """Tie the reserved caller-ID slot to the provider session so its terminal callback frees it"""
+        if not slot:
+            return
+        try:
+            entries = result["data"].get("entries") or []
+            session_id = entries[0].get("sessionId") if entries else None
+            if session_id:
+                await self.caller_id_pool.bind(session_id, *slot)
+            else:
+                # Nothing will call back for this attempt
+                await self.caller_id_pool.release_reservation(*slot)
+        except Exception as e:
+            logger.error(f"Failed to bind caller ID {slot[0]}: {str(e)}")
     
-    def get_call_status(self, session_id: str) -> Dict[str, Any]:
+    async def get_call_status(self, session_id: str) -> Dict[str, Any]:
         """Get call status by session ID"""
         try:
             # Check if voice service is not initialized (credentials) or if explicitly in sandbox mode
-            if not self.voice:
+            if not self.enabled:
                 # Return mock response for credential issues
                 return {
                     "success": True,
@@ -290,10 +327,7 @@ class AfricasTalkingService:
                     }
                 }
             
-            response = self.voice.fetch_queued_calls(
-                phone_number=None,
-                queue_name=session_id
-            )
+            response = await at_client.queue_status(self.username, self.api_key, session_id)
             return {"success": True, "data": response}
         except Exception as e:
             return {
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import random
+from typing import Any, Dict, Optional
+
+import httpx
+
+from core.config import settings
+
+try:
+    import h2  # noqa: F401  HTTP/2 is used when the h2 extra is installed
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: the provider is throttling or briefly unavailable
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+class ProviderError(Exception):
+    """Africa's Talking request failed after retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, body: str = ""):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+class AfricasTalkingClient:
+    """Async Africa's Talking HTTP client on one pooled httpx.AsyncClient per worker.
+
+    Keep-alive connections are reused across requests (HTTP/2 when h2 is
+    installed), every request has connect/read timeouts, in-flight requests are
+    bounded by a semaphore, and failures are retried with exponential backoff
+    and full jitter. Requests that place calls are not idempotent, so they are
+    only retried when the request never reached the provider (connect errors,
+    pool timeouts) or the provider explicitly asked us to back off.
+    """
+
+    def __init__(
+        self,
+        voice_url: str = settings.AT_VOICE_URL,
+        webrtc_url: str = settings.AT_WEBRTC_URL,
+        max_concurrency: int = settings.AT_MAX_CONCURRENCY,
+        max_retries: int = settings.AT_MAX_RETRIES
+    ):
+        self.voice_url = voice_url.rstrip("/")
+        self.webrtc_url = webrtc_url.rstrip("/")
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(settings.AT_HTTP_TIMEOUT_SECONDS, connect=settings.AT_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.AT_MAX_CONCURRENCY,
+                    max_keepalive_connections=settings.AT_MAX_CONCURRENCY,
+                    keepalive_expiry=60
+                ),
+                headers={"Accept": "application/json"}
+            )
+        return self._client
+
+    async def _backoff(self, attempt: int) -> None:
+        await asyncio.sleep(random.uniform(0, settings.AT_RETRY_BASE_DELAY_SECONDS * (2 ** attempt)))
+
+    async def request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                async with self._semaphore:
+                    response = await self.client.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # Never reached the provider; safe to retry any request
+                if last_attempt:
+                    raise ProviderError(f"{method} {url} failed: {e.__class__.__name__}") from e
+            except httpx.TransportError as e:
+                if not idempotent or last_attempt:
+                    raise ProviderError(f"{method} {url} failed: {e.__class__.__name__}") from e
+            else:
+                retryable = response.status_code == 429 or (idempotent and response.status_code in RETRYABLE_STATUSES)
+                if not retryable or last_attempt:
+                    return response
+            logger.warning(f"Retrying {method} {url} (attempt {attempt + 1}/{self.max_retries})")
+            await self._backoff(attempt)
+
+    async def voice_call(self, username: str, api_key: str, from_: str, to: str) -> Dict[str, Any]:
+        """POST /call on the Voice API; returns the provider's JSON (entries, errorMessage)"""
+        response = await self.request(
+            "POST",
+            f"{self.voice_url}/call",
+            idempotent=False,
+            headers={"apiKey": api_key},
+            data={"username": username, "from": from_, "to": to}
+        )
+        if response.status_code not in (200, 201):
+            raise ProviderError(f"HTTP {response.status_code}", response.status_code, response.text)
+        return response.json()
+
+    async def queue_status(self, username: str, api_key: str, phone_numbers: str) -> Dict[str, Any]:
+        """POST /queueStatus on the Voice API"""
+        response = await self.request(
+            "POST",
+            f"{self.voice_url}/queueStatus",
+            headers={"apiKey": api_key},
+            data={"username": username, "phoneNumbers": phone_numbers}
+        )
+        if response.status_code not in (200, 201):
+            raise ProviderError(f"HTTP {response.status_code}", response.status_code, response.text)
+        return response.json()
+
+    async def capability_token(self, username: str, api_key: str, client_name: str, phone_number: str) -> httpx.Response:
+        """Request a WebRTC capability token; the caller interprets the response"""
+        return await self.request(
+            "POST",
+            f"{self.webrtc_url}/capability-token/request",
+            headers={"apiKey": api_key},
+            json={"username": username, "clientName": client_name, "phoneNumber": phone_number}
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+# Global instance
+at_client = AfricasTalkingClient()
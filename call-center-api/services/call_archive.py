@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy import DateTime, Integer, and_, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from crud.call import decode_cursor
+from database import engine
+from models.call import Call
+from models.call_archive import CallArchiveMonth
+from schemas.call import CallFilters
+from services.call_partitions import add_months, detach_call_partition, month_start, partition_name
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+except ImportError:  # without pyarrow nothing can be archived, and reading archived months raises
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FILE = "month={:%Y-%m}/calls.parquet"
+
+def _arrow_type(column):
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    return pa.string()
+
+def _utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+class CallArchive:
+    """Months of old calls kept as zstd Parquet files instead of Postgres rows.
+
+    Each file holds one UTC month, sorted newest first like the listings. Its
+    row groups carry call_start statistics, so range and cursor filters skip
+    most of a file. call_archive_months records which months are archived;
+    a month counts as archived once its row is committed, in the same
+    transaction that drops its Postgres partition.
+
+    Months are archived oldest first, so every archived call is older than
+    every call still in Postgres. That lets readers continue a
+    (call_start, id) walk from Postgres into the archive with the same cursor.
+    """
+
+    def __init__(self, uri: str = settings.CALL_ARCHIVE_URI, batch_size: int = settings.CALL_ARCHIVE_BATCH_SIZE):
+        self.uri = uri
+        self.batch_size = batch_size
+        self._filesystem = None
+
+    @property
+    def enabled(self) -> bool:
+        return pa is not None
+
+    def _fs(self):
+        """(filesystem, root path) for CALL_ARCHIVE_URI"""
+        if self._filesystem is None:
+            if "://" in self.uri:
+                self._filesystem = pafs.FileSystem.from_uri(self.uri)
+            else:
+                self._filesystem = (pafs.LocalFileSystem(), os.path.abspath(self.uri))
+        return self._filesystem
+
+    def _path(self, relative: str) -> str:
+        return f"{self._fs()[1].rstrip('/')}/{relative}"
+
+    def schema(self):
+        return pa.schema([(column.key, _arrow_type(column)) for column in Call.__table__.columns])
+
+    async def archived_months(self, db: AsyncSession) -> List[CallArchiveMonth]:
+        """Archived months, newest first"""
+        result = await db.execute(select(CallArchiveMonth).order_by(CallArchiveMonth.month.desc()))
+        return list(result.scalars().all())
+
+    async def archive_month(self, month: datetime) -> dict:
+        """Copy one month of calls to Parquet, record it, then drop it from Postgres.
+
+        Raises ValueError if the month is not in the past, is already archived,
+        or is newer than calls that are still in Postgres.
+        """
+        if not self.enabled:
+            raise RuntimeError("pyarrow is required to archive calls")
+        month = month_start(month)
+        end = add_months(month, 1)
+        if end > month_start(datetime.now(tz=timezone.utc)):
+            raise ValueError("Only months before the current one can be archived")
+
+        table = Call.__table__
+        in_month = and_(table.c.call_start >= month, table.c.call_start < end)
+        partition = partition_name(month)
+        async with engine.connect() as conn:
+            if await conn.scalar(select(CallArchiveMonth.month).where(CallArchiveMonth.month == month)):
+                raise ValueError(f"{month:%Y-%m} is already archived")
+            if await conn.scalar(select(table.c.id).where(table.c.call_start < month).limit(1)):
+                raise ValueError(f"Archive the months before {month:%Y-%m} first")
+            postgres_bytes = await conn.scalar(text(
+                "SELECT pg_total_relation_size(to_regclass(:name))"
+            ), {"name": partition})
+
+        relative = ARCHIVE_FILE.format(month)
+        rows = await self._write_month(in_month, relative)
+        filesystem, _ = self._fs()
+
+        async with engine.begin() as conn:
+            has_partition = await conn.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": partition})
+            # Late writes would be lost; compare under a lock that blocks them
+            await conn.execute(text(f"LOCK TABLE {partition if has_partition else 'calls'} IN SHARE ROW EXCLUSIVE MODE"))
+            current = await conn.scalar(select(func.count()).select_from(table).where(in_month))
+            if current != rows:
+                raise RuntimeError(f"{month:%Y-%m} changed during archiving ({rows} written, {current} now); run it again")
+            if rows:
+                size_bytes = filesystem.get_file_info(self._path(relative)).size
+                await conn.execute(insert(CallArchiveMonth).values(
+                    month=month, path=relative, row_count=rows, size_bytes=size_bytes, postgres_bytes=postgres_bytes
+                ))
+            else:
+                size_bytes = 0
+            if has_partition:
+                await detach_call_partition(conn, month)
+                await conn.execute(text(f"DROP TABLE {partition}"))
+            else:
+                # Rows that landed in calls_default
+                await conn.execute(delete(table).where(in_month))
+
+        logger.info(f"Archived {rows} calls for {month:%Y-%m}: {size_bytes} bytes of Parquet, {postgres_bytes} bytes in Postgres")
+        return {"month": month, "rows": rows, "path": relative, "size_bytes": size_bytes, "postgres_bytes": postgres_bytes}
+
+    async def _write_month(self, in_month, relative: str) -> int:
+        """Stream the month out of Postgres into one Parquet file; returns rows written"""
+        table = Call.__table__
+        schema = self.schema()
+        columns = [column.key for column in table.columns]
+        filesystem, _ = self._fs()
+        path = self._path(relative)
+        filesystem.create_dir(path.rsplit("/", 1)[0], recursive=True)
+
+        rows = 0
+        writer = None
+        try:
+            async with engine.connect() as conn:
+                query = (
+                    select(table).where(in_month)
+                    .order_by(table.c.call_start.desc(), table.c.id.desc())
+                    .execution_options(yield_per=self.batch_size)
+                )
+                result = await conn.stream(query)
+                async for batch in result.partitions():
+                    arrays = {
+                        name: [str(value) if isinstance(value, uuid.UUID) else value for value in values]
+                        for name, values in zip(columns, zip(*batch))
+                    }
+                    record_batch = pa.Table.from_pydict(arrays, schema=schema)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, schema, filesystem=filesystem, compression="zstd")
+                    await asyncio.to_thread(writer.write_table, record_batch)
+                    rows += len(batch)
+        finally:
+            if writer is not None:
+                await asyncio.to_thread(writer.close)
+        return rows
+
+    def _expression(self, filters: Optional[CallFilters], cursor: Optional[str]):
+        field = pc.field
+        timestamp = pa.timestamp("us", tz="UTC")
+        conditions = []
+        if filters:
+            if filters.status:
+                conditions.append(field("status") == filters.status)
+            if filters.direction:
+                conditions.append(field("direction") == filters.direction)
+            if filters.agent_id:
+                conditions.append(field("agent_id") == str(filters.agent_id))
+            if filters.start_date:
+                conditions.append(field("call_start") >= pa.scalar(_utc(filters.start_date), type=timestamp))
+            if filters.end_date:
+                conditions.append(field("call_start") <= pa.scalar(_utc(filters.end_date), type=timestamp))
+        if cursor:
+            call_start, call_id = decode_cursor(cursor)
+            call_start = pa.scalar(_utc(call_start), type=timestamp)
+            # Lowercase UUID strings sort like Postgres uuids
+            conditions.append(
+                (field("call_start") < call_start) | ((field("call_start") == call_start) & (field("id") < str(call_id)))
+            )
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def _months_in_range(self, months: Sequence[CallArchiveMonth], filters: Optional[CallFilters], cursor: Optional[str]):
+        upper = decode_cursor(cursor)[0] if cursor else None
+        if filters and filters.end_date:
+            upper = min(upper, _utc(filters.end_date)) if upper else _utc(filters.end_date)
+        lower = _utc(filters.start_date) if filters and filters.start_date else None
+        return [
+            month for month in months
+            if (upper is None or month.month <= upper) and (lower is None or add_months(month.month, 1) > lower)
+        ]
+
+    def _dataset(self, relative: str):
+        filesystem, _ = self._fs()
+        return ds.dataset(self._path(relative), filesystem=filesystem, format="parquet")
+
+    async def _readable_months(self, db: AsyncSession, filters: Optional[CallFilters], cursor: Optional[str]) -> List[CallArchiveMonth]:
+        """Archived months in range; raises RuntimeError if there are any and pyarrow is missing"""
+        months = self._months_in_range(await self.archived_months(db), filters, cursor)
+        if months and not self.enabled:
+            raise RuntimeError(f"pyarrow is required to read archived calls ({len(months)} months archived)")
+        return months
+
+    def _read_month(self, relative: str, columns: List[str], expression, limit: int) -> List[dict]:
+        """First limit matching rows of a month; files are written newest first, so no sort is needed"""
+        calls = []
+        batches = self._dataset(relative).to_batches(
+            columns=columns, filter=expression, batch_size=self.batch_size, use_threads=False
+        )
+        for batch in batches:
+            calls += batch.slice(0, limit - len(calls)).to_pylist()
+            if len(calls) >= limit:
+                break
+        return calls
+
+    async def read_calls(
+        self,
+        db: AsyncSession,
+        columns: List[str],
+        filters: Optional[CallFilters] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> List[dict]:
+        """Up to limit archived calls after cursor, newest first, as dicts of columns"""
+        if limit <= 0:
+            return []
+        months = await self._readable_months(db, filters, cursor)
+        if not months:
+            return []
+        expression = self._expression(filters, cursor)
+        calls = []
+        for month in months:
+            calls += await asyncio.to_thread(self._read_month, month.path, columns, expression, limit - len(calls))
+            if len(calls) >= limit:
+                break
+        return calls
+
+    async def stream_calls(
+        self,
+        db: AsyncSession,
+        columns: List[str],
+        filters: Optional[CallFilters] = None
+    ) -> AsyncIterator[List[tuple]]:
+        """Yield batches of archived calls as tuples in columns order, newest month first"""
+        months = await self._readable_months(db, filters, None)
+        if not months:
+            return
+        expression = self._expression(filters, None)
+        for month in months:
+            batches = iter(self._dataset(month.path).to_batches(
+                columns=columns, filter=expression, batch_size=self.batch_size, use_threads=False
+            ))
+            while True:
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                if batch.num_rows:
+                    yield list(zip(*(batch.column(name).to_pylist() for name in columns)))
+
+# Global instance
+call_archive = CallArchive()
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from datetime import timedelta
+from typing import Deque, Dict, List, Optional, Set
+
+from sqlalchemy import delete, func, select, update
+
+from api.redis_client import redis_client
+from api.websocket import ConnectionManager
+from core.config import settings
+from database import AsyncSessionLocal
+from models.call import Call
+from services.africastalking_service import africastalking_service
+from services.call_state import append_events, lock_sessions
+from services.live_calls import live_call_registry
+from services.webhook_ingest import percentile
+from utils.phone import counterparty_e164
+
+logger = logging.getLogger(__name__)
+
+CLICKED_KEY = "call_dispatch:clicked:{}"
+ANSWER_LATENCY_KEY = "call_dispatch:answer_latency_ms"
+
+# Push one sample and keep the newest ARGV[2]
+PUSH_SAMPLE_SCRIPT = """
+redis.call('LPUSH', KEYS[1], ARGV[1])
+redis.call('LTRIM', KEYS[1], 0, tonumber(ARGV[2]) - 1)
+return 1
+"""
+
+class CallDispatcher:
+    """Places outbound calls off the request path.
+
+    /calls/initiate stores a "dispatching" call row under a reserved session ID
+    and queues a job; a pool of CALL_DISPATCH_WORKERS tasks per worker process
+    makes the provider call and renames the row to the provider's session ID.
+    Progress goes to the call's stream channel (call_stream_{reserved id}).
+    Jobs are retried while no caller ID has capacity, up to
+    CALL_DISPATCH_MAX_ATTEMPTS, by putting them back on the queue after a
+    delay; transport retries happen in the AT client. Jobs are held in
+    memory, so a call is placed at most once; rows whose job was lost to a
+    restart are failed by sweep_stale after CALL_DISPATCH_STALE_SECONDS.
+
+    Click-to-answer latency is measured from the click to the first answered
+    callback, which may land on any worker, so samples are kept in Redis.
+    """
+
+    def __init__(self, workers: int = settings.CALL_DISPATCH_WORKERS):
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.CALL_DISPATCH_QUEUE_SIZE)
+        self.dispatch_ms: Deque[float] = deque(maxlen=settings.CALL_LATENCY_SAMPLES)
+        self.counters: Dict[str, int] = {"queued": 0, "placed": 0, "failed": 0, "retried": 0, "swept": 0}
+        self._tasks: List[asyncio.Task] = []
+        self._retries: Set[asyncio.TimerHandle] = set()
+
+    def submit(self, call_id: uuid.UUID, session_id: str, to: str, from_: Optional[str] = None) -> None:
+        """Queue a call for dispatch; raises asyncio.QueueFull when the pool is saturated"""
+        self.queue.put_nowait({
+            "call_id": call_id,
+            "session_id": session_id,
+            "to": to,
+            "from_": from_,
+            "requested_at": time.time(),
+            "attempts": 0,
+        })
+        self.counters["queued"] += 1
+
+    async def _notify(self, job: dict, message: dict) -> None:
+        manager = ConnectionManager.registry.get("call_stream")
+        if manager:
+            try:
+                await manager.send_to_client(f"call_stream_{job['session_id']}", {"session_id": job["session_id"], **message})
+            except Exception as e:
+                logger.error(f"Failed to push dispatch progress for {job['session_id']}: {str(e)}")
+
+    async def _fail(self, job: dict, error: str) -> None:
+        self.counters["failed"] += 1
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Call).where(Call.id == job["call_id"]).values(status="failed", call_end=func.now()))
+            await db.commit()
+            await live_call_registry.refresh(db, [job["call_id"]])
+        await self._notify(job, {"type": "call_failed", "status": "failed", "error": error})
+
+    async def _link(self, job: dict, provider_session_id: str, result: dict) -> None:
+        """Move the reserved row onto the provider session ID"""
+        values = {
+            "caller_number": result["from_number"],
+            "callee_number": result["to_number"],
+            "counterparty_e164": counterparty_e164(result["from_number"], result["to_number"], "outbound"),
+        }
+        async with AsyncSessionLocal() as db:
+            await lock_sessions(db, [provider_session_id])
+            provider_row = (await db.execute(
+                select(Call.id).where(Call.at_session_id == provider_session_id)
+            )).scalar_one_or_none()
+            if provider_row:
+                # Callbacks created the provider's row first; fold the reservation into it
+                reserved_agent = (await db.execute(
+                    select(Call.agent_id).where(Call.id == job["call_id"])
+                )).scalar_one_or_none()
+                await db.execute(
+                    update(Call)
+                    .where(Call.at_session_id == provider_session_id)
+                    .values(agent_id=func.coalesce(Call.agent_id, reserved_agent), direction="outbound")
+                )
+                await db.execute(delete(Call).where(Call.id == job["call_id"]))
+                refreshed = [provider_row, job["call_id"]]
+            else:
+                await db.execute(
+                    update(Call)
+                    .where(Call.id == job["call_id"])
+                    .values(at_session_id=provider_session_id, status="queued", **values)
+                )
+                await append_events(db, [{
+                    "at_session_id": provider_session_id,
+                    "state": "queued",
+                    "occurred_at": func.now(),
+                    "source": "api",
+                    "payload": {"reserved_session_id": job["session_id"]},
+                }])
+                refreshed = [job["call_id"]]
+            await db.commit()
+            # A folded reservation has no row left, so refresh drops its entry
+            await live_call_registry.refresh(db, refreshed)
+
+    async def _dispatch(self, job: dict) -> None:
+        job["attempts"] += 1
+        await self._notify(job, {"type": "call_update", "status": "dispatching", "attempt": job["attempts"]})
+
+        result = await africastalking_service.make_call(to=job["to"], from_=job["from_"])
+        if not result.get("success"):
+            if result.get("retryable") and job["attempts"] < settings.CALL_DISPATCH_MAX_ATTEMPTS:
+                self.counters["retried"] += 1
+                self._retry_later(job, settings.CALL_DISPATCH_RETRY_DELAY_SECONDS * job["attempts"])
+                return
+            await self._fail(job, result.get("error") or "Call could not be placed")
+            return
+
+        entries = result["data"].get("entries") or []
+        provider_session_id = entries[0].get("sessionId") if entries else None
+        if not provider_session_id:
+            await self._fail(job, result["data"].get("errorMessage") or "Provider returned no session")
+            return
+
+        await self._link(job, provider_session_id, result)
+        await redis_client.set(CLICKED_KEY.format(provider_session_id), str(int(job["requested_at"] * 1000)), expire=3600)
+        self.counters["placed"] += 1
+        self.dispatch_ms.append((time.time() - job["requested_at"]) * 1000)
+
+        await self._notify(job, {
+            "type": "call_dispatched",
+            "status": "queued",
+            "provider_session_id": provider_session_id,
+            "from": result["from_number"],
+            "to": result["to_number"],
+        })
+        manager = ConnectionManager.registry.get("call_stream")
+        if manager:
+            await manager.broadcast({
+                "type": "call_initiated",
+                "session_id": provider_session_id,
+                "from": result["from_number"],
+                "to": result["to_number"],
+                "status": "queued"
+            }, "calls")
+
+    def _retry_later(self, job: dict, delay: float) -> None:
+        """Put a job back on the queue after delay, leaving the worker free meanwhile"""
+        def requeue():
+            self._retries.discard(handle)
+            try:
+                self.queue.put_nowait(job)
+            except asyncio.QueueFull:
+                asyncio.create_task(self._fail(job, "Call dispatch queue is full"))
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retries.add(handle)
+
+    async def sweep_stale(self) -> int:
+        """Fail rows left dispatching by a job that no longer exists; returns rows failed"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(Call)
+                .where(Call.status == "dispatching")
+                .where(Call.call_start < func.now() - timedelta(seconds=settings.CALL_DISPATCH_STALE_SECONDS))
+                .values(status="failed", call_end=func.now())
+                .returning(Call.id)
+                .execution_options(synchronize_session=False)
+            )
+            call_ids = list(result.scalars())
+            await db.commit()
+            await live_call_registry.refresh(db, call_ids)
+        if call_ids:
+            self.counters["swept"] += len(call_ids)
+            logger.warning(f"Failed {len(call_ids)} calls left dispatching for over {settings.CALL_DISPATCH_STALE_SECONDS}s")
+        return len(call_ids)
+
+    async def _work(self) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._dispatch(job)
+            except Exception as e:
+                logger.error(f"Call dispatch error for {job['session_id']}: {str(e)}")
+                try:
+                    await self._fail(job, str(e))
+                except Exception as fail_error:
+                    logger.error(f"Could not mark {job['session_id']} failed: {str(fail_error)}")
+            finally:
+                self.queue.task_done()
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        logger.info(f"Call dispatcher started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        # Pending retries are dropped; sweep_stale fails their rows
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def record_answer(self, provider_session_id: str) -> None:
+        """Record click-to-answer latency for a dispatched call's first answered callback"""
+        clicked = await redis_client.getdel(CLICKED_KEY.format(provider_session_id))
+        if not clicked:
+            return
+        latency_ms = time.time() * 1000 - int(clicked)
+        try:
+            await redis_client.eval(PUSH_SAMPLE_SCRIPT, [ANSWER_LATENCY_KEY], [round(latency_ms), settings.CALL_LATENCY_SAMPLES])
+        except Exception:
+            pass
+
+    async def stats(self) -> dict:
+        answer_ms = [float(sample) for sample in await redis_client.lrange(ANSWER_LATENCY_KEY, 0, -1)]
+        return {
+            **self.counters,
+            "queue_depth": self.queue.qsize(),
+            "retries_pending": len(self._retries),
+            "click_to_dispatch_ms": {"p50": percentile(self.dispatch_ms, 0.5), "p99": percentile(self.dispatch_ms, 0.99), "samples": len(self.dispatch_ms)},
+            "click_to_answer_ms": {"p50": percentile(answer_ms, 0.5), "p99": percentile(answer_ms, 0.99), "samples": len(answer_ms)},
+        }
+
+# Global instance
+call_dispatcher = CallDispatcher()
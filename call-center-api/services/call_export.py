@@ -0,0 +1,101 @@
+import csv
+import io
+import logging
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
+
+from sqlalchemy import select, and_
+
+from api.json_bytes import dumps
+from core.config import settings
+from crud.call import call_filter_conditions
+from crud.read_models import CALL_COLUMNS, CALL_COLUMN_NAMES
+from database import AsyncSessionLocal, engine
+from models.call import Call
+from schemas.call import CallFilters
+from services.call_archive import call_archive
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = CALL_COLUMN_NAMES
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+class CallExporter:
+    """Streams call history out of a server-side cursor.
+
+    Archived months follow the Postgres rows, read from their Parquet files.
+    The export runs on its own connection rather than the request session,
+    because the body is produced after the route returns. Rows are fetched
+    CALL_EXPORT_BATCH_SIZE at a time and each batch is encoded and sent
+    before the next is fetched, so memory stays flat however many rows match.
+    If the client goes away, the response is cancelled and the cursor and
+    connection are closed.
+    """
+
+    def __init__(self, batch_size: int = settings.CALL_EXPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    async def _batches(self, filters: Optional[CallFilters]) -> AsyncIterator[list]:
+        query = select(*CALL_COLUMNS)
+        conditions = call_filter_conditions(filters)
+        if conditions:
+            query = query.where(and_(*conditions))
+        query = query.order_by(Call.call_start.desc(), Call.id.desc())
+
+        async with engine.connect() as conn:
+            result = await conn.stream(query.execution_options(yield_per=self.batch_size))
+            async for batch in result.partitions():
+                yield batch
+
+        # Archived months are all older than what Postgres holds
+        async with AsyncSessionLocal() as db:
+            async for batch in call_archive.stream_calls(db, EXPORT_COLUMNS, filters):
+                yield batch
+
+    async def _encoded(self, filters: Optional[CallFilters], fmt: str) -> AsyncIterator[Tuple[int, bytes]]:
+        """Yield (rows, encoded bytes) per batch"""
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            async for batch in self._batches(filters):
+                for row in batch:
+                    writer.writerow([_csv_value(value) for value in row])
+                yield len(batch), buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield 0, buffer.getvalue().encode()
+        else:
+            async for batch in self._batches(filters):
+                yield len(batch), b"".join(dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in batch)
+
+    async def export(self, filters: Optional[CallFilters], fmt: str = "csv", gzip: bool = False) -> AsyncIterator[bytes]:
+        """Yield the export body in chunks, optionally as a gzip stream"""
+        rows = 0
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+        try:
+            async for count, chunk in self._encoded(filters, fmt):
+                rows += count
+                if compressor:
+                    chunk = compressor.compress(chunk)
+                    if not chunk:
+                        continue
+                yield chunk
+            if compressor:
+                yield compressor.flush()
+        finally:
+            logger.info(f"Call export ({fmt}{', gzip' if gzip else ''}) streamed {rows} rows")
+
+# Global instance
+call_exporter = CallExporter()
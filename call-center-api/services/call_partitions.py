@@ -0,0 +1,94 @@
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# calls is range-partitioned by call_start, one partition per UTC month, plus
+# calls_default for rows outside every month partition
+PARTITION_NAME = "calls_y{:04d}m{:02d}"
+DEFAULT_PARTITION = "calls_default"
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+def partition_name(month: datetime) -> str:
+    return PARTITION_NAME.format(month.year, month.month)
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    result = await conn.execute(text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('calls')"))
+    return bool(result.scalar())
+
+async def ensure_call_partitions(
+    conn: AsyncConnection,
+    months_ahead: int = settings.CALL_PARTITION_MONTHS_AHEAD,
+    since: Optional[datetime] = None
+) -> List[str]:
+    """Create missing month partitions from since (default: this month) through months_ahead; returns the names created.
+
+    Creating a month fails if calls_default already holds rows for it, which is
+    why partitions are made well ahead of time.
+    """
+    if not await is_partitioned(conn):
+        logger.warning("calls is not partitioned; run the partition migration first")
+        return []
+
+    existing = set((await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = 'calls'::regclass"
+    ))).scalars())
+
+    created = []
+    month = month_start(since or datetime.now(tz=timezone.utc))
+    last = add_months(month_start(datetime.now(tz=timezone.utc)), months_ahead)
+    while month <= last:
+        name = partition_name(month)
+        if name not in existing:
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF calls "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+        month = add_months(month, 1)
+    if DEFAULT_PARTITION not in existing:
+        await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF calls DEFAULT"))
+        created.append(DEFAULT_PARTITION)
+
+    if created:
+        logger.info(f"Created calls partitions: {', '.join(created)}")
+    return created
+
+async def list_call_partitions(conn: AsyncConnection) -> List[dict]:
+    """Attached partitions, oldest first, with their bounds, estimated rows and size"""
+    result = await conn.execute(text("""
+        SELECT c.relname AS name,
+               pg_get_expr(c.relpartbound, c.oid) AS bounds,
+               greatest(c.reltuples, 0)::bigint AS estimated_rows,
+               pg_total_relation_size(c.oid) AS total_bytes
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'calls'::regclass
+        ORDER BY c.relname
+    """))
+    return [dict(row._mapping) for row in result]
+
+async def detach_call_partition(conn: AsyncConnection, month: datetime) -> str:
+    """Detach one month from calls, leaving it as a standalone table to archive or drop.
+
+    This is a catalog change and does not scan the partition's rows. It takes
+    a short ACCESS EXCLUSIVE lock on calls. DETACH ... CONCURRENTLY is not
+    available while calls_default exists.
+    """
+    name = partition_name(month_start(month))
+    await conn.execute(text(f"ALTER TABLE calls DETACH PARTITION {name}"))
+    logger.info(f"Detached calls partition {name}")
+    return name
@@ -0,0 +1,87 @@
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from api.redis_client import redis_client
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class CallRoutingTable:
+    """Session ID -> dial target routing shared by all workers through Redis.
+
+    A bounded local LRU sits in front of Redis so repeated webhooks for a session
+    are answered in-process, and misses are cached briefly so unknown sessions
+    (inbound and WebRTC calls) do not hit Redis on every retry. Misses are not
+    cached while this worker is placing a call, since the provider's first
+    webhook can arrive before the route is recorded.
+    """
+
+    def __init__(
+        self,
+        ttl: int = settings.CALL_ROUTE_TTL_SECONDS,
+        local_size: int = settings.CALL_ROUTE_CACHE_SIZE,
+        negative_ttl: float = settings.CALL_ROUTE_NEGATIVE_TTL_SECONDS
+    ):
+        self.ttl = ttl
+        self.local_size = local_size
+        self.negative_ttl = negative_ttl
+        self._local: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._dispatching = 0
+
+    def _key(self, session_id: str) -> str:
+        return f"call_route:{session_id}"
+
+    def _remember(self, session_id: str, target: Optional[str], ttl: float):
+        self._local[session_id] = (target, time.monotonic() + ttl)
+        self._local.move_to_end(session_id)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def set(self, session_id: str, target: str) -> None:
+        """Store the dial target for a provider session"""
+        self._remember(session_id, target, self.ttl)
+        await redis_client.setex(self._key(session_id), self.ttl, target)
+        logger.info(f"Stored route {session_id} -> {target}")
+
+    async def get(self, session_id: str) -> Optional[str]:
+        """Return the dial target for a session, or None if it has no route"""
+        if not session_id:
+            return None
+
+        cached = self._local.get(session_id)
+        if cached and cached[1] > time.monotonic():
+            self._local.move_to_end(session_id)
+            return cached[0]
+
+        target = await redis_client.get(self._key(session_id))
+        if target:
+            self._remember(session_id, target, self.ttl)
+        elif not self._dispatching:
+            self._remember(session_id, None, self.negative_ttl)
+        return target
+
+    @asynccontextmanager
+    async def dispatching(self):
+        """Hold around placing a call and recording its route so webhook misses meanwhile are not cached"""
+        self._dispatching += 1
+        try:
+            yield
+        finally:
+            self._dispatching -= 1
+
+    async def record(self, result: Dict[str, Any]) -> None:
+        """Store the route for a successful Voice API result from AfricasTalkingService._make_direct_call"""
+        entries = (result.get("data") or {}).get("entries") or []
+        session_id = entries[0].get("sessionId") if entries else None
+        if result.get("success") and session_id and result.get("to_number"):
+            try:
+                await self.set(session_id, result["to_number"])
+            except Exception as e:
+                # The call is already placed; report the routing failure rather than the call
+                logger.error(f"Failed to store route for session {session_id}: {str(e)}")
+
+# Global instance
+call_routing = CallRoutingTable()
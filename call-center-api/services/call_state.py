@@ -0,0 +1,209 @@
+import logging
+import uuid
+from datetime import datetime
+from typing import Callable, Iterable, List, Mapping, Optional, Sequence
+
+from sqlalchemy import bindparam, case, func, insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from models.call import Call
+from models.call_event import CallEvent
+from utils.phone import counterparty_e164
+
+logger = logging.getLogger(__name__)
+
+# Africa's Talking call statuses in the order a call moves through them; an
+# event never moves a call back to a lower rank
+CALL_TERMINAL_RANK = 3
+CALL_ANSWERED_RANK = 2
+CALL_STATUS_RANK = {
+    "queued": 0,
+    "ringing": 1,
+    "in-progress": CALL_ANSWERED_RANK,
+    "answered": CALL_ANSWERED_RANK,
+    "talking": CALL_ANSWERED_RANK,
+    "on_hold": CALL_ANSWERED_RANK,
+    "completed": CALL_TERMINAL_RANK,
+    "ended": CALL_TERMINAL_RANK,
+    "failed": CALL_TERMINAL_RANK,
+    "busy": CALL_TERMINAL_RANK,
+    "no-answer": CALL_TERMINAL_RANK,
+}
+
+def status_rank(state: Optional[str]) -> int:
+    return CALL_STATUS_RANK.get(state, 0)
+
+def webhook_state(data: Mapping) -> str:
+    """Normalized call state for an Africa's Talking callback payload.
+
+    status wins over callSessionState, both are lowercased to match
+    CALL_STATUS_RANK, and isActive=0 without a terminal state reads as ended.
+    """
+    state = (data.get("status") or data.get("callSessionState") or "").lower()
+    if data.get("isActive") == "0" and status_rank(state) != CALL_TERMINAL_RANK:
+        return "ended"
+    return state or "unknown"
+
+def reduce_call_events(events: Iterable[Mapping]) -> Optional[dict]:
+    """Fold one session's events, in occurrence order, into its calls row projection.
+
+    Each event is a mapping with at_session_id, state, occurred_at and payload.
+    Status only advances by rank; answer and end times come from the first event
+    reaching that rank, and total_duration is the provider's duration when sent,
+    otherwise end minus answer time.
+    """
+    projection = None
+    rank = -1
+    for event in events:
+        payload = event["payload"] or {}
+        if projection is None:
+            projection = {
+                "at_session_id": event["at_session_id"],
+                "caller_number": "",
+                "callee_number": "",
+                "status": None,
+                "direction": "outbound",
+                "call_start": event["occurred_at"],
+                "call_answered": None,
+                "call_end": None,
+                "total_duration": 0,
+            }
+
+        event_rank = status_rank(event["state"])
+        if event_rank >= rank:
+            projection["status"], rank = event["state"], event_rank
+        if event_rank == CALL_ANSWERED_RANK and projection["call_answered"] is None and projection["call_end"] is None:
+            projection["call_answered"] = event["occurred_at"]
+        if event_rank == CALL_TERMINAL_RANK and projection["call_end"] is None:
+            projection["call_end"] = event["occurred_at"]
+
+        duration = str(payload.get("durationInSeconds", ""))
+        if duration.isdigit():
+            projection["total_duration"] = max(projection["total_duration"], int(duration))
+        projection["caller_number"] = projection["caller_number"] or payload.get("callerNumber") or ""
+        projection["callee_number"] = projection["callee_number"] or payload.get("destinationNumber") or ""
+
+    if projection and not projection["total_duration"] and projection["call_end"] and projection["call_answered"]:
+        projection["total_duration"] = int((projection["call_end"] - projection["call_answered"]).total_seconds())
+    if projection:
+        projection["counterparty_e164"] = counterparty_e164(
+            projection["caller_number"], projection["callee_number"], projection["direction"]
+        )
+    return projection
+
+def event_from_webhook(data: dict, occurred_at: datetime, source: str = "webhook") -> dict:
+    """call_events row values for an Africa's Talking callback payload"""
+    return {
+        "at_session_id": data["sessionId"],
+        "state": webhook_state(data),
+        "occurred_at": occurred_at,
+        "source": source,
+        "payload": {key: value for key, value in data.items() if not key.startswith("_")},
+    }
+
+async def append_events(db: AsyncSession, events: Sequence[dict]) -> None:
+    """Append events to the log in one INSERT; the caller commits"""
+    if events:
+        await db.execute(pg_insert(CallEvent).values(list(events)))
+
+async def lock_sessions(db: AsyncSession, session_ids: Sequence[str]) -> None:
+    """Take transaction-scoped advisory locks on session IDs, in sorted order.
+
+    calls is partitioned by call_start, so at_session_id cannot carry a unique
+    index. Every writer that inserts or renames a calls row by session ID takes
+    these locks first, then checks for an existing row. The locks are released
+    on commit or rollback.
+    """
+    if session_ids:
+        await db.execute(
+            text(
+                "SELECT pg_advisory_xact_lock(hashtextextended(session_id, 0)) "
+                "FROM (SELECT DISTINCT unnest(CAST(:session_ids AS text[])) AS session_id ORDER BY 1) AS sessions"
+            ),
+            {"session_ids": list(session_ids)}
+        )
+
+async def upsert_calls(db: AsyncSession, rows: Sequence[dict], merge: Callable[[Mapping], dict]) -> List[uuid.UUID]:
+    """Insert calls rows for new sessions and merge the rest into the existing rows.
+
+    This stands in for INSERT ... ON CONFLICT (at_session_id), which a
+    partitioned calls table cannot do. Every row must have the same keys.
+    merge receives the incoming values as a mapping of column name to SQL
+    expression, in the same way ON CONFLICT exposes excluded, and returns the
+    SET clause. Returns the IDs of the rows written. The caller commits.
+    """
+    if not rows:
+        return []
+    table = Call.__table__
+    session_ids = sorted(row["at_session_id"] for row in rows)
+    await lock_sessions(db, session_ids)
+    existing = dict((await db.execute(
+        select(table.c.at_session_id, table.c.id).where(table.c.at_session_id.in_(session_ids))
+    )).all())
+
+    new_rows = [{"id": uuid.uuid4(), **row} for row in rows if row["at_session_id"] not in existing]
+    if new_rows:
+        await db.execute(insert(table).values(new_rows))
+
+    updates = [row for row in rows if row["at_session_id"] in existing]
+    if updates:
+        incoming = {column: bindparam(f"new_{column}", type_=table.c[column].type) for column in updates[0]}
+        stmt = update(table).where(table.c.at_session_id == incoming["at_session_id"]).values(merge(incoming))
+        await db.execute(stmt, [{f"new_{column}": value for column, value in row.items()} for row in updates])
+    return [row["id"] for row in new_rows] + list(existing.values())
+
+async def _write_projections(db: AsyncSession, projections: List[dict]) -> None:
+    # Replayed values replace the row's, except where the events have none;
+    # rows created through the API may start before their first event
+    await upsert_calls(db, projections, lambda incoming: {
+        "status": func.coalesce(incoming["status"], Call.status),
+        "call_start": func.least(Call.call_start, incoming["call_start"]),
+        "call_answered": func.coalesce(incoming["call_answered"], Call.call_answered),
+        "call_end": func.coalesce(incoming["call_end"], Call.call_end),
+        "total_duration": case((incoming["total_duration"] > 0, incoming["total_duration"]), else_=Call.total_duration),
+        "caller_number": func.coalesce(func.nullif(incoming["caller_number"], ""), Call.caller_number),
+        "callee_number": func.coalesce(func.nullif(incoming["callee_number"], ""), Call.callee_number),
+        "counterparty_e164": func.coalesce(incoming["counterparty_e164"], Call.counterparty_e164),
+        "updated_at": func.now(),
+    })
+    await db.commit()
+
+async def rebuild_projections(session_ids: Optional[Sequence[str]] = None, batch_size: int = 500) -> int:
+    """Replay call_events onto the matching calls rows; returns sessions rebuilt.
+
+    Events are streamed through a server-side cursor on one session while the
+    projections are written in batches on another.
+    """
+    query = (
+        select(CallEvent.at_session_id, CallEvent.state, CallEvent.occurred_at, CallEvent.payload)
+        .order_by(CallEvent.at_session_id, CallEvent.occurred_at, CallEvent.id)
+        .execution_options(yield_per=5000)
+    )
+    if session_ids:
+        query = query.where(CallEvent.at_session_id.in_(session_ids))
+
+    rebuilt = 0
+    pending: List[dict] = []
+    session_events: List[Mapping] = []
+    async with AsyncSessionLocal() as reader, AsyncSessionLocal() as writer:
+        result = await reader.stream(query)
+        async for row in result:
+            event = row._mapping
+            if session_events and session_events[0]["at_session_id"] != event["at_session_id"]:
+                pending.append(reduce_call_events(session_events))
+                session_events = []
+            session_events.append(event)
+            if len(pending) >= batch_size:
+                await _write_projections(writer, pending)
+                rebuilt += len(pending)
+                pending = []
+        if session_events:
+            pending.append(reduce_call_events(session_events))
+        if pending:
+            await _write_projections(writer, pending)
+            rebuilt += len(pending)
+
+    logger.info(f"Rebuilt {rebuilt} call projections from call_events")
+    return rebuilt
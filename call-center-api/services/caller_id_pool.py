@@ -0,0 +1,148 @@
+import logging
+import random
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from api.redis_client import redis_client
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CALLS_KEY = "caller_id:calls:{}"
+SESSION_KEY = "caller_id:session:{}"
+
+# Pick the least-loaded number that is under both caps and reserve a slot on it.
+# Numbers arrive shuffled, so ties are spread across equally loaded numbers.
+ACQUIRE_SCRIPT = """
+local stale_before = tonumber(ARGV[1])
+local max_inflight = tonumber(ARGV[2])
+local max_cps = tonumber(ARGV[3])
+local second = ARGV[4]
+local now = tonumber(ARGV[5])
+local reservation = ARGV[6]
+local best, best_load = nil, nil
+for i = 7, #ARGV do
+    local number = ARGV[i]
+    local calls = 'caller_id:calls:' .. number
+    redis.call('ZREMRANGEBYSCORE', calls, '-inf', stale_before)
+    local load = redis.call('ZCARD', calls)
+    if load < max_inflight and (best_load == nil or load < best_load) then
+        local cps = tonumber(redis.call('GET', 'caller_id:cps:' .. number .. ':' .. second) or '0')
+        if cps < max_cps then
+            best, best_load = number, load
+        end
+    end
+end
+if best then
+    redis.call('ZADD', 'caller_id:calls:' .. best, now, reservation)
+    local cps_key = 'caller_id:cps:' .. best .. ':' .. second
+    redis.call('INCR', cps_key)
+    redis.call('EXPIRE', cps_key, 2)
+end
+return best
+"""
+
+RELEASE_SESSION_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if not value then
+    return nil
+end
+redis.call('DEL', KEYS[1])
+local sep = string.find(value, '|', 1, true)
+local number = string.sub(value, 1, sep - 1)
+redis.call('ZREM', 'caller_id:calls:' .. number, string.sub(value, sep + 1))
+return number
+"""
+
+UTILIZATION_SCRIPT = """
+local stale_before = tonumber(ARGV[1])
+local second = ARGV[2]
+local result = {}
+for i = 3, #ARGV do
+    local number = ARGV[i]
+    local calls = 'caller_id:calls:' .. number
+    redis.call('ZREMRANGEBYSCORE', calls, '-inf', stale_before)
+    table.insert(result, redis.call('ZCARD', calls))
+    table.insert(result, tonumber(redis.call('GET', 'caller_id:cps:' .. number .. ':' .. second) or '0'))
+end
+return result
+"""
+
+class CallerIdPool:
+    """Load-aware caller-ID selection shared by all workers through Redis.
+
+    Each number has a sorted set of in-flight reservations scored by start
+    time, so concurrency is counted across workers and reservations whose
+    terminal callback never arrived age out after CALLER_ID_STALE_SECONDS.
+    Selection is least-loaded among numbers under CALLER_ID_MAX_CONCURRENT
+    calls and CALLER_ID_MAX_CPS calls in the current second. A slot is bound
+    to the provider session once the call is placed and released on the
+    session's terminal callback.
+
+    The scripts build per-number key names, so they assume a single Redis
+    node rather than Redis Cluster.
+    """
+
+    def __init__(
+        self,
+        numbers: List[str],
+        max_concurrent: int = settings.CALLER_ID_MAX_CONCURRENT,
+        max_cps: int = settings.CALLER_ID_MAX_CPS,
+        stale_seconds: int = settings.CALLER_ID_STALE_SECONDS
+    ):
+        self.numbers = numbers
+        self.max_concurrent = max_concurrent
+        self.max_cps = max_cps
+        self.stale_seconds = stale_seconds
+
+    async def acquire(self) -> Optional[Tuple[str, str]]:
+        """Reserve a slot on the least-loaded number; returns (number, reservation) or None when all are at capacity"""
+        now = time.time()
+        reservation = uuid.uuid4().hex
+        numbers = random.sample(self.numbers, len(self.numbers))
+        number = await redis_client.eval(
+            ACQUIRE_SCRIPT,
+            [],
+            [now - self.stale_seconds, self.max_concurrent, self.max_cps, int(now), now, reservation, *numbers]
+        )
+        return (number, reservation) if number else None
+
+    async def bind(self, session_id: str, number: str, reservation: str) -> None:
+        """Attach a reservation to the provider session so its terminal callback frees the slot"""
+        await redis_client.setex(SESSION_KEY.format(session_id), self.stale_seconds, f"{number}|{reservation}")
+
+    async def release_reservation(self, number: str, reservation: str) -> None:
+        """Free a slot whose call was never placed"""
+        try:
+            await redis_client.eval("return redis.call('ZREM', KEYS[1], ARGV[1])", [CALLS_KEY.format(number)], [reservation])
+        except Exception:
+            # The reservation ages out after stale_seconds
+            pass
+
+    async def release_session(self, session_id: str) -> Optional[str]:
+        """Free the slot held by a session; safe to call more than once"""
+        try:
+            number = await redis_client.eval(RELEASE_SESSION_SCRIPT, [SESSION_KEY.format(session_id)], [])
+        except Exception:
+            return None
+        if number:
+            logger.info(f"Released caller ID {number} for session {session_id}")
+        return number
+
+    async def utilization(self) -> List[dict]:
+        now = time.time()
+        counts = await redis_client.eval(
+            UTILIZATION_SCRIPT, [], [now - self.stale_seconds, int(now), *self.numbers]
+        )
+        return [
+            {
+                "number": number,
+                "in_flight": counts[index * 2],
+                "max_concurrent": self.max_concurrent,
+                "utilization": round(counts[index * 2] / self.max_concurrent, 2),
+                "calls_this_second": counts[index * 2 + 1],
+                "max_cps": self.max_cps,
+            }
+            for index, number in enumerate(self.numbers)
+        ]
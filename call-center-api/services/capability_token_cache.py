@@ -0,0 +1,109 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from api.redis_client import redis_client
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class CapabilityTokenCache:
+    """WebRTC capability tokens cached per (client_name, phone_number) until shortly before expiry.
+
+    Tokens live in Redis so every worker shares them, with a per-worker copy in
+    front. The TTL is the token's lifeTimeSec minus AT_TOKEN_REFRESH_MARGIN_SECONDS,
+    so a cached token always has at least the margin left when handed out;
+    hits report the seconds it has left as lifeTimeSec.
+    Concurrent misses for the same key on a worker share a single provider
+    request. Requests without a phone number are cached under "auto".
+    """
+
+    def __init__(self, margin: int = settings.AT_TOKEN_REFRESH_MARGIN_SECONDS):
+        self.margin = margin
+        self._local: Dict[Tuple[str, str], Tuple[Dict[str, Any], float]] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def _redis_key(self, key: Tuple[str, str]) -> str:
+        return f"at_token:{key[0]}:{key[1]}"
+
+    async def _lookup(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        cached = self._local.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        self._local.pop(key, None)
+
+        raw = await redis_client.get(self._redis_key(key))
+        if not raw:
+            return None
+        data = json.loads(raw)
+        remaining = data.get("expiresAt", 0) - time.time() - self.margin
+        if remaining <= 0:
+            return None
+        self._local[key] = (data, time.monotonic() + remaining)
+        return data
+
+    async def _store(self, key: Tuple[str, str], data: Dict[str, Any]) -> None:
+        lifetime = int(data.get("lifeTimeSec") or 86400)
+        ttl = lifetime - self.margin
+        if ttl <= 0:
+            return
+        data = {**data, "expiresAt": int(time.time()) + lifetime}
+        self._local[key] = (data, time.monotonic() + ttl)
+        try:
+            await redis_client.setex(self._redis_key(key), ttl, json.dumps(data))
+        except Exception as e:
+            logger.error(f"Failed to cache capability token for {key[0]}: {str(e)}")
+
+    async def get(
+        self,
+        client_name: str,
+        phone_number: Optional[str],
+        fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Return a service-style result ({"success", "data"}) from cache or a single shared fetch"""
+        key = (client_name, phone_number or "auto")
+
+        data = await self._lookup(key)
+        if data:
+            self.counters["hits"] += 1
+            return {"success": True, "data": {**data, "lifeTimeSec": int(data["expiresAt"] - time.time())}}
+
+        inflight = self._inflight.get(key)
+        if inflight:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        self.counters["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+            if result.get("success"):
+                await self._store(key, result["data"])
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            # Avoid "exception was never retrieved" when nobody else was waiting
+            if future.done() and not future.cancelled():
+                future.exception()
+
+    async def invalidate(self, client_name: str, phone_number: Optional[str] = None) -> None:
+        key = (client_name, phone_number or "auto")
+        self._local.pop(key, None)
+        await redis_client.delete(self._redis_key(key))
+
+    def stats(self) -> dict:
+        return {**self.counters, "local_entries": len(self._local)}
+
+# Global instance
+capability_token_cache = CapabilityTokenCache()
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from api.redis_client import redis_client
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def scope_channels(prefix: str, user, designation: Optional[str] = None) -> List[str]:
+    """Channels a user may read for a feed, based on role and designation"""
+    channels = [f"{prefix}:{user.id}:{designation or 'all'}"]
+    if user.role == "super-admin":
+        channels.append(f"{prefix}:general:super-admin")
+    elif designation:
+        channels.append(f"{prefix}:general:{designation}")
+    return channels
+
+class EventStream:
+    """Capped Redis Streams used as the replayable source for live feeds"""
+
+    def __init__(self, prefix: str = "events", maxlen: int = settings.EVENT_STREAM_MAXLEN):
+        self.prefix = prefix
+        self.maxlen = maxlen
+
+    def stream_key(self, channel: str) -> str:
+        return f"{self.prefix}:{channel}"
+
+    async def publish(self, channel: str, message: str) -> Optional[str]:
+        """Append a serialized event to the channel's stream and return its ID"""
+        return await redis_client.xadd(self.stream_key(channel), {"data": message}, maxlen=self.maxlen)
+
+    async def listen(
+        self,
+        channels: List[str],
+        last_event_id: Optional[str] = None,
+        block_ms: int = settings.EVENT_STREAM_BLOCK_MS,
+        heartbeat: bool = False
+    ) -> AsyncIterator[Tuple[Optional[str], Optional[str], Optional[str]]]:
+        """Yield (channel, event_id, data) for new events, resuming after last_event_id if given.
+
+        Stream IDs are time-ordered on one Redis server, so a single ID is a valid
+        resume point across all of a client's channels. With heartbeat=True a
+        (None, None, None) tuple is yielded whenever a read times out, so callers
+        can send keep-alives or check for disconnects.
+        """
+        if not last_event_id:
+            # Pin every stream to the same starting point instead of "$", which
+            # would drop events on one stream while another is being delivered
+            seconds, microseconds = await redis_client.time()
+            last_event_id = f"{seconds * 1000 + microseconds // 1000}-0"
+
+        key_to_channel = {self.stream_key(channel): channel for channel in channels}
+        offsets: Dict[str, str] = {key: last_event_id for key in key_to_channel}
+
+        while True:
+            try:
+                response = await redis_client.xread(offsets, block=block_ms)
+            except Exception:
+                await asyncio.sleep(1)
+                continue
+            if not response and heartbeat:
+                yield None, None, None
+                continue
+            for key, entries in response or []:
+                for event_id, fields in entries:
+                    offsets[key] = event_id
+                    yield key_to_channel[key], event_id, fields.get("data")
+
+# Global instance
+event_stream = EventStream()
@@ -0,0 +1,244 @@
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.json_bytes import dumps
+from api.redis_client import redis_client
+from core.config import settings
+from models.agent import Agent
+from models.call import Call
+from models.user import User
+from services.call_state import CALL_STATUS_RANK, CALL_TERMINAL_RANK, status_rank
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_KEY = "live_call_registry:calls"
+
+# Counter that versions entries. Writers take a stamp and then read Postgres,
+# so a higher stamp always read the later commit.
+STAMP_KEY = "live_call_registry:stamp"
+
+# Stamp at which a call's entry was last removed, kept long enough to outlast
+# a reconcile that read the call before it ended
+TOMBSTONE_KEY = "live_call_registry:ended:"
+
+# A call is live from the moment its row exists (dispatching, pending_webrtc,
+# queued, ...) until it has an end time or reaches one of these
+ENDED_CALL_STATUSES = [state for state, rank in CALL_STATUS_RANK.items() if rank >= CALL_TERMINAL_RANK]
+
+# Removals at this version drop the entry whatever it holds
+ANY_VERSION = 2 ** 62
+
+# ARGV: the tombstone key prefix and TTL, the number of entries to write, then
+# (call ID, version, entry) for each, then (call ID, version) for each entry
+# to remove. An entry is only written over an older version and above its
+# tombstone, and only removed at its version or older, so a writer that read
+# Postgres before a later one cannot undo it. Removals leave a tombstone, so a
+# call that ended after a reconcile read it is not written back.
+APPLY_SCRIPT = """
+local prefix, ttl = ARGV[1], ARGV[2]
+local writes = tonumber(ARGV[3])
+local i = 4
+for _ = 1, writes do
+    local version = tonumber(ARGV[i + 1])
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    local ended = redis.call('GET', prefix .. ARGV[i])
+    if (not current or cjson.decode(current)['version'] <= version)
+            and (not ended or tonumber(ended) < version) then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 2])
+    end
+    i = i + 3
+end
+local removed = 0
+while i < #ARGV do
+    local version = tonumber(ARGV[i + 1])
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    if current and cjson.decode(current)['version'] <= version then
+        removed = removed + redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+    local ended = redis.call('GET', prefix .. ARGV[i])
+    if not ended or tonumber(ended) < version then
+        redis.call('SET', prefix .. ARGV[i], ARGV[i + 1], 'EX', ttl)
+    end
+    i = i + 2
+end
+return removed
+"""
+
+def _is_live(row) -> bool:
+    return row.call_end is None and row.status not in ENDED_CALL_STATUSES
+
+def seconds_since(timestamp: Optional[str]) -> int:
+    """Whole seconds from an entry's ISO timestamp to now, 0 if unset"""
+    if not timestamp:
+        return 0
+    return int((datetime.now(tz=timezone.utc) - datetime.fromisoformat(timestamp)).total_seconds())
+
+def on_network(status: Optional[str]) -> bool:
+    """Ringing or connected, as opposed to still being placed"""
+    return status_rank(status) > 0
+
+class LiveCallRegistry:
+    """Redis hash of every call that has not ended, keyed by call ID.
+
+    Each entry holds what the live views show, with the agent's name, type and
+    designation copied in, so reading the live calls is one HGETALL over the
+    active calls rather than a query on calls by status joined to agents and
+    users. Writers call refresh with the call IDs they committed; it takes a
+    stamp from a Redis counter, re-reads those calls and writes, updates or
+    drops their entries at that stamp, so refreshes that finish out of order
+    keep the newest state.
+
+    Entries whose call has not changed for LIVE_CALL_STALE_SECONDS are swept,
+    on the assumption that the provider's end event was lost, and reconcile
+    rebuilds the registry from Postgres to repair anything a failed write left
+    behind. Calls that started more than LIVE_CALL_STALE_SECONDS ago are left
+    to the sweep, which keeps the reconcile query on the latest partition.
+    """
+
+    def __init__(self, key: str = REGISTRY_KEY, stale_seconds: int = settings.LIVE_CALL_STALE_SECONDS):
+        self.key = key
+        self.stale_seconds = stale_seconds
+        # Long enough for any reconcile that read a call before it ended to finish
+        self.tombstone_seconds = settings.LIVE_CALL_RECONCILE_SECONDS
+
+    def _query(self):
+        return (
+            select(
+                Call.id,
+                Call.at_session_id,
+                Call.caller_number,
+                Call.callee_number,
+                Call.status,
+                Call.direction,
+                Call.call_start,
+                Call.call_answered,
+                Call.call_end,
+                Call.agent_id,
+                func.concat_ws(" ", User.first_name, User.last_name).label("agent_name"),
+                Agent.agent_type,
+                User.designation,
+                Call.updated_at,
+            )
+            .outerjoin(Agent, Call.agent_id == Agent.id)
+            .outerjoin(User, Agent.user_id == User.id)
+        )
+
+    def _entry(self, row, version: int) -> dict:
+        entry = row._asdict()
+        entry["agent_name"] = entry["agent_name"] or None
+        del entry["call_end"]
+        entry["version"] = version
+        return entry
+
+    async def _stamp(self) -> Optional[int]:
+        try:
+            return await redis_client.incr(STAMP_KEY)
+        except Exception:
+            # Logged by the client; the next reconcile repairs the registry
+            return None
+
+    async def _apply(self, entries: List[dict], removals: Sequence[tuple]) -> int:
+        """Write entries and remove (call ID, version) pairs; returns entries removed"""
+        if not entries and not removals:
+            return 0
+        args = [TOMBSTONE_KEY, self.tombstone_seconds, len(entries)]
+        for entry in entries:
+            args += [str(entry["id"]), entry["version"], dumps(entry).decode()]
+        for call_id, version in removals:
+            args += [str(call_id), version]
+        try:
+            return await redis_client.eval(APPLY_SCRIPT, [self.key], args)
+        except Exception as e:
+            # The next reconcile repairs the registry
+            logger.error(f"Live call registry update failed: {e}")
+            return 0
+
+    async def refresh(self, db: AsyncSession, call_ids: Sequence) -> None:
+        """Re-read committed calls and write, update or drop their entries"""
+        if not call_ids:
+            return
+        stamp = await self._stamp()
+        if stamp is None:
+            return
+        rows = (await db.execute(self._query().where(Call.id.in_(list(call_ids))))).all()
+        found = {row.id for row in rows}
+        entries = [self._entry(row, stamp) for row in rows if _is_live(row)]
+        removals = [(row.id, stamp) for row in rows if not _is_live(row)]
+        removals += [(call_id, ANY_VERSION) for call_id in call_ids if call_id not in found]
+        await self._apply(entries, removals)
+
+    async def remove(self, call_ids: Sequence) -> None:
+        """Drop deleted calls"""
+        await self._apply([], [(call_id, ANY_VERSION) for call_id in call_ids])
+
+    async def entries(self) -> List[dict]:
+        """Every entry, newest call first"""
+        entries = [json.loads(value) for value in (await redis_client.hgetall(self.key)).values()]
+        return sorted(entries, key=lambda entry: entry["call_start"] or "", reverse=True)
+
+    async def live_calls(self, agent_type: Optional[str] = None, designation: Optional[str] = None) -> List[dict]:
+        """LiveCallResponse dicts for ringing and connected calls; duration is seconds since the call started"""
+        calls = []
+        for entry in await self.entries():
+            if not on_network(entry["status"]):
+                continue
+            if agent_type and entry["agent_type"] != agent_type:
+                continue
+            if designation and entry["designation"] != designation:
+                continue
+            calls.append({
+                "id": entry["id"],
+                "caller_number": entry["caller_number"],
+                "callee_number": entry["callee_number"],
+                "status": entry["status"],
+                "direction": entry["direction"],
+                "call_start": entry["call_start"],
+                "duration": seconds_since(entry["call_start"]),
+                "agent_id": entry["agent_id"],
+                "agent_name": entry["agent_name"],
+            })
+        return calls
+
+    async def sweep(self) -> int:
+        """Drop entries whose call has not changed for stale_seconds; returns entries dropped"""
+        stale = [
+            (entry["id"], entry["version"]) for entry in await self.entries()
+            if seconds_since(entry["updated_at"] or entry["call_start"]) > self.stale_seconds
+        ]
+        return await self._apply([], stale)
+
+    async def reconcile(self, db: AsyncSession) -> dict:
+        """Make the registry match Postgres; returns counts of entries written and dropped.
+
+        Loads every call that started within stale_seconds and has not ended,
+        writes those entries, and drops entries for other calls
+        unless a refresh wrote them after the reconcile took its stamp.
+        """
+        started = time.monotonic()
+        stamp = await self._stamp()
+        if stamp is None:
+            return {"live": 0, "removed": 0}
+        cutoff = datetime.now(tz=timezone.utc) - timedelta(seconds=self.stale_seconds)
+        rows = (await db.execute(
+            self._query()
+            .where(and_(
+                Call.call_start >= cutoff,
+                Call.call_end.is_(None),
+                func.coalesce(Call.status, "").notin_(ENDED_CALL_STATUSES)
+            ))
+        )).all()
+        entries = [self._entry(row, stamp) for row in rows]
+        live = {str(entry["id"]) for entry in entries}
+        extra = [(entry["id"], stamp) for entry in await self.entries() if entry["id"] not in live]
+        removed = await self._apply(entries, extra)
+        logger.info(f"Reconciled live call registry: {len(entries)} live, {removed} dropped in {time.monotonic() - started:.2f}s")
+        return {"live": len(entries), "removed": removed}
+
+# Global instance
+live_call_registry = LiveCallRegistry()
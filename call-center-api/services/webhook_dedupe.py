@@ -0,0 +1,54 @@
+import hashlib
+import json
+import logging
+from typing import Dict
+
+from api.redis_client import redis_client
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class WebhookDeduplicator:
+    """Suppress Africa's Talking callback retries before they reach the ingest queue.
+
+    Each callback is keyed by (sessionId, state, payload hash). Redis SET NX with
+    a TTL is the shared record of keys already accepted by any worker, so each
+    callback costs one round trip whether or not it is a retry.
+    """
+
+    def __init__(self, ttl: int = settings.WEBHOOK_DEDUPE_TTL_SECONDS):
+        self.ttl = ttl
+        self.counters: Dict[str, int] = {"checked": 0, "suppressed": 0}
+
+    def key_for(self, data: dict) -> str:
+        state = data.get("callSessionState") or data.get("status") or data.get("event") or ""
+        digest = hashlib.blake2b(json.dumps(data, sort_keys=True).encode(), digest_size=8).hexdigest()
+        return f"webhook_seen:{data.get('sessionId')}:{state}:{digest}"
+
+    async def is_duplicate(self, data: dict) -> bool:
+        """True if this exact callback was already accepted; otherwise claims it"""
+        key = self.key_for(data)
+        self.counters["checked"] += 1
+        try:
+            claimed = await redis_client.set_nx(key, "1", self.ttl)
+        except Exception:
+            # Fail open: a duplicate write is harmless, a dropped callback is not
+            return False
+
+        if not claimed:
+            self.counters["suppressed"] += 1
+        return not claimed
+
+    async def forget(self, data: dict) -> None:
+        """Release a claimed key so the provider's retry is accepted after a failed enqueue"""
+        await redis_client.delete(self.key_for(data))
+
+    def stats(self) -> dict:
+        checked = self.counters["checked"]
+        return {
+            **self.counters,
+            "suppression_ratio": round(self.counters["suppressed"] / checked, 4) if checked else 0.0,
+        }
+
+# Global instance
+webhook_dedupe = WebhookDeduplicator()
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from api.redis_client import redis_client
+from api.websocket import NODE_ID
+from core.config import settings
+from crud.call import call_crud
+from database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+def percentile(samples, fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class WebhookMetrics:
+    """Per-worker ack latency, processing lag and throughput counters"""
+
+    def __init__(self, window: int = 2048):
+        self.ack_ms: Deque[float] = deque(maxlen=window)
+        self.lag_ms: Deque[float] = deque(maxlen=window)
+        self.counters: Dict[str, int] = {
+            "enqueued": 0,
+            "applied": 0,
+            "batches": 0,
+            "dead_lettered": 0,
+            "inline_fallback": 0,
+            "consumers_removed": 0,
+        }
+
+    def record_ack(self, started: float):
+        self.ack_ms.append((time.perf_counter() - started) * 1000)
+
+    def summary(self) -> dict:
+        return {
+            **self.counters,
+            "ack_ms": {"p50": percentile(self.ack_ms, 0.5), "p99": percentile(self.ack_ms, 0.99), "samples": len(self.ack_ms)},
+            "processing_lag_ms": {"p50": percentile(self.lag_ms, 0.5), "p99": percentile(self.lag_ms, 0.99), "samples": len(self.lag_ms)},
+        }
+
+class WebhookIngestQueue:
+    """Durable Redis Stream queue between the webhook endpoints and the calls table.
+
+    Webhooks are appended with XADD and acknowledged straight away; a pool of
+    consumers in a shared consumer group reads them in micro-batches and applies
+    each batch in one transaction. Entries are XACKed only after the commit, so
+    a crash leaves them pending and they are claimed by another consumer once
+    idle for WEBHOOK_CLAIM_IDLE_MS. Consumer names are per process, so the
+    claiming consumer also removes consumers that have been idle that long
+    with nothing pending, which keeps restarts from piling them up.
+    """
+
+    def __init__(self, key: str = "webhooks:calls", group: str = "call-webhooks"):
+        self.key = key
+        self.group = group
+        self.dead_letter_key = f"{key}:dead"
+        self.metrics = WebhookMetrics()
+        self.running = False
+        self._tasks: List[asyncio.Task] = []
+        self._pruned_at = 0.0
+
+    async def enqueue(self, data: dict) -> Optional[str]:
+        """Queue a callback payload; applies it inline if Redis is unavailable"""
+        fields = {"data": json.dumps(data), "received_at": str(int(time.time() * 1000))}
+        entry_id = await redis_client.xadd(self.key, fields, maxlen=settings.WEBHOOK_STREAM_MAXLEN)
+        if entry_id:
+            self.metrics.counters["enqueued"] += 1
+            return entry_id
+
+        logger.warning(f"Webhook queue unavailable, applying session {data.get('sessionId')} inline")
+        self.metrics.counters["inline_fallback"] += 1
+        async with AsyncSessionLocal() as db:
+            await call_crud.apply_webhook_events(db, [data])
+        return None
+
+    async def _apply(self, entries) -> None:
+        # Pending entries trimmed from the stream come back without fields
+        trimmed = [entry_id for entry_id, fields in entries if not fields]
+        if trimmed:
+            await redis_client.xack(self.key, self.group, *trimmed)
+            entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+            if not entries:
+                return
+
+        # Stamp events with their arrival time so queue lag does not skew call timings
+        events = [{**json.loads(fields["data"]), "_received_at": int(fields["received_at"])} for _, fields in entries]
+        try:
+            async with AsyncSessionLocal() as db:
+                applied = await call_crud.apply_webhook_events(db, events)
+        except (IntegrityError, DataError) as e:
+            # A malformed event poisons the whole batch; retry one at a time and park the bad ones
+            logger.warning(f"Webhook batch rejected ({e.__class__.__name__}), retrying events individually")
+            applied = 0
+            for (entry_id, fields), event in zip(entries, events):
+                try:
+                    async with AsyncSessionLocal() as db:
+                        applied += await call_crud.apply_webhook_events(db, [event])
+                except (IntegrityError, DataError) as e:
+                    logger.error(f"Dead-lettering webhook {entry_id}: {str(e)}")
+                    await redis_client.xadd(self.dead_letter_key, {**fields, "error": str(e)[:500]}, maxlen=settings.WEBHOOK_STREAM_MAXLEN)
+                    self.metrics.counters["dead_lettered"] += 1
+
+        await redis_client.xack(self.key, self.group, *[entry_id for entry_id, _ in entries])
+
+        now_ms = time.time() * 1000
+        for _, fields in entries:
+            self.metrics.lag_ms.append(now_ms - int(fields.get("received_at", now_ms)))
+        self.metrics.counters["applied"] += applied
+        self.metrics.counters["batches"] += 1
+
+    async def _prune_consumers(self) -> None:
+        """Remove consumers of dead processes once their pending entries have been claimed"""
+        if time.monotonic() - self._pruned_at < settings.WEBHOOK_CLAIM_IDLE_MS / 1000:
+            return
+        self._pruned_at = time.monotonic()
+        for info in await redis_client.xinfo_consumers(self.key, self.group):
+            if info.get("pending") or info.get("idle", 0) < settings.WEBHOOK_CLAIM_IDLE_MS:
+                continue
+            await redis_client.xgroup_delconsumer(self.key, self.group, info["name"])
+            self.metrics.counters["consumers_removed"] += 1
+            logger.info(f"Removed idle webhook consumer {info['name']}")
+
+    async def _consume(self, consumer: str, claim_stale: bool) -> None:
+        # Re-read anything this consumer left pending (after an error) before taking new entries
+        cursor = "0"
+        while self.running:
+            try:
+                response = await redis_client.xreadgroup(
+                    self.group,
+                    consumer,
+                    {self.key: cursor},
+                    count=settings.WEBHOOK_BATCH_SIZE,
+                    block=None if cursor == "0" else settings.WEBHOOK_BATCH_BLOCK_MS
+                )
+                entries = response[0][1] if response else []
+                if cursor == "0" and not entries:
+                    cursor = ">"
+                    continue
+                if not entries and claim_stale:
+                    entries = await redis_client.xautoclaim(
+                        self.key, self.group, consumer, settings.WEBHOOK_CLAIM_IDLE_MS, count=settings.WEBHOOK_BATCH_SIZE
+                    )
+                    if not entries:
+                        await self._prune_consumers()
+                if entries:
+                    await self._apply(entries)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Unacked entries stay pending and are retried after the claim idle time
+                logger.error(f"Webhook consumer {consumer} error: {e}")
+                await asyncio.sleep(1)
+
+    async def start(self):
+        """Create the consumer group and run the consumer pool until stopped"""
+        self.running = True
+        delay = 1
+        while self.running:
+            try:
+                await redis_client.xgroup_create(self.key, self.group)
+                break
+            except Exception as e:
+                logger.error(f"Webhook consumer group not created: {e}; retrying in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+        self._tasks = [
+            asyncio.create_task(self._consume(f"{NODE_ID}:{index}", claim_stale=index == 0))
+            for index in range(settings.WEBHOOK_CONSUMERS)
+        ]
+        logger.info(f"Webhook ingest started with {len(self._tasks)} consumers")
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def stop(self):
+        self.running = False
+        for task in self._tasks:
+            task.cancel()
+        logger.info("Webhook ingest stopped")
+
+    async def stats(self) -> dict:
+        info = await redis_client.xinfo_group(self.key, self.group) or {}
+        return {
+            "node_id": NODE_ID,
+            "stream_length": await redis_client.xlen(self.key),
+            "pending": info.get("pending"),
+            "undelivered": info.get("lag"),
+            "dead_letters": await redis_client.xlen(self.dead_letter_key),
+            **self.metrics.summary(),
+        }
+
+# Global instance
+webhook_ingest = WebhookIngestQueue()
@@ -6,6 +6,9 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from database import engine
 from crud.activity_log import activity_log_crud
 from utils.activity_logger import log_system_event
+from services.call_partitions import ensure_call_partitions
+from services.live_calls import live_call_registry
+from services.call_dispatcher import call_dispatcher
 
 logger = logging.getLogger(__name__)
 
@@ -63,5 +66,49 @@ class CleanupTasks:
                 severity="error"
             )
 
+    async def ensure_call_partitions(self):
+        """Create calls partitions for the coming months"""
+        try:
+            async with engine.begin() as conn:
+                created = await ensure_call_partitions(conn)
+            if created:
+                await log_system_event(
+                    activity_type="system_optimization",
+                    description=f"Created calls partitions: {', '.join(created)}",
+                    severity="info",
+                    context_data={"partitions": created}
+                )
+        except Exception as e:
+            logger.error(f"Calls partition maintenance failed: {e}")
+            await log_system_event(
+                activity_type="system_optimization_failed",
+                description=f"Calls partition maintenance failed: {str(e)}",
+                severity="error"
+            )
+
+    async def sweep_stale_dispatches(self):
+        """Fail calls whose dispatch job was lost to a restart"""
+        try:
+            await call_dispatcher.sweep_stale()
+        except Exception as e:
+            logger.error(f"Stale dispatch sweep failed: {e}")
+
+    async def sweep_live_calls(self):
+        """Drop live call registry entries whose calls stopped changing long ago"""
+        try:
+            swept = await live_call_registry.sweep()
+            if swept:
+                logger.info(f"Swept {swept} stale live call entries")
+        except Exception as e:
+            logger.error(f"Live call sweep failed: {e}")
+
+    async def reconcile_live_calls(self):
+        """Rebuild the live call registry from Postgres"""
+        try:
+            async with self.async_session() as db:
+                await live_call_registry.reconcile(db)
+        except Exception as e:
+            logger.error(f"Live call reconcile failed: {e}")
+
 # Global instance
 cleanup_tasks = CleanupTasks()
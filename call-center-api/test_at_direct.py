@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import asyncio
 import os
 import sys
 from dotenv import load_dotenv
@@ -12,7 +13,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.africastalking_service import africastalking_service
 
-def test_direct_call():
+async def test_direct_call():
     """Test making a call directly through the service"""
     test_phone = "+254112153848"
     
@@ -20,7 +21,7 @@ def test_direct_call():
     print(f"Target Phone: {test_phone}")
     print(f"Service Username: {africastalking_service.username}")
     print(f"Service Sandbox Mode: {africastalking_service.is_sandbox}")
-    print(f"Voice Service Initialized: {africastalking_service.voice is not None}")
+    print(f"Voice Service Initialized: {africastalking_service.enabled}")
     print(f"Available Numbers: {africastalking_service.phone_numbers}")
     print()
     
@@ -31,7 +32,7 @@ def test_direct_call():
     
     # Make the call
     print("Making call...")
-    result = africastalking_service.make_call(to=test_phone)
+    result = await africastalking_service.make_call(to=test_phone)
     
     print("Call Result:")
     print(f"  Success: {result.get('success')}")
@@ -46,4 +47,4 @@ def test_direct_call():
     return result.get('success', False)
 
 if __name__ == "__main__":
-    test_direct_call()
+    asyncio.run(test_direct_call())
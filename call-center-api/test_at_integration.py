@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import asyncio
 import os
 import sys
 from dotenv import load_dotenv
@@ -12,7 +13,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.africastalking_service import africastalking_service
 
-def test_at_integration():
+async def test_at_integration():
     print("=== Africa's Talking Integration Test ===")
     
     # Test phone number formatting
@@ -31,7 +32,7 @@ def test_at_integration():
     # Test service initialization
     print(f"\n2. Service Status:")
     print(f"  Username: {africastalking_service.username}")
-    print(f"  Voice service initialized: {africastalking_service.voice is not None}")
+    print(f"  Voice service initialized: {africastalking_service.enabled}")
     print(f"  Sandbox mode: {africastalking_service.is_sandbox}")
     print(f"  Available numbers: {africastalking_service.phone_numbers}")
     
@@ -40,7 +41,7 @@ def test_at_integration():
     test_to = "0112153848"  # The number from your log
     
     try:
-        result = africastalking_service.make_call(to=test_to)
+        result = await africastalking_service.make_call(to=test_to)
         print(f"  Call result: {result}")
         
         if result.get("success"):
@@ -60,4 +61,4 @@ def test_at_integration():
         print(f"  ❌ Exception during call: {str(e)}")
 
 if __name__ == "__main__":
-    test_at_integration()
+    asyncio.run(test_at_integration())
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import asyncio
 import os
 import sys
 from dotenv import load_dotenv
@@ -9,7 +10,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.africastalking_service import africastalking_service
 
-def test_call_with_recording():
+async def test_call_with_recording():
     """Test making a call with recording enabled"""
     test_phone = "+254112153848"
     callback_url = "https://ncc.newarkfrontierstech.co.ke/api/webhooks/africastalking"
@@ -20,7 +21,7 @@ def test_call_with_recording():
     print()
     
     # Make the call with recording
-    result = africastalking_service.make_call(
+    result = await africastalking_service.make_call(
         to=test_phone,
         record=True,
         callback_url=callback_url
@@ -40,4 +41,4 @@ def test_call_with_recording():
     return result
 
 if __name__ == "__main__":
-    test_call_with_recording()
+    asyncio.run(test_call_with_recording())
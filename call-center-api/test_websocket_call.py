@@ -21,7 +21,7 @@ async def test_call_with_websocket():
     
     # Make the call
     print("Making call...")
-    result = africastalking_service.make_call(to=test_phone)
+    result = await africastalking_service.make_call(to=test_phone)
     
     if not result.get("success"):
         print(f"Call failed: {result.get('error')}")
@@ -0,0 +1,11 @@
+import fakeredis
+import pytest
+
+from api.redis_client import redis_client
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point the shared redis_client at an in-memory Redis that runs Lua"""
+    server = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "redis", server)
+    return server
@@ -0,0 +1,57 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from crud.call import CALL_CACHE_KEY, CALL_CACHE_STAMP_KEY, write_call_cache
+from crud.read_models import read_models
+
+CALL_ID = uuid.uuid4()
+KEY = CALL_CACHE_KEY.format(CALL_ID)
+
+@pytest.mark.asyncio
+async def test_a_lower_stamp_does_not_overwrite_a_higher_one(fake_redis):
+    await write_call_cache({CALL_ID: '{"status":"completed"}'}, 5)
+    await write_call_cache({CALL_ID: '{"status":"ringing"}'}, 4)
+    assert await fake_redis.get(KEY) == '{"status":"completed"}'
+    assert await fake_redis.get(f"{KEY}:stamp") == "5"
+
+@pytest.mark.asyncio
+async def test_an_equal_or_higher_stamp_overwrites(fake_redis):
+    await write_call_cache({CALL_ID: '{"status":"ringing"}'}, 5)
+    await write_call_cache({CALL_ID: '{"status":"answered"}'}, 5)
+    assert await fake_redis.get(KEY) == '{"status":"answered"}'
+    await write_call_cache({CALL_ID: '{"status":"completed"}'}, 6)
+    assert await fake_redis.get(KEY) == '{"status":"completed"}'
+
+@pytest.mark.asyncio
+async def test_a_delete_leaves_its_stamp_behind(fake_redis):
+    await write_call_cache({CALL_ID: '{"status":"ringing"}'}, 1)
+    await write_call_cache({CALL_ID: None}, 3)
+    assert await fake_redis.get(KEY) is None
+    assert await fake_redis.get(f"{KEY}:stamp") == "3"
+    assert await fake_redis.ttl(f"{KEY}:stamp") > 0
+
+    # A miss filled from a query that ran before the delete is dropped
+    await write_call_cache({CALL_ID: '{"status":"ringing"}'}, 2)
+    assert await fake_redis.get(KEY) is None
+
+class RacingSession:
+    """Stands in for AsyncSession: the query returns a stale row while a writer commits a newer one"""
+
+    def __init__(self, fake_redis):
+        self.fake_redis = fake_redis
+
+    async def execute(self, query):
+        stamp = await self.fake_redis.incr(CALL_CACHE_STAMP_KEY)
+        await write_call_cache({CALL_ID: '{"status":"completed"}'}, stamp)
+        row = SimpleNamespace(id=CALL_ID, _asdict=lambda: {"status": "ringing"})
+        return SimpleNamespace(all=lambda: [row])
+
+@pytest.mark.asyncio
+async def test_a_miss_filled_before_a_later_write_does_not_overwrite_it(fake_redis):
+    await fake_redis.set(CALL_CACHE_STAMP_KEY, 7)
+    found = await read_models._cached_calls(RacingSession(fake_redis), [CALL_ID])
+    assert found[CALL_ID] == '{"status":"ringing"}'
+    assert await fake_redis.get(KEY) == '{"status":"completed"}'
+    assert await fake_redis.get(f"{KEY}:stamp") == "8"
@@ -0,0 +1,35 @@
+import pytest
+
+from api.redis_client import redis_client
+
+from services.call_routing import CallRoutingTable
+
+RESULT = {"success": True, "data": {"entries": [{"sessionId": "ATVId_1"}]}, "to_number": "+254712345678"}
+
+@pytest.mark.asyncio
+async def test_misses_are_cached_for_unknown_sessions(fake_redis):
+    routing = CallRoutingTable(negative_ttl=60)
+    assert await routing.get("ATVId_1") is None
+    await fake_redis.set("call_route:ATVId_1", "+254712345678")
+    assert await routing.get("ATVId_1") is None
+
+@pytest.mark.asyncio
+async def test_a_webhook_before_the_route_is_recorded_does_not_cache_a_miss(fake_redis, monkeypatch):
+    routing = CallRoutingTable(negative_ttl=60)
+
+    async def get_then_record(key):
+        # The provider calls back while the Voice API request is still open:
+        # the lookup reads Redis before the route is written and returns after
+        value = await fake_redis.get(key)
+        await routing.record(RESULT)
+        return value
+
+    monkeypatch.setattr(redis_client, "get", get_then_record)
+    async with routing.dispatching():
+        assert await routing.get("ATVId_1") is None
+    assert await routing.get("ATVId_1") == "+254712345678"
+
+@pytest.mark.asyncio
+async def test_routes_written_by_another_worker_are_found(fake_redis):
+    await CallRoutingTable().record(RESULT)
+    assert await CallRoutingTable().get("ATVId_1") == "+254712345678"
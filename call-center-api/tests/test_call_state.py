@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+from services.call_state import event_from_webhook, reduce_call_events, webhook_state
+
+START = datetime(2025, 3, 1, 9, 0, tzinfo=timezone.utc)
+
+def event(state: str, seconds: int, **payload) -> dict:
+    return {"at_session_id": "ATVId_1", "state": state, "occurred_at": START + timedelta(seconds=seconds), "payload": payload}
+
+def test_reduce_call_events_projects_a_completed_call():
+    projection = reduce_call_events([
+        event("ringing", 0, callerNumber="+254700000000", destinationNumber="0712345678"),
+        event("answered", 5),
+        event("completed", 65, durationInSeconds="61"),
+    ])
+    assert projection["status"] == "completed"
+    assert projection["call_start"] == START
+    assert projection["call_answered"] == START + timedelta(seconds=5)
+    assert projection["call_end"] == START + timedelta(seconds=65)
+    assert projection["total_duration"] == 61
+    assert projection["caller_number"] == "+254700000000"
+    assert projection["callee_number"] == "0712345678"
+
+def test_reduce_call_events_never_moves_status_back():
+    projection = reduce_call_events([event("ringing", 0), event("completed", 30), event("ringing", 31)])
+    assert projection["status"] == "completed"
+    assert projection["call_end"] == START + timedelta(seconds=30)
+
+def test_reduce_call_events_falls_back_to_end_minus_answer():
+    projection = reduce_call_events([event("answered", 10), event("ended", 40)])
+    assert projection["total_duration"] == 30
+
+def test_reduce_call_events_without_answer_has_no_talk_time():
+    projection = reduce_call_events([event("ringing", 0), event("no-answer", 20)])
+    assert projection["call_answered"] is None
+    assert projection["total_duration"] == 0
+
+def test_reduce_call_events_of_nothing():
+    assert reduce_call_events([]) is None
+
+def test_webhook_state_lowercases_the_session_state():
+    assert webhook_state({"callSessionState": "Completed", "isActive": "0"}) == "completed"
+    assert webhook_state({"callSessionState": "Ringing", "isActive": "1"}) == "ringing"
+    assert webhook_state({"status": "Answered", "callSessionState": "Ringing"}) == "answered"
+
+def test_webhook_state_reads_inactive_calls_as_ended():
+    assert webhook_state({"callSessionState": "Answered", "isActive": "0"}) == "ended"
+    assert webhook_state({"isActive": "0"}) == "ended"
+    assert webhook_state({"status": "Failed", "isActive": "0"}) == "failed"
+    assert webhook_state({}) == "unknown"
+
+def test_capitalized_session_states_end_the_call():
+    projection = reduce_call_events([
+        event_from_webhook({"sessionId": "ATVId_1", "callSessionState": "Ringing", "isActive": "1"}, START),
+        event_from_webhook({"sessionId": "ATVId_1", "callSessionState": "Answered", "isActive": "1"}, START + timedelta(seconds=5)),
+        event_from_webhook({"sessionId": "ATVId_1", "callSessionState": "Completed", "isActive": "0"}, START + timedelta(seconds=65)),
+    ])
+    assert projection["status"] == "completed"
+    assert projection["call_answered"] == START + timedelta(seconds=5)
+    assert projection["call_end"] == START + timedelta(seconds=65)
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services import caller_id_pool as pool_module
+from services.caller_id_pool import CallerIdPool
+
+NUMBERS = ["+254700000001", "+254700000002"]
+
+@pytest.fixture
+def now(monkeypatch):
+    """Freeze the pool's clock so the per-second cap does not roll over mid-test"""
+    clock = {"now": 1_700_000_000.0}
+    monkeypatch.setattr(pool_module, "time", SimpleNamespace(time=lambda: clock["now"]))
+    return clock
+
+@pytest.mark.asyncio
+async def test_acquire_picks_the_least_loaded_number(fake_redis, now):
+    pool = CallerIdPool(NUMBERS, max_concurrent=5, max_cps=10, stale_seconds=60)
+    first, _ = await pool.acquire()
+    second, _ = await pool.acquire()
+    assert {first, second} == set(NUMBERS)
+    assert [row["in_flight"] for row in await pool.utilization()] == [1, 1]
+
+@pytest.mark.asyncio
+async def test_acquire_returns_none_when_every_number_is_at_capacity(fake_redis, now):
+    pool = CallerIdPool(NUMBERS, max_concurrent=1, max_cps=10, stale_seconds=60)
+    assert await pool.acquire() is not None
+    assert await pool.acquire() is not None
+    assert await pool.acquire() is None
+
+@pytest.mark.asyncio
+async def test_acquire_respects_the_per_second_cap(fake_redis, now):
+    pool = CallerIdPool(NUMBERS[:1], max_concurrent=5, max_cps=1, stale_seconds=60)
+    number, reservation = await pool.acquire()
+    await pool.release_reservation(number, reservation)
+    assert await pool.acquire() is None
+    now["now"] += 1
+    assert await pool.acquire() is not None
+
+@pytest.mark.asyncio
+async def test_release_session_frees_the_slot_once(fake_redis, now):
+    pool = CallerIdPool(NUMBERS[:1], max_concurrent=1, max_cps=10, stale_seconds=60)
+    number, reservation = await pool.acquire()
+    await pool.bind("ATVId_1", number, reservation)
+    assert await pool.release_session("ATVId_1") == number
+    assert await pool.release_session("ATVId_1") is None
+    now["now"] += 1
+    assert await pool.acquire() is not None
+
+@pytest.mark.asyncio
+async def test_reservations_age_out_after_stale_seconds(fake_redis, now):
+    pool = CallerIdPool(NUMBERS[:1], max_concurrent=1, max_cps=10, stale_seconds=60)
+    assert await pool.acquire() is not None
+    now["now"] += 30
+    assert await pool.acquire() is None
+    now["now"] += 31
+    assert await pool.acquire() is not None
@@ -0,0 +1,54 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services import capability_token_cache as cache_module
+from services.capability_token_cache import CapabilityTokenCache
+
+TOKEN = {"token": "ATCAP_1", "clientName": "agent_john", "lifeTimeSec": "86400"}
+
+def fetcher(calls: list, result=None, delay: float = 0):
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result or {"success": True, "data": TOKEN}
+    return fetch
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch(fake_redis):
+    cache = CapabilityTokenCache(margin=300)
+    calls = []
+    results = await asyncio.gather(*(cache.get("agent_john", None, fetcher(calls, delay=0.01)) for _ in range(5)))
+    assert len(calls) == 1
+    assert all(result["data"]["token"] == "ATCAP_1" for result in results)
+    assert cache.counters == {"hits": 0, "misses": 1, "coalesced": 4}
+
+@pytest.mark.asyncio
+async def test_failed_fetches_are_not_cached(fake_redis):
+    cache = CapabilityTokenCache(margin=300)
+    calls = []
+    failure = {"success": False, "error": "provider down"}
+    assert await cache.get("agent_john", None, fetcher(calls, failure)) == failure
+    await cache.get("agent_john", None, fetcher(calls))
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_other_workers_hit_the_shared_copy(fake_redis):
+    calls = []
+    await CapabilityTokenCache(margin=300).get("agent_john", "+254700000000", fetcher(calls))
+    result = await CapabilityTokenCache(margin=300).get("agent_john", "+254700000000", fetcher(calls))
+    assert len(calls) == 1
+    assert result["data"]["token"] == "ATCAP_1"
+
+@pytest.mark.asyncio
+async def test_hits_report_the_remaining_lifetime(fake_redis, monkeypatch):
+    clock = {"now": 1_700_000_000.0}
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: clock["now"], monotonic=lambda: clock["now"]))
+    cache = CapabilityTokenCache(margin=300)
+    calls = []
+    await cache.get("agent_john", None, fetcher(calls))
+    clock["now"] += 3600
+    result = await cache.get("agent_john", None, fetcher(calls))
+    assert len(calls) == 1
+    assert result["data"]["lifeTimeSec"] == 86400 - 3600
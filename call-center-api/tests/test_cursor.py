@@ -0,0 +1,18 @@
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from crud.call import decode_cursor, encode_cursor
+
+START = datetime(2025, 3, 1, 9, 0, tzinfo=timezone.utc)
+
+def test_cursor_round_trip():
+    call = SimpleNamespace(call_start=START, id=uuid.uuid4())
+    assert decode_cursor(encode_cursor(call)) == (call.call_start, call.id)
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(SimpleNamespace(call_start=START, id="x"))])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
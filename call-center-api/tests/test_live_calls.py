@@ -0,0 +1,76 @@
+import json
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from services.live_calls import REGISTRY_KEY, LiveCallRegistry
+
+Row = namedtuple("Row", [
+    "id", "at_session_id", "caller_number", "callee_number", "status", "direction", "call_start",
+    "call_answered", "call_end", "agent_id", "agent_name", "agent_type", "designation", "updated_at",
+])
+
+CALL_ID = uuid.uuid4()
+
+def row(status: str, ended: bool = False, age: int = 0) -> Row:
+    at = datetime.now(tz=timezone.utc) - timedelta(seconds=age)
+    return Row(
+        CALL_ID, "ATVId_1", "+254700000000", "+254712345678", status, "outbound", at,
+        None, at if ended else None, None, "", None, None, at,
+    )
+
+class Session:
+    """Stands in for AsyncSession: runs during() inside the query, then returns rows"""
+
+    def __init__(self, rows, during=None):
+        self.rows = rows
+        self.during = during
+
+    async def execute(self, query):
+        if self.during:
+            await self.during()
+        return SimpleNamespace(all=lambda: self.rows)
+
+async def stored(fake_redis) -> dict:
+    return {call_id: json.loads(value) for call_id, value in (await fake_redis.hgetall(REGISTRY_KEY)).items()}
+
+@pytest.mark.asyncio
+async def test_a_refresh_that_finishes_late_keeps_the_newer_entry(fake_redis):
+    registry = LiveCallRegistry()
+    # The first refresh takes its stamp, then a second one reads and writes
+    # the answered call while the first is still reading the ringing row
+    newer = registry.refresh(Session([row("answered")]), [CALL_ID])
+    await registry.refresh(Session([row("ringing")], during=lambda: newer), [CALL_ID])
+    entry = (await stored(fake_redis))[str(CALL_ID)]
+    assert entry["status"] == "answered"
+    assert entry["version"] == 2
+
+@pytest.mark.asyncio
+async def test_a_refresh_of_an_ended_call_blocks_a_stale_reconcile_write(fake_redis):
+    registry = LiveCallRegistry()
+    await registry.refresh(Session([row("answered")]), [CALL_ID])
+    # The call ends after the reconcile took its stamp but before it writes
+    ended = registry.refresh(Session([row("completed", ended=True)]), [CALL_ID])
+    result = await registry.reconcile(Session([row("answered")], during=lambda: ended))
+    assert await stored(fake_redis) == {}
+    assert result == {"live": 1, "removed": 0}
+    assert await fake_redis.get(f"live_call_registry:ended:{CALL_ID}") == "3"
+
+@pytest.mark.asyncio
+async def test_a_removal_does_not_drop_a_newer_entry(fake_redis):
+    registry = LiveCallRegistry()
+    await registry.refresh(Session([row("ringing")]), [CALL_ID])
+    await registry._apply([], [(CALL_ID, 0)])
+    assert str(CALL_ID) in await stored(fake_redis)
+
+@pytest.mark.asyncio
+async def test_sweep_drops_only_stale_entries(fake_redis):
+    registry = LiveCallRegistry(stale_seconds=60)
+    stale_id = uuid.uuid4()
+    await registry.refresh(Session([row("ringing", age=61)._replace(id=stale_id)]), [stale_id])
+    await registry.refresh(Session([row("answered", age=5)]), [CALL_ID])
+    assert await registry.sweep() == 1
+    assert list(await stored(fake_redis)) == [str(CALL_ID)]
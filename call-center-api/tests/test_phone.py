@@ -0,0 +1,33 @@
+import pytest
+
+from crud.call import call_crud
+from utils.phone import counterparty_e164, to_e164
+
+@pytest.mark.parametrize("phone, expected", [
+    ("0712345678", "+254712345678"),
+    ("0112345678", "+254112345678"),
+    ("712345678", "+254712345678"),
+    ("254712345678", "+254712345678"),
+    ("+254712345678", "+254712345678"),
+    ("0712 345-678", "+254712345678"),
+    ("+14155551234", "+14155551234"),
+    ("agent_john", None),
+    ("+", None),
+    ("", ""),
+    (None, None),
+])
+def test_to_e164(phone, expected):
+    assert to_e164(phone) == expected
+
+def test_counterparty_is_the_number_that_is_not_ours():
+    own = ["+254700000000"]
+    assert counterparty_e164("0700000000", "0712345678", "inbound", own) == "+254712345678"
+    assert counterparty_e164("0712345678", "+254700000000", "outbound", own) == "+254712345678"
+    assert counterparty_e164("0711111111", "0722222222", "inbound", own) == "+254711111111"
+    assert counterparty_e164("agent_john", "0722222222", "outbound", own) == "+254722222222"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("phone_number", ["agent_john", ""])
+async def test_calls_by_number_for_a_non_number_is_empty(phone_number):
+    # No query is run, so no session is needed
+    assert await call_crud.get_calls_by_number(None, phone_number) == ([], None)
@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from tasks.cleanup_tasks import cleanup_tasks
+
+async def _noop(*args, **kwargs):
+    return None
+
+@pytest.fixture
+def ran_jobs(monkeypatch):
+    """Run main.lifespan without Postgres, Redis or Africa's Talking; returns an event per cleanup job"""
+    for target, name in [
+        (main, "init_db"), (main, "start_worker"), (main, "stop_worker"), (main, "start_relay"),
+        (main.redis_client, "connect"), (main.redis_client, "disconnect"),
+        (main.connection_guard, "start"), (main.connection_guard, "stop"),
+        (main.webhook_ingest, "start"), (main.webhook_ingest, "stop"),
+        (main.call_dispatcher, "stop"), (main.at_client, "close"),
+    ]:
+        monkeypatch.setattr(target, name, _noop)
+    monkeypatch.setattr(main.call_dispatcher, "start", lambda: None)
+    monkeypatch.setattr(main, "engine", SimpleNamespace(dispose=_noop))
+
+    events = {}
+    for name in ["cleanup_old_activity_logs", "ensure_call_partitions", "sweep_stale_dispatches",
+                 "sweep_live_calls", "reconcile_live_calls", "optimize_database"]:
+        event = events[name] = asyncio.Event()
+        async def job(event=event):
+            event.set()
+        monkeypatch.setattr(cleanup_tasks, name, job)
+    return events
+
+@pytest.mark.asyncio
+async def test_lifespan_reconciles_live_calls_at_startup(ran_jobs):
+    async with main.lifespan(main.app):
+        assert main.app.state.cleanup_scheduler.running
+        await asyncio.wait_for(ran_jobs["reconcile_live_calls"].wait(), timeout=5)
+        await asyncio.wait_for(ran_jobs["sweep_stale_dispatches"].wait(), timeout=5)
+    # AsyncIOScheduler.shutdown takes effect on the next loop iteration
+    await asyncio.sleep(0)
+    assert not main.app.state.cleanup_scheduler.running
+
+@pytest.mark.asyncio
+async def test_lifespan_ensures_call_partitions_at_startup_and_daily(ran_jobs):
+    async with main.lifespan(main.app):
+        await asyncio.wait_for(ran_jobs["ensure_call_partitions"].wait(), timeout=5)
+        job = next(
+            job for job in main.app.state.cleanup_scheduler.get_jobs()
+            if job.func is cleanup_tasks.ensure_call_partitions
+        )
+        assert "hour='1'" in str(job.trigger)
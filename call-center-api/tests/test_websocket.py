@@ -0,0 +1,31 @@
+import json
+
+import msgpack
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from api import ws_codec
+from api.websocket import receive_until_closed
+
+app = FastAPI()
+
+@app.websocket("/ws")
+async def echo_pings(websocket: WebSocket):
+    await ws_codec.accept(websocket)
+    await receive_until_closed(websocket)
+
+def test_a_binary_ping_on_a_msgpack_socket_gets_a_pong():
+    with TestClient(app).websocket_connect("/ws", subprotocols=["msgpack"]) as websocket:
+        # Unreadable frames are skipped rather than closing the socket
+        websocket.send_bytes(b"\xc1")
+        websocket.send_bytes(msgpack.packb({"type": "ping"}))
+        assert msgpack.unpackb(websocket.receive_bytes()) == {"type": "pong", "message": "pong"}
+
+def test_a_text_ping_gets_a_pong_in_the_socket_encoding():
+    with TestClient(app).websocket_connect("/ws", subprotocols=["msgpack"]) as websocket:
+        websocket.send_text(json.dumps({"type": "ping"}))
+        assert msgpack.unpackb(websocket.receive_bytes())["type"] == "pong"
+    with TestClient(app).websocket_connect("/ws") as websocket:
+        websocket.send_text("not json")
+        websocket.send_text(json.dumps({"type": "ping"}))
+        assert json.loads(websocket.receive_text())["type"] == "pong"
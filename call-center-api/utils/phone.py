@@ -0,0 +1,50 @@
+from typing import Iterable, Optional
+
+from core.config import settings
+
+def to_e164(phone: Optional[str]) -> Optional[str]:
+    """Normalize a Kenyan number in local (07.., 01..), bare (7.., 254..) or E.164 form to +254...
+
+    Numbers already starting with + are kept as they are, whatever the country;
+    anything that is not a number (a WebRTC client name, say) gives None.
+    """
+    if not phone:
+        return phone
+        
+    # Remove spaces and special characters
+    phone = phone.replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
+    if not phone.removeprefix("+").isdigit():
+        return None
+    
+    # Convert Kenyan local format to international
+    if phone.startswith("+"):
+        pass                        # Already E.164
+    elif phone.startswith("07") or phone.startswith("01"):
+        phone = "+254" + phone[1:]  # 0712345678 -> +254712345678
+    elif phone.startswith("7") and len(phone) == 9:
+        phone = "+254" + phone      # 712345678 -> +254712345678
+    elif phone.startswith("1") and len(phone) == 9:
+        phone = "+254" + phone      # 112345678 -> +254112345678
+    elif phone.startswith("254"):
+        phone = "+" + phone         # 254712345678 -> +254712345678
+    else:
+        # If none of the above, assume it needs +254 prefix
+        if len(phone) >= 9:
+            phone = "+254" + phone.lstrip("0")
+        
+    return phone
+
+def counterparty_e164(
+    caller_number: Optional[str],
+    callee_number: Optional[str],
+    direction: Optional[str] = None,
+    own_numbers: Iterable[str] = None
+) -> Optional[str]:
+    """The customer's side of a call in E.164: whichever number is not one of ours, else by direction"""
+    own = {to_e164(number) for number in (settings.AT_PHONE_NUMBERS if own_numbers is None else own_numbers)}
+    caller, callee = to_e164(caller_number) or None, to_e164(callee_number) or None
+    if caller in own and callee and callee not in own:
+        return callee
+    if callee in own and caller and caller not in own:
+        return caller
+    return caller if direction == "inbound" else callee